@@ -0,0 +1,18 @@
+#!./kitty/launcher/kitty +launch
+# License: GPL v3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+import importlib
+import sys
+
+
+def main() -> None:
+    name = 'benchmark'
+    if len(sys.argv) > 1 and sys.argv[1] == 'load':
+        del sys.argv[1]
+        name = 'load_test'
+    m = importlib.import_module(f'kitty_tests.{name}')
+    getattr(m, 'main')()
+
+
+if __name__ == '__main__':
+    main()
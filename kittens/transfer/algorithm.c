@@ -248,10 +248,16 @@ sign_block(Patcher *self, PyObject *args) {
     if (dest.len < (ssize_t)signature_block_size) {
         PyErr_SetString(RsyncError, "Output buffer is too small");
     }
+    bool hashed;
+    uint64_t strong_hash; uint32_t weak_hash;
+    // allow other threads to run while hashing so that multiple files can be signed in parallel
+    Py_BEGIN_ALLOW_THREADS
     self->rsync.hasher.reset(self->rsync.hasher.state);
-    if (!self->rsync.hasher.update(self->rsync.hasher.state, src.buf, src.len)) { PyErr_SetString(PyExc_ValueError, "String hashing failed"); return NULL; }
-    uint64_t strong_hash = self->rsync.hasher.oneshot64(src.buf, src.len);
-    uint32_t weak_hash = rolling_checksum_full(&self->rc, src.buf, src.len);
+    hashed = self->rsync.hasher.update(self->rsync.hasher.state, src.buf, src.len);
+    strong_hash = self->rsync.hasher.oneshot64(src.buf, src.len);
+    weak_hash = rolling_checksum_full(&self->rc, src.buf, src.len);
+    Py_END_ALLOW_THREADS
+    if (!hashed) { PyErr_SetString(PyExc_ValueError, "String hashing failed"); return NULL; }
     uint8_t *o = dest.buf;
     le64enc(o, self->signature_idx++);
     le32enc(o + 8, weak_hash);
@@ -5,7 +5,7 @@
 from collections import deque
 from contextlib import suppress
 from types import TracebackType
-from typing import TYPE_CHECKING, Any, Callable, ContextManager, Deque, Dict, NamedTuple, Optional, Sequence, Type, Union, cast
+from typing import TYPE_CHECKING, Any, Callable, ContextManager, Deque, Dict, List, NamedTuple, Optional, Sequence, Type, Union, cast
 
 from kitty.fast_data_types import monotonic
 from kitty.types import DecoratedFunc, ParsedShortcut
@@ -24,9 +24,11 @@
     WindowType,
 )
 
-from .operations import MouseTracking, pending_update
+from .operations import Mode, MouseTracking, pending_update, reset_mode, set_mode
 
 if TYPE_CHECKING:
+    from asyncio import Handle
+
     from kitty.file_transmission import FileTransmissionCommand
 
 
@@ -47,11 +49,78 @@ def is_click(a: ButtonEvent, b: ButtonEvent) -> bool:
     return x*x + y*y <= 4
 
 
+class FrameWriter:
+
+    '''
+    Collects all output written during a tick of the event loop into a
+    single frame, that is sent to the terminal in one write, wrapped in a
+    synchronized update so that the terminal renders it all at once. Frames
+    are sent at most max_fps times a second, output written in between is
+    added to the next frame.
+    '''
+
+    begin_sync = set_mode(Mode.PENDING_UPDATE).encode()
+    end_sync = reset_mode(Mode.PENDING_UPDATE).encode()
+
+    def __init__(
+        self, schedule_write: Callable[[bytes], None], asyncio_loop: AbstractEventLoop,
+        max_fps: float = 60, synchronized: bool = True,
+    ):
+        self.schedule_write = schedule_write
+        self.asyncio_loop = asyncio_loop
+        self.min_interval = 1 / max_fps if max_fps > 0 else 0
+        self.synchronized = synchronized
+        self.buf = bytearray()
+        # str output is encoded once per frame rather than once per write
+        self.pending_text: List[str] = []
+        self.last_flush_at = -self.min_interval
+        self.flush_handle: Optional['Handle'] = None
+
+    def write(self, data: Union[bytes, str]) -> None:
+        if isinstance(data, str):
+            self.pending_text.append(data)
+        else:
+            self.encode_pending_text()
+            self.buf += data
+        if self.flush_handle is None:
+            delay = self.last_flush_at + self.min_interval - self.asyncio_loop.time()
+            if delay > 0:
+                self.flush_handle = self.asyncio_loop.call_later(delay, self.flush)
+            else:
+                self.flush_handle = self.asyncio_loop.call_soon(self.flush)
+
+    def encode_pending_text(self) -> None:
+        if self.pending_text:
+            self.buf += ''.join(self.pending_text).encode('utf-8')
+            self.pending_text.clear()
+
+    def flush(self) -> None:
+        ' Send the current frame to the terminal immediately '
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.encode_pending_text()
+        if self.buf:
+            if self.synchronized:
+                self.schedule_write(self.begin_sync + self.buf + self.end_sync)
+            else:
+                self.schedule_write(bytes(self.buf))
+            # Keep the allocated memory for the next frame
+            del self.buf[:]
+            self.last_flush_at = self.asyncio_loop.time()
+
+
 class Handler:
 
     image_manager_class: Optional[Type[ImageManagerType]] = None
     use_alternate_screen = True
     mouse_tracking = MouseTracking.none
+    # The maximum number of frames per second sent to the terminal, 0 for no limit
+    max_fps: float = 60
+    # Whether to wrap every frame in a synchronized update
+    synchronized_output = True
+    # Deliver only the last of a run of mouse motion events that arrive together
+    coalesce_mouse_motion = True
     terminal_io_ended = False
     overlay_ready_report_needed = False
 
@@ -69,6 +138,7 @@ def _initialize(
         self._term_manager = term_manager
         self._tui_loop = tui_loop
         self._schedule_write = schedule_write
+        self._frame_writer = FrameWriter(schedule_write, tui_loop.asyncio_loop, self.max_fps, self.synchronized_output)
         self.debug = debug
         self.cmd = commander(self)
         self._image_manager = image_manager
@@ -107,6 +177,7 @@ def __exit__(self, etype: type, value: Exception, tb: TracebackType) -> None:
         del self.debug.fobj
         with suppress(Exception):
             self.finalize()
+            self._frame_writer.flush()
             if self._image_manager is not None:
                 self._image_manager.__exit__(etype, value, tb)
 
@@ -197,18 +268,17 @@ def on_capability_response(self, name: str, val: str) -> None:
         pass
 
     def write(self, data: Union[bytes, str]) -> None:
-        if isinstance(data, str):
-            data = data.encode('utf-8')
-        self._schedule_write(data)
+        self._frame_writer.write(data)
 
     def flush(self) -> None:
-        pass
+        self._frame_writer.flush()
 
     def print(self, *args: object, sep: str = ' ', end: str = '\r\n') -> None:
         data = sep.join(map(str, args)) + end
         self.write(data)
 
     def suspend(self) -> ContextManager[TermManagerType]:
+        self.flush()
         return self._term_manager.suspend()
 
     @classmethod
@@ -217,6 +287,10 @@ def atomic_update(cls, func: DecoratedFunc) -> DecoratedFunc:
 
         @wraps(func)
         def f(*a: Any, **kw: Any) -> Any:
+            if a[0]._frame_writer.synchronized:
+                # The frame writer already wraps every frame in a pending
+                # update, and they do not nest
+                return func(*a, **kw)
             with pending_update(a[0].write):
                 return func(*a, **kw)
         return cast(DecoratedFunc, f)
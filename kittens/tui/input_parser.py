@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# License: GPL v3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+import os
+import re
+from typing import Callable, Iterable, Iterator, Union
+
+BytesLike = Union[bytes, bytearray, memoryview]
+TextCallback = Callable[[str], None]
+PayloadCallback = Callable[[memoryview], None]
+
+PASTE_START_CSI, PASTE_END_CSI = '200~', '201~'
+PASTE_END = b'\x1b[' + PASTE_END_CSI.encode()
+ST = b'\x1b\\'
+# The bytes that terminate a CSI escape code
+csi_end_pat = re.compile(rb'[\x40-\x5a\x60-\x7e]')
+
+
+def complete_utf8_end(buf: bytearray, start: int, end: int) -> int:
+    ' Return the end of the last complete UTF-8 sequence in buf[start:end] '
+    for i in range(end - 1, max(start, end - 4) - 1, -1):
+        b = buf[i]
+        if b < 0x80:
+            return end
+        if b >= 0xc0:
+            needed = 2 if b < 0xe0 else (3 if b < 0xf0 else 4)
+            return end if end - i >= needed else i
+    return end
+
+
+class InputParser:
+
+    '''
+    An incremental tokenizer for the input a terminal sends to a program
+    running in it. Input is read directly into a buffer that is re-used for
+    the lifetime of the parser, and tokenized in place. Runs of plain text,
+    including everything between the start and end of a bracketed paste, are
+    delivered in a single call to on_text. The payloads of DCS, OSC, PM and APC
+    escape codes are delivered as memoryviews into the buffer, which are only
+    valid for the duration of the callback. Incomplete escape codes and UTF-8
+    sequences at the end of the input are kept until more input arrives.
+    '''
+
+    def __init__(
+        self, on_text: TextCallback, on_dcs: PayloadCallback, on_csi: TextCallback,
+        on_osc: PayloadCallback, on_pm: PayloadCallback, on_apc: PayloadCallback,
+        read_size: int = 64 * 1024, max_read_size: int = 1024 * 1024,
+    ):
+        self.on_text, self.on_dcs, self.on_csi = on_text, on_dcs, on_csi
+        self.st_callbacks = {ord('P'): on_dcs, ord(']'): on_osc, ord('^'): on_pm, ord('_'): on_apc}
+        self.read_size = read_size
+        self.max_read_size = max_read_size
+        self.buf = bytearray(read_size)
+        self.used = 0
+        # Where to resume looking for the end of an incomplete escape code
+        self.scan_from = 0
+        self.in_bracketed_paste = False
+
+    def clear(self) -> None:
+        self.used = self.scan_from = 0
+        self.in_bracketed_paste = False
+
+    def ensure_space(self, amt: int) -> None:
+        if len(self.buf) - self.used < amt:
+            sz = max(2 * len(self.buf), self.used + amt)
+            try:
+                self.buf.extend(bytes(sz - len(self.buf)))
+            except BufferError:
+                # Some callback kept a reference to the buffer
+                nbuf = bytearray(sz)
+                nbuf[:self.used] = self.buf[:self.used]
+                self.buf = nbuf
+
+    def read_from(self, fd: int) -> int:
+        '''
+        Read all currently available data from the non-blocking file
+        descriptor fd into the buffer, up to max_read_size bytes. Returns the
+        number of bytes read, zero means end of file. Raises BlockingIOError if
+        no data is available.
+        '''
+        total = 0
+        while total < self.max_read_size:
+            self.ensure_space(self.read_size)
+            try:
+                with memoryview(self.buf) as mv:
+                    n = os.readv(fd, (mv[self.used:],))
+            except BlockingIOError:
+                if total:
+                    break
+                raise
+            if not n:
+                break
+            self.used += n
+            total += n
+        return total
+
+    def feed(self, data: BytesLike) -> None:
+        ' Add data to the buffer and parse it '
+        self.ensure_space(len(data))
+        self.buf[self.used:self.used + len(data)] = data
+        self.used += len(data)
+        self.parse()
+
+    def parse(self) -> None:
+        consumed = 0
+        try:
+            with memoryview(self.buf) as mv:
+                consumed = self.tokenize(mv)
+        finally:
+            # Move the unconsumed data to the start of the buffer, this does
+            # not change the size of the buffer, so works even if some
+            # callback kept a reference to it
+            remaining = self.used - consumed
+            if remaining and consumed:
+                self.buf[:remaining] = self.buf[consumed:self.used]
+            self.scan_from = max(0, self.scan_from - consumed)
+            self.used = remaining
+
+    def tokenize(self, mv: memoryview) -> int:
+        buf, end, pos = self.buf, self.used, 0
+        # Byte ranges of text not yet delivered, text is delivered only when
+        # some escape code is encountered or the input is exhausted
+        text: list[tuple[int, int]] = []
+
+        def add_text(start: int, stop: int) -> None:
+            if stop > start:
+                if text and text[-1][1] == start:
+                    text[-1] = text[-1][0], stop
+                else:
+                    text.append((start, stop))
+
+        def flush_text() -> None:
+            if text:
+                t = ''.join(str(mv[start:stop], 'utf-8', 'ignore') for start, stop in text)
+                text.clear()
+                if t:
+                    self.on_text(t)
+
+        while pos < end:
+            if self.in_bracketed_paste:
+                idx = buf.find(PASTE_END, pos, end)
+                if idx < 0:
+                    # Keep any trailing partial end of paste marker
+                    stop = end
+                    for k in range(min(len(PASTE_END) - 1, end - pos), 0, -1):
+                        if buf.endswith(PASTE_END[:k], pos, end):
+                            stop = end - k
+                            break
+                    stop = complete_utf8_end(buf, pos, stop)
+                    add_text(pos, stop)
+                    pos = stop
+                    break
+                add_text(pos, idx)
+                flush_text()
+                pos = idx + len(PASTE_END)
+                self.in_bracketed_paste = False
+                self.on_csi(PASTE_END_CSI)
+                continue
+            idx = buf.find(b'\x1b', pos, end)
+            if idx < 0:
+                stop = complete_utf8_end(buf, pos, end)
+                add_text(pos, stop)
+                pos = stop
+                break
+            add_text(pos, idx)
+            if idx + 1 >= end:
+                pos = idx
+                break
+            q = buf[idx + 1]
+            if q == 0x5b:  # [
+                m = csi_end_pat.search(buf, max(idx + 2, self.scan_from), end)
+                if m is None:
+                    self.scan_from = end
+                    pos = idx
+                    break
+                flush_text()
+                pos, self.scan_from = m.end(), 0
+                csi = str(mv[idx + 2:pos], 'utf-8', 'replace')
+                if csi == PASTE_START_CSI:
+                    self.in_bracketed_paste = True
+                self.on_csi(csi)
+                continue
+            callback = self.st_callbacks.get(q)
+            if callback is None:
+                # An unknown escape code, ignore the ESC and treat the rest as text
+                pos = idx + 1
+                continue
+            st = buf.find(ST, max(idx + 2, self.scan_from), end)
+            if st < 0:
+                # the ST may be split, so look at the last byte again
+                self.scan_from = end - 1
+                pos = idx
+                break
+            flush_text()
+            pos, self.scan_from = st + len(ST), 0
+            with mv[idx + 2:st] as payload:
+                callback(payload)
+        flush_text()
+        return pos
+
+
+def parse_stream(data: Iterable[BytesLike], chunk_size: int = 4096) -> Iterator[tuple[str, Union[str, bytes]]]:
+    ' Tokenize a recorded input stream, yielding (kind, payload) pairs, useful for testing '
+    events: list[tuple[str, Union[str, bytes]]] = []
+
+    def payload(kind: str) -> PayloadCallback:
+        return lambda mv: events.append((kind, bytes(mv)))
+
+    p = InputParser(
+        lambda x: events.append(('text', x)), payload('dcs'), lambda x: events.append(('csi', x)),
+        payload('osc'), payload('pm'), payload('apc'))
+    for d in data:
+        for i in range(0, len(d), chunk_size):
+            p.feed(d[i:i + chunk_size])
+            yield from events
+            events.clear()
+
+
+def recorded_streams() -> dict[str, bytes]:
+    import random
+    r = random.Random(1)
+    words = ('the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'λ', '→', '日本語', '🎉')
+    typing = b''.join(
+        (r.choice(words) + ' ').encode() if r.random() < 0.9 else f'\x1b[{r.randint(65, 68)}u'.encode() for _ in range(50000))
+    paste_text = '\r'.join(' '.join(r.choice(words) for _ in range(12)) for _ in range(40000))
+    paste = b'\x1b[200~' + paste_text.encode() + b'\x1b[201~'
+    mouse = b''.join(f'\x1b[<35;{r.randint(0, 2000)};{r.randint(0, 1000)}M'.encode() for _ in range(100000))
+    mixed = b''.join((
+        b'\x1bP@kitty-cmd{"ok": true, "data": "' + b'x' * 200 + b'"}\x1b\\',
+        b'\x1bP1+r636f6c6f7273=323536;546e=787465726d2d6b69747479\x1b\\',
+        b'\x1b]52;c;' + b'YWJjZGVm' * 500 + b'\x1b\\',
+        b'\x1b_Gi=1;OK\x1b\\',
+    ) * 2000)
+    return {'typing': typing, 'bracketed paste': paste, 'mouse motion': mouse, 'responses': mixed}
+
+
+def benchmark(*paths: str, chunk_size: int = 4096, repeat: int = 3) -> None:
+    '''
+    Replay recorded input streams through the parser, printing the time
+    taken. Run as::
+
+        kitty +runpy "from kittens.tui.input_parser import benchmark; benchmark()"
+
+    Pass the paths to files containing raw terminal input, for example,
+    recorded with ``cat > input.bin``, to replay them instead of the builtin
+    synthetic streams.
+    '''
+    from time import perf_counter
+    if paths:
+        streams = {}
+        for path in paths:
+            with open(path, 'rb') as f:
+                streams[os.path.basename(path)] = f.read()
+    else:
+        streams = recorded_streams()
+
+    def noop(x: object) -> None:
+        pass
+
+    for name, data in streams.items():
+        best = float('inf')
+        for _ in range(repeat):
+            p = InputParser(noop, noop, noop, noop, noop, noop)
+            start = perf_counter()
+            for i in range(0, len(data), chunk_size):
+                p.feed(data[i:i + chunk_size])
+            best = min(best, perf_counter() - start)
+        print(f'{name:>16}: {len(data) / 1024 / 1024:6.2f} MB in {best * 1000:8.2f} ms ({len(data) / best / 1024 / 1024:7.1f} MB/s)')
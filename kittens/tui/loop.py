@@ -2,7 +2,6 @@
 # License: GPL v3 Copyright: 2018, Kovid Goyal <kovid at kovidgoyal.net>
 
 import asyncio
-import codecs
 import io
 import os
 import re
@@ -12,16 +11,16 @@
 import termios
 from contextlib import contextmanager, suppress
 from enum import Enum, IntFlag, auto
-from functools import partial
 from typing import Any, Callable, Dict, Generator, List, NamedTuple, Optional
 
 from kitty.constants import is_macos
-from kitty.fast_data_types import FILE_TRANSFER_CODE, close_tty, normal_tty, open_tty, parse_input_from_terminal, raw_tty
+from kitty.fast_data_types import FILE_TRANSFER_CODE, close_tty, normal_tty, open_tty, raw_tty
 from kitty.key_encoding import ALT, CTRL, SHIFT, backspace_key, decode_key_event, enter_key
 from kitty.typing import ImageManagerType, KeyEventType, Protocol
 from kitty.utils import ScreenSize, ScreenSizeGetter, screen_size_function, write_all
 
 from .handler import Handler
+from .input_parser import InputParser
 from .operations import MouseTracking, init_state, reset_state
 
 
@@ -58,7 +57,7 @@ def __call__(self, *a: Any, **kw: Any) -> None:
 
 
 debug = Debug()
-ftc_code = str(FILE_TRANSFER_CODE)
+ftc_code = str(FILE_TRANSFER_CODE).encode()
 
 
 class TermManager:
@@ -230,13 +229,12 @@ def __init__(
         self.return_code = 0
         self.overlay_ready_reported = False
         self.optional_actions = optional_actions
-        self.read_buf = ''
-        self.decoder = codecs.getincrementaldecoder('utf-8')('ignore')
+        self.input_parser = InputParser(self._on_text, self._on_dcs, self._on_csi, self._on_osc, self._on_pm, self._on_apc)
+        self.pending_mouse_motion: Optional[MouseEvent] = None
         try:
             self.iov_limit = max(os.sysconf('SC_IOV_MAX') - 1, 255)
         except Exception:
             self.iov_limit = 255
-        self.parse_input_from_terminal = partial(parse_input_from_terminal, self._on_text, self._on_dcs, self._on_csi, self._on_osc, self._on_pm, self._on_apc)
         self.ebs_pat = re.compile('([\177\r\x03\x04])')
         self.in_bracketed_paste = False
         self.sanitize_bracketed_paste = bool(sanitize_bracketed_paste)
@@ -245,28 +243,34 @@ def __init__(
 
     def _read_ready(self, handler: Handler, fd: int) -> None:
         try:
-            bdata = os.read(fd, io.DEFAULT_BUFFER_SIZE)
+            num_read = self.input_parser.read_from(fd)
         except BlockingIOError:
             return
-        if not bdata:
+        if not num_read:
             handler.terminal_io_ended = True
             self.quit(1)
             return
-        data = self.decoder.decode(bdata)
-        if self.read_buf:
-            data = self.read_buf + data
-        self.read_buf = data
         self.handler = handler
         try:
-            self.read_buf = self.parse_input_from_terminal(self.read_buf, self.in_bracketed_paste)
+            self.input_parser.parse()
+            self._dispatch_pending_mouse_motion()
         except Exception:
-            self.read_buf = ''
+            self.input_parser.clear()
+            self.pending_mouse_motion = None
             raise
         finally:
             del self.handler
 
+    def _dispatch_pending_mouse_motion(self) -> None:
+        # Consecutive mouse motion events are coalesced, only the last is
+        # dispatched, when some other input arrives or the input is exhausted
+        if self.pending_mouse_motion is not None:
+            ev, self.pending_mouse_motion = self.pending_mouse_motion, None
+            self.handler.on_mouse_event(ev)
+
     # terminal input callbacks {{{
     def _on_text(self, text: str) -> None:
+        self._dispatch_pending_mouse_motion()
         if self.in_bracketed_paste and self.sanitize_bracketed_paste:
             text = self.sanitize_ibp_pat.sub('', text)
 
@@ -285,33 +289,37 @@ def _on_text(self, text: str) -> None:
             elif chunk:
                 self.handler.on_text(chunk, self.in_bracketed_paste)
 
-    def _on_dcs(self, dcs: str) -> None:
-        if dcs.startswith('@kitty-cmd'):
+    def _on_dcs(self, dcs: memoryview) -> None:
+        self._dispatch_pending_mouse_motion()
+        if bytes(dcs[:10]) == b'@kitty-cmd':
             import json
-            self.handler.on_kitty_cmd_response(json.loads(dcs[len('@kitty-cmd'):]))
-        elif dcs.startswith('1+r'):
+            self.handler.on_kitty_cmd_response(json.loads(dcs[10:].tobytes()))
+        elif bytes(dcs[:3]) == b'1+r':
             from binascii import unhexlify
-            vals = dcs[3:].split(';')
-            for q in vals:
-                parts = q.split('=', 1)
+            for q in dcs[3:].tobytes().split(b';'):
+                parts = q.split(b'=', 1)
                 try:
-                    name, val = parts[0], unhexlify(parts[1]).decode('utf-8', 'replace')
+                    name, val = parts[0].decode('utf-8'), unhexlify(parts[1]).decode('utf-8', 'replace')
                 except Exception:
                     continue
                 self.handler.on_capability_response(name, val)
 
     def _on_csi(self, csi: str) -> None:
         q = csi[-1]
-        if q in 'mM':
-            if csi.startswith('<'):
-                # SGR mouse event
-                try:
-                    ev = decode_sgr_mouse(csi[1:], self.handler.screen_size)
-                except Exception:
-                    pass
-                else:
-                    self.handler.on_mouse_event(ev)
-        elif q in 'u~ABCDEHFPQRS':
+        if q in 'mM' and csi.startswith('<'):
+            # SGR mouse event
+            try:
+                ev = decode_sgr_mouse(csi[1:], self.handler.screen_size)
+            except Exception:
+                return
+            if ev.type is EventType.MOVE and self.handler.coalesce_mouse_motion:
+                self.pending_mouse_motion = ev
+                return
+            self._dispatch_pending_mouse_motion()
+            self.handler.on_mouse_event(ev)
+            return
+        self._dispatch_pending_mouse_motion()
+        if q in 'u~ABCDEHFPQRS':
             if csi == '200~':
                 self.in_bracketed_paste = True
                 return
@@ -326,34 +334,36 @@ def _on_csi(self, csi: str) -> None:
                 if not self.handler.perform_default_key_action(k):
                     self.handler.on_key_event(k)
 
-    def _on_pm(self, pm: str) -> None:
-        pass
+    def _on_pm(self, pm: memoryview) -> None:
+        self._dispatch_pending_mouse_motion()
 
-    def _on_osc(self, osc: str) -> None:
-        idx = osc.find(';')
+    def _on_osc(self, osc: memoryview) -> None:
+        self._dispatch_pending_mouse_motion()
+        # Only look at the start of the payload to avoid copying large payloads
+        idx = osc[:16].tobytes().find(b';')
         if idx <= 0:
             return
-        q = osc[:idx]
-        if q == '52':
-            widx = osc.find(';', idx + 1)
-            if widx < idx:
-                from_primary = osc.find('p', idx + 1) > -1
+        q = osc[:idx].tobytes()
+        if q == b'52':
+            head = osc[idx + 1:idx + 64].tobytes()
+            widx = head.find(b';')
+            if widx < 0:
+                from_primary = b'p' in osc[idx + 1:].tobytes()
                 payload = ''
             else:
                 from base64 import standard_b64decode
-                from_primary = osc.find('p', idx+1, widx) > -1
-                data = memoryview(osc.encode('ascii'))
-                payload = standard_b64decode(data[widx+1:]).decode('utf-8')
+                from_primary = b'p' in head[:widx]
+                payload = standard_b64decode(osc[idx + 1 + widx + 1:]).decode('utf-8')
             self.handler.on_clipboard_response(payload, from_primary)
         elif q == ftc_code:
             from kitty.file_transmission import FileTransmissionCommand
-            data = memoryview(osc.encode('ascii'))
-            self.handler.on_file_transfer_response(FileTransmissionCommand.deserialize(data[idx+1:]))
+            self.handler.on_file_transfer_response(FileTransmissionCommand.deserialize(osc[idx+1:]))
 
-    def _on_apc(self, apc: str) -> None:
-        if apc.startswith('G'):
+    def _on_apc(self, apc: memoryview) -> None:
+        self._dispatch_pending_mouse_motion()
+        if bytes(apc[:1]) == b'G':
             if self.handler.image_manager is not None:
-                self.handler.image_manager.handle_response(apc)
+                self.handler.image_manager.handle_response(str(apc, 'utf-8', 'replace'))
     # }}}
 
     @property
@@ -24,7 +24,7 @@
 )
 from weakref import WeakValueDictionary
 
-from .child import cached_process_data, default_env, set_default_env
+from .child import ChildStdin, cached_process_data, default_env, set_default_env
 from .cli import create_opts, green, parse_args
 from .cli_stub import CLIOptions
 from .clipboard import (
@@ -70,6 +70,7 @@
     add_timer,
     apply_options_update,
     background_opacity_of,
+    cell_size_for_window,
     change_background_opacity,
     cocoa_hide_app,
     cocoa_hide_other_apps,
@@ -78,6 +79,7 @@
     create_os_window,
     current_application_quit_request,
     current_focused_os_window_id,
+    current_fonts,
     current_os_window,
     destroy_global_data,
     focus_os_window,
@@ -113,6 +115,7 @@
 from .key_encoding import get_name_to_functional_number_map
 from .keys import Mappings
 from .layout.base import set_layout_options
+from .match_index import WindowMatchIndex
 from .notifications import NotificationManager
 from .options.types import Options, nullable_colors
 from .options.utils import MINIMUM_FONT_SIZE, KeyboardMode, KeyDefinition
@@ -166,6 +169,31 @@ class OSWindowDict(TypedDict):
     background_opacity: float
 
 
+window_match_locations = ('id', 'title', 'pid', 'cwd', 'cmdline', 'num', 'env', 'var', 'recent', 'state', 'neighbor')
+
+
+def shell_quoted_drop_paths(paths: Sequence[str]) -> Iterator[str]:
+    # Dropped directories get a trailing slash, as shells add when completing
+    # them. The MIME types of all dropped files are looked up together.
+    import shlex
+
+    from .guess_mime_type import guess_types
+    types = guess_types((p for p in paths if os.path.isabs(p)), allow_filesystem_access=True)
+    for p in paths:
+        if types.get(p) == 'inode/directory' and not p.endswith('/'):
+            p += '/'
+        yield shlex.quote(p)
+
+
+def add_request_id(response: RCResponse, pcmd: dict[str, Any]) -> RCResponse:
+    # Clients that send multiple commands over a single connection use the
+    # request id to match responses to commands
+    request_id = pcmd.get('request_id')
+    if request_id and isinstance(response, dict):
+        response['request_id'] = request_id
+    return response
+
+
 def listen_on(spec: str) -> tuple[int, str]:
     import socket
     family, address, socket_path = parse_address_spec(spec)
@@ -327,6 +355,8 @@ def __init__(
         self.window_for_dispatch: Optional[Window] = None
         self.primary_selection = Clipboard(ClipboardType.primary_selection)
         self.update_check_started = False
+        self.box_drawing_prefetch_scheduled = False
+        self.first_frame_callbacks: list[Callable[[], None]] = []
         self.peer_data_map: dict[int, Optional[dict[str, Sequence[str]]]] = {}
         self.background_process_death_notify_map: dict[int, Callable[[int, Optional[Exception]], None]] = {}
         self.encryption_key = EllipticCurveKey()
@@ -334,6 +364,7 @@ def __init__(
         self.clipboard_buffers: dict[str, str] = {}
         self.update_check_process: Optional['PopenType[bytes]'] = None
         self.window_id_map: WeakValueDictionary[int, Window] = WeakValueDictionary()
+        self.window_match_index = WindowMatchIndex()
         self.color_settings_at_startup: dict[str, Optional[Color]] = {
                 k: opts[k] for k in opts if isinstance(opts[k], Color) or k in nullable_colors}
         self.current_visual_select: Optional[VisualSelect] = None
@@ -417,17 +448,19 @@ def add_os_window(
             wclass = self.args.cls or appname
         tm = TabManager(os_window_id, self.args, wclass, wname, startup_session)
         self.os_window_map[os_window_id] = tm
+        self.prefetch_box_drawing_glyphs()
         return os_window_id
 
     def list_os_windows(
         self, self_window: Optional[Window] = None,
         tab_filter: Optional[Callable[[Tab], bool]] = None,
-        window_filter: Optional[Callable[[Window], bool]] = None
+        window_filter: Optional[Callable[[Window], bool]] = None,
+        window_fields: Optional[Container[str]] = None,
     ) -> Iterator[OSWindowDict]:
         with cached_process_data():
             active_tab_manager = self.active_tab_manager
             for os_window_id, tm in self.os_window_map.items():
-                tabs = list(tm.list_tabs(self_window, tab_filter, window_filter))
+                tabs = list(tm.list_tabs(self_window, tab_filter, window_filter, window_fields))
                 if tabs:
                     bo = background_opacity_of(os_window_id)
                     if bo is None:
@@ -458,17 +491,12 @@ def all_windows(self) -> Iterator[Window]:
         for tab in self.all_tabs:
             yield from tab
 
-    def match_windows(self, match: str, self_window: Optional['Window'] = None) -> Iterator[Window]:
-        if match == 'all':
-            yield from self.all_windows
-            return
-        from .search_query_parser import search
+    def window_match_getter(self, self_window: Optional['Window'] = None) -> Callable[[str, str, set[int]], set[int]]:
         tab = self.active_tab
         if current_focused_os_window_id() <= 0:
             tm = self.os_window_map.get(last_focused_os_window_id())
             if tm is not None:
                 tab = tm.active_tab
-        window_id_limit = max(self.window_id_map, default=-1) + 1
 
         def get_matches(location: str, query: str, candidates: set[int]) -> set[int]:
             if location == 'id' and query.startswith('-'):
@@ -477,14 +505,38 @@ def get_matches(location: str, query: str, candidates: set[int]) -> set[int]:
                 except Exception:
                     return set()
                 if q < 0:
-                    query = str(window_id_limit + q)
+                    query = str(max(self.window_id_map, default=-1) + 1 + q)
+            # Checking a single window directly is cheaper than the index
+            if len(candidates) > 1 and location in ('id', 'pid', 'title', 'var'):
+                indexed = self.window_match_index.matches(location, query)
+                if indexed is not None:
+                    return indexed & candidates
             return {wid for wid in candidates if self.window_id_map[wid].matches_query(location, query, tab, self_window)}
+        return get_matches
 
-        for wid in search(match, (
-            'id', 'title', 'pid', 'cwd', 'cmdline', 'num', 'env', 'var', 'recent', 'state', 'neighbor',
-        ), set(self.window_id_map), get_matches):
+    def match_windows(self, match: str, self_window: Optional['Window'] = None) -> Iterator[Window]:
+        if match == 'all':
+            yield from self.all_windows
+            return
+        from .search_query_parser import search
+        for wid in search(match, window_match_locations, set(self.window_id_map), self.window_match_getter(self_window)):
             yield self.window_id_map[wid]
 
+    def window_matcher(self, match: str) -> Callable[[Window], bool]:
+        '''
+        Return a predicate that checks if a window matches the specified match
+        expression, testing only that window rather than matching all windows.
+        The expression is parsed once, raising an exception if it is invalid.
+        '''
+        if match == 'all':
+            return lambda w: True
+        from .search_query_parser import build_tree
+        tree = build_tree(match, window_match_locations)
+
+        def predicate(w: Window) -> bool:
+            return w.id in self.window_id_map and bool(tree.search({w.id}, self.window_match_getter()))
+        return predicate
+
     def tab_for_window(self, window: Window) -> Optional[Tab]:
         for tab in self.all_tabs:
             for w in tab:
@@ -513,6 +565,10 @@ def get_matches(location: str, query: str, candidates: set[int]) -> set[int]:
                 if q < 0:
                     limit = tab_id_limit if location == 'id' else window_id_limit
                     query = str(limit + q)
+            if location in ('window_id', 'window_title'):
+                indexed = self.window_match_index.matches(location.partition('_')[-1], query)
+                if indexed is not None:
+                    return {w.tab_id for w in map(self.window_id_map.get, indexed) if w is not None} & candidates
             return {wid for wid in candidates if tim[wid].matches_query(location, query, tm)}
 
         found = False
@@ -578,9 +634,10 @@ def add_child(self, window: Window) -> None:
         assert window.child.pid is not None and window.child.child_fd is not None
         self.child_monitor.add_child(window.id, window.child.pid, window.child.child_fd, window.screen)
         self.window_id_map[window.id] = window
+        self.window_match_index.add_window(window.id, window.title, window.child.pid, window.user_vars)
 
     def _handle_remote_command(self, cmd: memoryview, window: Optional[Window] = None, peer_id: int = 0) -> RCResponse:
-        from .remote_control import is_cmd_allowed, parse_cmd, remote_control_allowed
+        from .remote_control import parse_cmd
         response = None
         window = window or None
         from_socket = peer_id > 0
@@ -609,7 +666,31 @@ def _handle_remote_command(self, cmd: memoryview, window: Optional[Window] = Non
             else:
                 if swid > 0:
                     self_window = self.window_id_map.get(swid)
+        if pcmd.get('cmd') == 'batch':
+            response = self._handle_remote_command_batch(pcmd, window, peer_id, self_window)
+        else:
+            response = self._authorize_and_execute_remote_command(pcmd, window, peer_id, self_window)
+        return add_request_id(response, pcmd)
+
+    def _handle_remote_command_batch(
+        self, pcmd: dict[str, Any], window: Optional[Window] = None, peer_id: int = 0, self_window: Optional[Window] = None
+    ) -> RCResponse:
+        from .rc.batch import batch
+        # Every command in the batch is authorized individually, without
+        # prompting the user, as a prompt cannot be answered within the single
+        # loop tick the batch runs in.
+        ans = batch.run(pcmd, lambda sub: self._authorize_and_execute_remote_command(sub, window, peer_id, self_window, interactive=False))
+        if pcmd.get('no_response'):
+            return None
+        return {'ok': True, 'data': ans}
 
+    def _authorize_and_execute_remote_command(
+        self, pcmd: dict[str, Any], window: Optional[Window] = None, peer_id: int = 0, self_window: Optional[Window] = None,
+        interactive: bool = True,
+    ) -> RCResponse:
+        from .remote_control import is_cmd_allowed, remote_control_allowed
+        from_socket = peer_id > 0
+        is_fd_peer = from_socket and peer_id in self.peer_data_map
         extra_data: dict[str, Any] = {}
         try:
             allowed_unconditionally = (
@@ -626,6 +707,8 @@ def _handle_remote_command(self, cmd: memoryview, window: Optional[Window] = Non
         if q is True:
             return self._execute_remote_command(pcmd, window, peer_id, self_window)
         if q is None:
+            if not interactive:
+                return {'ok': False, 'error': 'This command requires the user to allow it, which is not possible in a batch'}
             if self.ask_if_remote_cmd_is_allowed(pcmd, window, peer_id, self_window):
                 return AsyncResponse()
         response = {'ok': False, 'error': 'Remote control is disabled. Add allow_remote_control to your kitty.conf'}
@@ -680,7 +763,7 @@ def remote_cmd_permission_received(self, pcmd: dict[str, Any], window_id: int, p
         elif choice in ('a', 'p'):
             if choice == 'p':
                 set_user_password_allowed(pcmd['password'], True)
-            response = self._execute_remote_command(pcmd, window, peer_id, self_window)
+            response = add_request_id(self._execute_remote_command(pcmd, window, peer_id, self_window), pcmd)
         if window is not None and response is not None and not isinstance(response, AsyncResponse):
             window.send_cmd_response(response)
         if peer_id > 0:
@@ -873,6 +956,7 @@ def suppress_focus_change_events(self) -> Generator[None, None, None]:
     def on_child_death(self, window_id: int) -> None:
         prev_active_window = self.active_window
         window = self.window_id_map.pop(window_id, None)
+        self.window_match_index.remove_window(window_id)
         if window is None:
             return
         with self.suppress_focus_change_events():
@@ -883,6 +967,7 @@ def on_child_death(self, window_id: int) -> None:
                     import traceback
                     traceback.print_exc()
             os_window_id = window.os_window_id
+            window.child.mark_dead()
             window.destroy()
             tm = self.os_window_map.get(os_window_id)
             tab = None
@@ -1311,6 +1396,7 @@ def _change_font_size(self, sz_map: dict[int, float]) -> None:
             if tm is not None:
                 os_window_font_size(os_window_id, sz)
                 tm.resize()
+        self.prefetch_box_drawing_glyphs()
 
     def on_dpi_change(self, os_window_id: int) -> None:
         tm = self.os_window_map.get(os_window_id)
@@ -1322,6 +1408,48 @@ def on_dpi_change(self, os_window_id: int) -> None:
                     for window in tab:
                         window.on_dpi_change(sz)
                 tm.resize()
+                self.prefetch_box_drawing_glyphs()
+
+    def prefetch_box_drawing_glyphs(self) -> None:
+        # Render the box drawing glyphs for the cell sizes of all OS windows in
+        # the background, so that they are ready when first displayed after a
+        # change in font size, with the glyphs that are on screen done first
+        from .fonts.box_drawing import box_chars
+        from .fonts.box_drawing_cache import Geometry, box_drawing_prefetcher
+        geometries: dict[Geometry, set[int]] = {}
+        for os_window_id, tm in self.os_window_map.items():
+            cf = current_fonts(os_window_id)
+            cell_width, cell_height = cell_size_for_window(os_window_id)
+            on_screen = geometries.setdefault((cell_width, cell_height, (cf['logical_dpi_x'] + cf['logical_dpi_y']) / 2), set())
+            tab = tm.active_tab
+            if tab is not None:
+                chars: set[str] = set()
+                for window in tab:
+                    if window.is_visible_in_layout:
+                        screen = window.screen
+                        for y in range(screen.lines):
+                            chars.update(str(screen.visual_line(y)))
+                on_screen.update(ord(ch) for ch in chars if ch in box_chars)
+        box_drawing_prefetcher.prefetch(geometries)
+        if not self.box_drawing_prefetch_scheduled:
+            self.box_drawing_prefetch_scheduled = True
+            add_timer(self.render_prefetched_box_drawing_glyphs, 0, False)
+
+    def render_prefetched_box_drawing_glyphs(self, timer_id: Optional[int] = None) -> None:
+        from .fonts.box_drawing_cache import box_drawing_prefetcher
+        self.box_drawing_prefetch_scheduled = False
+        if self.shutting_down:
+            return
+        try:
+            has_more = box_drawing_prefetcher.render_some()
+        except Exception:
+            box_drawing_prefetcher.clear()
+            import traceback
+            traceback.print_exc()
+            return
+        if has_more:
+            self.box_drawing_prefetch_scheduled = True
+            add_timer(self.render_prefetched_box_drawing_glyphs, 0, False)
 
     def _set_os_window_background_opacity(self, os_window_id: int, opacity: float) -> None:
         change_background_opacity(os_window_id, max(0.0, min(opacity, 1.0)))
@@ -1668,10 +1796,9 @@ def on_drop(self, os_window_id: int, mime: str, data: bytes) -> None:
             if w is not None:
                 text = data.decode('utf-8', 'replace')
                 if mime == 'text/uri-list':
-                    urls = parse_uri_list(text)
+                    urls = list(parse_uri_list(text))
                     if w.at_prompt:
-                        import shlex
-                        text = ' '.join(map(shlex.quote, urls))
+                        text = ' '.join(shell_quoted_drop_paths(urls))
                     else:
                         text = '\n'.join(urls)
                 w.paste_text(text)
@@ -1764,6 +1891,11 @@ def handle_close_os_window_confirmation(self, confirmed: bool, os_window_id: int
         else:
             self.mark_os_window_for_close(os_window_id, NO_CLOSE_REQUESTED)
 
+    def on_first_frame_rendered(self, os_window_id: int) -> None:
+        callbacks, self.first_frame_callbacks = self.first_frame_callbacks, []
+        for callback in callbacks:
+            callback()
+
     def on_os_window_closed(self, os_window_id: int, viewport_width: int, viewport_height: int) -> None:
         self.cached_values['window-size'] = viewport_width, viewport_height
         tm = self.os_window_map.pop(os_window_id, None)
@@ -1771,6 +1903,7 @@ def on_os_window_closed(self, os_window_id: int, viewport_width: int, viewport_h
             tm.destroy()
         for window_id in tuple(w.id for w in self.window_id_map.values() if getattr(w, 'os_window_id', None) == os_window_id):
             self.window_id_map.pop(window_id, None)
+            self.window_match_index.remove_window(window_id)
         if not self.os_window_map and is_macos:
             cocoa_set_menubar_title('')
         action = self.os_window_death_actions.pop(os_window_id, None)
@@ -1837,7 +1970,9 @@ def notify_on_os_window_death(self, address: str) -> None:
                 s.shutdown(socket.SHUT_RDWR)
             s.close()
 
-    def display_scrollback(self, window: Window, data: Union[bytes, str], input_line_number: int = 0, title: str = '', report_cursor: bool = True) -> None:
+    def display_scrollback(
+        self, window: Window, data: Union[ChildStdin, str], input_line_number: int = 0, title: str = '', report_cursor: bool = True
+    ) -> None:
 
         def prepare_arg(x: str) -> str:
             x = x.replace('INPUT_LINE_NUMBER', str(input_line_number))
@@ -1865,6 +2000,10 @@ def prepare_arg(x: str) -> str:
                     if less_version(cmd[0]) >= 581:
                         open(sentinel, 'w').close()
                     else:
+                        if not isinstance(bdata, bytes):
+                            with bdata:
+                                bdata.seek(0)
+                                bdata = bdata.read()
                         bdata = re.sub(br'\x1b\].*?\x1b\\', b'', bdata)
 
             tab.new_special_window(
@@ -2653,6 +2792,7 @@ def apply_new_options(self, opts: Options) -> None:
             if tm is not None:
                 os_window_font_size(os_window_id, opts.font_size, True)
                 tm.resize()
+        self.prefetch_box_drawing_glyphs()
         # Update key bindings
         if is_macos:
             from .fast_data_types import cocoa_clear_global_shortcuts
@@ -808,6 +808,11 @@ render_prepared_os_window(OSWindow *os_window, unsigned int active_window_id, co
     }
     if (os_window->live_resize.in_progress) draw_resizing_text(os_window);
     swap_window_buffers(os_window);
+    static bool first_frame_rendered = false;
+    if (!first_frame_rendered) {
+        first_frame_rendered = true;
+        call_boss(on_first_frame_rendered, "K", os_window->id);
+    }
     os_window->last_active_tab = os_window->active_tab; os_window->last_num_tabs = os_window->num_tabs; os_window->last_active_window_id = active_window_id;
     os_window->focused_at_last_render = os_window->is_focused;
     if (os_window->redraw_count) os_window->redraw_count--;
@@ -7,7 +7,7 @@
 from collections.abc import Generator, Sequence
 from contextlib import contextmanager, suppress
 from itertools import count
-from typing import TYPE_CHECKING, DefaultDict, Optional
+from typing import IO, TYPE_CHECKING, ContextManager, DefaultDict, Optional, Union
 
 import kitty.fast_data_types as fast_data_types
 
@@ -22,6 +22,10 @@
 if TYPE_CHECKING:
     from .window import CwdRequest
 
+# Data to send to the STDIN of a child, either bytes or a seekable file whose
+# contents are used as STDIN directly
+ChildStdin = Union[bytes, IO[bytes]]
+
 
 if is_macos:
     from kitty.fast_data_types import cmdline_of_process as cmdline_
@@ -41,6 +45,8 @@ def process_group_map() -> DefaultDict[int, list[int]]:
     def cmdline_of_pid(pid: int) -> list[str]:
         return cmdline_(pid)
 else:
+    # The location of the proc filesystem used to find the processes in sessions
+    proc_dir = '/proc'
 
     def cmdline_of_pid(pid: int) -> list[str]:
         with open(f'/proc/{pid}/cmdline', 'rb') as f:
@@ -65,13 +71,13 @@ def _environ_of_process(pid: int) -> str:
 
     def process_group_map() -> DefaultDict[int, list[int]]:
         ans: DefaultDict[int, list[int]] = defaultdict(list)
-        for x in os.listdir('/proc'):
+        for x in os.listdir(proc_dir):
             try:
                 pid = int(x)
             except Exception:
                 continue
             try:
-                with open(f'/proc/{x}/stat', 'rb') as f:
+                with open(f'{proc_dir}/{x}/stat', 'rb') as f:
                     raw = f.read().decode('utf-8')
             except OSError:
                 continue
@@ -82,33 +88,130 @@ def process_group_map() -> DefaultDict[int, list[int]]:
             ans[q].append(pid)
         return ans
 
+    def group_and_session_of_pid(pid: int) -> tuple[int, int]:
+        with open(f'{proc_dir}/{pid}/stat', 'rb') as f:
+            raw = f.read()
+        # the process name can contain spaces and parentheses, so skip past
+        # the last closing parenthesis before splitting
+        fields = raw[raw.rindex(b')') + 2:].split(b' ', 4)
+        return int(fields[2]), int(fields[3])
+
+    def children_of_pid(pid: int) -> list[int]:
+        ans: list[int] = []
+        for tid in os.listdir(f'{proc_dir}/{pid}/task'):
+            with suppress(OSError), open(f'{proc_dir}/{pid}/task/{tid}/children', 'rb') as f:
+                ans.extend(map(int, f.read().split()))
+        return ans
+
+    @run_once
+    def can_walk_session_tree() -> bool:
+        pid = os.getpid()
+        return os.access(f'/proc/{pid}/task/{pid}/children', os.R_OK)
+
+    def session_group_map(session_id: int) -> DefaultDict[int, list[int]]:
+        # Walk the process tree rooted at the session leader, this is
+        # proportional to the size of the session rather than the number of
+        # processes on the system. Processes that have been re-parented away
+        # from the session leader are not found, which is acceptable as they
+        # are no longer part of the foreground job.
+        ans: DefaultDict[int, list[int]] = defaultdict(list)
+        stack, seen = [session_id], set()
+        while stack:
+            pid = stack.pop()
+            if pid in seen:
+                continue
+            seen.add(pid)
+            try:
+                pgrp, sid = group_and_session_of_pid(pid)
+            except Exception:
+                continue
+            if sid != session_id:
+                continue
+            ans[pgrp].append(pid)
+            with suppress(OSError):
+                stack.extend(children_of_pid(pid))
+        for pids in ans.values():
+            pids.sort()
+        return ans
+
 
 @run_once
 def checked_terminfo_dir() -> Optional[str]:
     return terminfo_dir if os.path.isdir(terminfo_dir) else None
 
 
-def processes_in_group(grp: int) -> list[int]:
-    gmap: Optional[DefaultDict[int, list[int]]] = getattr(process_group_map, 'cached_map', None)
-    if gmap is None:
+class ProcessGroupIndex:
+
+    '''
+    Maps process group ids to the processes in them, restricted to the
+    sessions led by children kitty has spawned. Within a
+    :func:`cached_process_data` block the map for each session is built at
+    most once and only when first queried, so callers that never look at
+    process data pay nothing. Sessions are forgotten when their child dies.
+    '''
+
+    def __init__(self) -> None:
+        self.sessions: set[int] = set()
+        self.session_maps: dict[int, DefaultDict[int, list[int]]] = {}
+        self.full_map: Optional[DefaultDict[int, list[int]]] = None
+        self.caching = 0
+
+    def add_session(self, session_id: int) -> None:
+        self.sessions.add(session_id)
+
+    def remove_session(self, session_id: int) -> None:
+        self.sessions.discard(session_id)
+        self.session_maps.pop(session_id, None)
+
+    def get_full_map(self) -> DefaultDict[int, list[int]]:
+        ans = self.full_map
+        if ans is None:
+            try:
+                ans = process_group_map()
+            except Exception:
+                ans = defaultdict(list)
+            if self.caching:
+                self.full_map = ans
+        return ans
+
+    def get_session_map(self, session_id: int) -> DefaultDict[int, list[int]]:
+        if is_macos or session_id not in self.sessions or not can_walk_session_tree():
+            return self.get_full_map()
+        ans = self.session_maps.get(session_id)
+        if ans is None:
+            try:
+                ans = session_group_map(session_id)
+            except Exception:
+                ans = defaultdict(list)
+            if self.caching:
+                self.session_maps[session_id] = ans
+        return ans
+
+    def processes_in_group(self, grp: int, session_id: Optional[int] = None) -> list[int]:
+        gmap = self.get_full_map() if session_id is None else self.get_session_map(session_id)
+        return gmap.get(grp, [])
+
+    @contextmanager
+    def cached(self) -> Generator[None, None, None]:
+        self.caching += 1
         try:
-            gmap = process_group_map()
-        except Exception:
-            gmap = defaultdict(list)
-    return gmap.get(grp, [])
+            yield
+        finally:
+            self.caching -= 1
+            if not self.caching:
+                self.full_map = None
+                self.session_maps.clear()
+
 
+process_group_index = ProcessGroupIndex()
 
-@contextmanager
-def cached_process_data() -> Generator[None, None, None]:
-    try:
-        cm = process_group_map()
-    except Exception:
-        cm = defaultdict(list)
-    setattr(process_group_map, 'cached_map', cm)
-    try:
-        yield
-    finally:
-        delattr(process_group_map, 'cached_map')
+
+def processes_in_group(grp: int, session_id: Optional[int] = None) -> list[int]:
+    return process_group_index.processes_in_group(grp, session_id)
+
+
+def cached_process_data() -> 'ContextManager[None]':
+    return process_group_index.cached()
 
 
 def parse_environ_block(data: str) -> dict[str, str]:
@@ -205,7 +308,7 @@ def __init__(
         self,
         argv: Sequence[str],
         cwd: str,
-        stdin: Optional[bytes] = None,
+        stdin: Optional[ChildStdin] = None,
         env: Optional[dict[str, str]] = None,
         cwd_from: Optional['CwdRequest'] = None,
         is_clone_launch: str = '',
@@ -284,10 +387,14 @@ def fork(self) -> Optional[int]:
         ready_read_fd, ready_write_fd = os.pipe()
         os.set_inheritable(ready_write_fd, False)
         os.set_inheritable(ready_read_fd, True)
-        if stdin is not None:
+        if isinstance(stdin, bytes):
             stdin_read_fd, stdin_write_fd = os.pipe()
             os.set_inheritable(stdin_write_fd, False)
             os.set_inheritable(stdin_read_fd, True)
+        elif stdin is not None:
+            stdin.seek(0)
+            stdin_read_fd, stdin_write_fd = stdin.fileno(), -1
+            os.set_inheritable(stdin_read_fd, True)
         else:
             stdin_read_fd = stdin_write_fd = -1
         self.final_env = self.get_final_env()
@@ -337,9 +444,12 @@ def fork(self) -> Optional[int]:
         os.close(slave)
         self.pid = pid
         self.child_fd = master
-        if stdin is not None:
+        process_group_index.add_session(pid)
+        if isinstance(stdin, bytes):
             os.close(stdin_read_fd)
             fast_data_types.thread_write(stdin_write_fd, stdin)
+        elif stdin is not None:
+            stdin.close()
         os.close(ready_read_fd)
         self.terminal_ready_fd = ready_write_fd
         if self.child_fd is not None:
@@ -360,6 +470,10 @@ def __del__(self) -> None:
             os.close(fd)
         self.terminal_ready_fd = -1
 
+    def mark_dead(self) -> None:
+        if self.pid is not None:
+            process_group_index.remove_session(self.pid)
+
     def mark_terminal_ready(self) -> None:
         os.close(self.terminal_ready_fd)
         self.terminal_ready_fd = -1
@@ -379,7 +493,7 @@ def foreground_processes(self) -> list[ProcessDesc]:
             return []
         try:
             pgrp = os.tcgetpgrp(self.child_fd)
-            foreground_processes = processes_in_group(pgrp) if pgrp >= 0 else []
+            foreground_processes = processes_in_group(pgrp, self.pid) if pgrp >= 0 else []
 
             def process_desc(pid: int) -> ProcessDesc:
                 ans: ProcessDesc = {'pid': pid, 'cmdline': None, 'cwd': None}
@@ -428,7 +542,7 @@ def get_pid_for_cwd(self, oldest: bool = False) -> Optional[int]:
         with suppress(Exception):
             assert self.child_fd is not None
             pgrp = os.tcgetpgrp(self.child_fd)
-            foreground_processes = processes_in_group(pgrp) if pgrp >= 0 else []
+            foreground_processes = processes_in_group(pgrp, self.pid) if pgrp >= 0 else []
             if foreground_processes:
                 # there is no easy way that I know of to know which process is the
                 # foreground process in this group from the users perspective,
@@ -443,6 +557,13 @@ def get_pid_for_cwd(self, oldest: bool = False) -> Optional[int]:
                 return min(foreground_processes) if oldest else max(foreground_processes)
         return self.pid
 
+    @property
+    def foreground_process_group(self) -> int:
+        with suppress(Exception):
+            assert self.child_fd is not None
+            return os.tcgetpgrp(self.child_fd)
+        return -1
+
     @property
     def pid_for_cwd(self) -> Optional[int]:
         return self.get_pid_for_cwd()
@@ -1007,6 +1007,13 @@ def options_spec() -> str:
 present in the main font.
 
 
+--debug-startup
+type=bool-set
+Print out the time taken to render the first frame, broken down into the time
+spent importing code, parsing the config, setting up fonts, compiling shaders
+and spawning the child processes.
+
+
 --watcher
 completion=type:file ext:py relative:conf group:"Watcher files"
 This option is deprecated in favor of the :opt:`watcher` option in
@@ -1,13 +1,12 @@
 #!/usr/bin/env python
 # License: GPLv3 Copyright: 2022, Kovid Goyal <kovid at kovidgoyal.net>
 
-import io
-import os
+import mmap
 from collections.abc import Mapping
 from enum import Enum, IntEnum
 from gettext import gettext as _
 from tempfile import TemporaryFile
-from typing import IO, Callable, NamedTuple, Optional, Union
+from typing import IO, TYPE_CHECKING, Callable, NamedTuple, Optional, Union
 
 from .conf.utils import uniq
 from .constants import supports_primary_selection
@@ -16,6 +15,7 @@
     GLFW_CLIPBOARD,
     GLFW_PRIMARY_SELECTION,
     StreamingBase64Decoder,
+    StreamingBase64Encoder,
     find_in_memoryview,
     get_boss,
     get_clipboard_mime,
@@ -24,32 +24,68 @@
 )
 from .utils import log_error
 
+if TYPE_CHECKING:
+    from _typeshed import ReadableBuffer
+
+# The size of the chunks in which clipboard data is decoded, encoded and sent
+CHUNK_SIZE = 64 * 1024
+
 
 class Tempfile:
 
+    '''
+    Storage for clipboard data. Data is kept in memory until its size exceeds
+    max_size, after which it is moved to an anonymous temporary file and all
+    further writes go straight to the file. Reads are served as memoryview
+    slices of either the in memory buffer or a memory map of the file, so
+    reading does not copy the data.
+    '''
+
     def __init__(self, max_size: int) -> None:
-        self.file: Union[io.BytesIO, IO[bytes]] = io.BytesIO()
+        self.buf = bytearray()
+        self.file: Optional[IO[bytes]] = None
+        self.mmap: Optional[mmap.mmap] = None
+        self.size = 0
         self.max_size = max_size
 
     def rollover_if_needed(self, sz: int) -> None:
-        if isinstance(self.file, io.BytesIO) and self.file.tell() + sz > self.max_size:
-            before = self.file.getvalue()
+        if self.file is None and self.size + sz > self.max_size:
             self.file = TemporaryFile()
-            self.file.write(before)
+            self.file.write(self.buf)
+            self.buf = bytearray()
 
-    def write(self, data: bytes) -> None:
-        self.rollover_if_needed(len(data))
-        self.file.write(data)
+    def write(self, data: 'ReadableBuffer') -> None:
+        with memoryview(data) as mv:
+            self.rollover_if_needed(mv.nbytes)
+            if self.file is None:
+                try:
+                    self.buf += mv
+                except BufferError:
+                    # a reader still holds a view of the buffer, leave it to them
+                    self.buf = self.buf + mv
+            else:
+                self.file.write(mv)
+            self.size += mv.nbytes
 
     def tell(self) -> int:
-        return self.file.tell()
-
-    def seek(self, pos: int) -> None:
-        self.file.seek(pos, os.SEEK_SET)
+        return self.size
+
+    def view(self, offset: int, size: int = -1) -> memoryview:
+        end = self.size if size < 0 else min(self.size, offset + size)
+        if end <= offset:
+            return memoryview(b'')
+        if self.file is None:
+            return memoryview(self.buf)[offset:end]
+        if self.mmap is None or len(self.mmap) < end:
+            # The file has grown since it was mapped, existing views keep the
+            # old map alive for as long as they need it
+            self.file.flush()
+            self.mmap = mmap.mmap(self.file.fileno(), self.size, access=mmap.ACCESS_READ)
+        return memoryview(self.mmap)[offset:end]
 
     def read(self, offset: int, size: int) -> bytes:
-        self.file.seek(offset)
-        return self.file.read(size)
+        with self.view(offset, size) as mv:
+            return bytes(mv)
 
     def create_chunker(self, offset: int, size: int) -> Callable[[], Callable[[], bytes]]:
         def chunk_creator() -> Callable[[], bytes]:
@@ -57,11 +93,11 @@ def chunk_creator() -> Callable[[], bytes]:
             limit = offset + size
 
             def chunker() -> bytes:
-                nonlocal pos, limit
+                nonlocal pos
                 if pos >= limit:
                     return b''
-                ans = self.read(pos, min(io.DEFAULT_BUFFER_SIZE, limit - pos))
-                pos = self.file.tell()
+                ans = self.read(pos, min(CHUNK_SIZE, limit - pos))
+                pos += len(ans)
                 return ans
             return chunker
         return chunk_creator
@@ -221,12 +257,6 @@ def encode_response(self, status: str = 'DATA', mime: str = '', payload: bytes =
         return a
 
 
-def encode_osc52(loc: str, response: str) -> str:
-    from base64 import standard_b64encode
-    return '52;{};{}'.format(
-        loc, standard_b64encode(response.encode('utf-8')).decode('ascii'))
-
-
 class MimePos(NamedTuple):
     start: int
     size: int
@@ -239,6 +269,7 @@ def __init__(
         rollover_size: int = 16 * 1024 * 1024, max_size: int = -1,
     ) -> None:
         self.decoder = StreamingBase64Decoder()
+        self.decode_buf = bytearray(CHUNK_SIZE // 4 * 3 + 2)
         self.id = id
         self.is_primary_selection = is_primary_selection
         self.protocol_type = protocol_type
@@ -287,20 +318,25 @@ def flush_base64_data(self) -> None:
             self.mime_map[self.currently_writing_mime] = MimePos(start, self.tempfile.tell() - start)
             self.currently_writing_mime = ''
 
-    def write_base64_data(self, b: bytes) -> None:
-        if not self.max_size_exceeded:
-            decoded = self.decoder.decode(b)
-            if decoded:
-                self.tempfile.write(decoded)
-                if self.max_size > 0 and self.tempfile.tell() > (self.max_size * 1024 * 1024):
-                    log_error(f'Clipboard write request has more data than allowed by clipboard_max_size ({self.max_size}), truncating')
-                    self.max_size_exceeded = True
-
-    def data_for(self, mime: str = 'text/plain', offset: int = 0, size: int = -1) -> bytes:
+    def write_base64_data(self, b: 'ReadableBuffer') -> None:
+        # Decode in fixed size chunks into a re-used buffer so that the
+        # decoded data is never held in memory in addition to the tempfile
+        with memoryview(b) as src, memoryview(self.decode_buf) as dest:
+            for i in range(0, len(src), CHUNK_SIZE):
+                if self.max_size_exceeded:
+                    break
+                n = self.decoder.decode_into(dest, src[i:i+CHUNK_SIZE])
+                if n:
+                    self.tempfile.write(dest[:n])
+                    if self.max_size > 0 and self.tempfile.tell() > (self.max_size * 1024 * 1024):
+                        log_error(f'Clipboard write request has more data than allowed by clipboard_max_size ({self.max_size}), truncating')
+                        self.max_size_exceeded = True
+
+    def data_for(self, mime: str = 'text/plain', offset: int = 0, size: int = -1) -> memoryview:
         start, full_size = self.mime_map[mime]
         if size == -1:
             size = full_size
-        return self.tempfile.read(start+offset, size)
+        return self.tempfile.view(start+offset, size)
 
 
 class ClipboardRequestManager:
@@ -483,11 +519,20 @@ def fulfill_legacy_read_request(self, rr: ReadRequest, allowed: bool = True) ->
         cp = get_boss().primary_selection if rr.is_primary_selection else get_boss().clipboard
         w = get_boss().window_id_map.get(self.window_id)
         if w is not None:
-            text = ''
-            if cp.enabled and allowed:
-                text = cp.get_text()
             loc = 'p' if rr.is_primary_selection else 'c'
-            w.screen.send_escape_code_to_child(ESC_OSC, encode_osc52(loc, text))
+            parts = [f'52;{loc};'.encode('ascii')]
+            if cp.enabled and allowed:
+                # Encode the data as it arrives rather than accumulating it
+                # and encoding it all at once
+                encoder = StreamingBase64Encoder()
+
+                def write_chunk(data: bytes) -> None:
+                    if data:
+                        parts.append(encoder.encode(data))
+
+                cp.get_mime('text/plain', write_chunk)
+                parts.append(encoder.reset())
+            w.screen.send_escape_code_to_child(ESC_OSC, tuple(parts))
 
     def ask_to_read_clipboard(self, rr: ReadRequest) -> None:
         if rr.mime_types == (TARGETS_MIME,):
@@ -4,6 +4,7 @@
 import os
 import re
 import sys
+import time
 from contextlib import contextmanager
 from typing import (
     Any,
@@ -18,6 +19,7 @@
     Optional,
     Sequence,
     Set,
+    TextIO,
     Tuple,
     TypeVar,
     Union,
@@ -198,6 +200,127 @@ def __iter__(self) -> Iterator[str]:
         return self.lines
 
 
+class FileState(NamedTuple):
+    mtime_ns: int
+    size: int
+    digest: str
+
+
+def text_digest(text: str) -> str:
+    from hashlib import sha256
+    return sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+
+def glob_include(base_path_for_includes: str, pattern: str) -> Tuple[str, ...]:
+    from pathlib import Path
+    return tuple(map(lambda x: str(os.fspath(x)), sorted(Path(base_path_for_includes).glob(pattern))))
+
+
+def env_include(pattern: str) -> Tuple[Tuple[str, str], ...]:
+    from fnmatch import fnmatchcase
+    return tuple((x, os.environ[x]) for x in os.environ if fnmatchcase(x, pattern))
+
+
+class ConfigDependencies:
+
+    '''
+    Everything the result of parsing config files depends on, recorded while
+    parsing: the files that were read or were not found, the results of glob
+    and env includes, the environment variables referenced and the errors that
+    were logged. Used to check that a stored result of parsing is still
+    current, see :meth:`is_current`.
+    '''
+
+    racy_interval_ns = 2 * 10**9
+    env_var_pat = re.compile(r'\$(?:(\w+)|\{([^}]+)\})')
+
+    def __init__(self) -> None:
+        self.files: Dict[str, Optional[FileState]] = {}
+        self.globs: Dict[Tuple[str, str], Tuple[str, ...]] = {}
+        self.env_includes: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        self.env_vars: Dict[str, Optional[str]] = {'HOME': os.environ.get('HOME')}
+        self.errors: List[str] = []
+        self.is_cacheable = True
+        self.recorded_at = time.time_ns()
+
+    def read(self, f: TextIO) -> NamedLineIterator:
+        # Read the whole file so that the digest is of exactly the text that was parsed
+        st = os.fstat(f.fileno())
+        text = f.read()
+        self.files[f.name] = FileState(st.st_mtime_ns, st.st_size, text_digest(text))
+        self.add_text(text)
+        return NamedLineIterator(f.name, iter(text.splitlines(keepends=True)))
+
+    def add_text(self, text: str) -> None:
+        if '$' in text:
+            for m in self.env_var_pat.finditer(text):
+                key = m.group(1) or m.group(2)
+                self.env_vars[key] = os.environ.get(key)
+
+    def file_is_current(self, path: str, state: Optional[FileState]) -> bool:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return state is None
+        if state is None or st.st_size != state.size:
+            return False
+        # A file modified within the resolution of filesystem timestamps of
+        # when it was recorded could have changed without changing its mtime
+        if st.st_mtime_ns == state.mtime_ns and self.recorded_at - st.st_mtime_ns > self.racy_interval_ns:
+            return True
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                return text_digest(f.read()) == state.digest
+        except OSError:
+            return False
+
+    def is_current(self) -> bool:
+        if not self.is_cacheable:
+            return False
+        for key, val in self.env_vars.items():
+            if os.environ.get(key) != val:
+                return False
+        for pattern, matches in self.env_includes.items():
+            if env_include(pattern) != matches:
+                return False
+        for (base, pattern), paths in self.globs.items():
+            if glob_include(base, pattern) != paths:
+                return False
+        for path, state in self.files.items():
+            if not self.file_is_current(path, state):
+                return False
+        return True
+
+
+config_dependencies: Optional[ConfigDependencies] = None
+
+
+@contextmanager
+def recording_dependencies() -> Iterator[ConfigDependencies]:
+    global config_dependencies
+    orig = config_dependencies
+    config_dependencies = ans = ConfigDependencies()
+    before = getattr(log_error, 'redirect', None)
+
+    def record_error(msg: str) -> None:
+        ans.errors.append(msg)
+        if before is None:
+            from ..fast_data_types import log_error_string
+            log_error_string(msg)
+        else:
+            before(msg)
+
+    setattr(log_error, 'redirect', record_error)
+    try:
+        yield ans
+    finally:
+        config_dependencies = orig
+        if before is None:
+            delattr(log_error, 'redirect')
+        else:
+            setattr(log_error, 'redirect', before)
+
+
 def parse_line(
     line: str,
     parse_conf_item: ItemParser,
@@ -216,19 +339,23 @@ def parse_line(
     if key in ('include', 'globinclude', 'envinclude'):
         val = expandvars(os.path.expanduser(val.strip()), {'KITTY_OS': os_name()})
         if key == 'globinclude':
-            from pathlib import Path
-            vals = tuple(map(lambda x: str(os.fspath(x)), sorted(Path(base_path_for_includes).glob(val))))
+            vals = glob_include(base_path_for_includes, val)
+            if config_dependencies is not None:
+                config_dependencies.globs[(base_path_for_includes, val)] = vals
         elif key == 'envinclude':
-            from fnmatch import fnmatchcase
-            for x in os.environ:
-                if fnmatchcase(x, val):
-                    with currently_parsing.set_file(f'<env var: {x}>'):
-                        _parse(
-                            NamedLineIterator(os.path.join(base_path_for_includes, ''), iter(os.environ[x].splitlines())),
-                            parse_conf_item,
-                            ans,
-                            accumulate_bad_lines
-                        )
+            env_vals = env_include(val)
+            if config_dependencies is not None:
+                config_dependencies.env_includes[val] = env_vals
+            for x, text in env_vals:
+                if config_dependencies is not None:
+                    config_dependencies.add_text(text)
+                with currently_parsing.set_file(f'<env var: {x}>'):
+                    _parse(
+                        NamedLineIterator(os.path.join(base_path_for_includes, ''), iter(text.splitlines())),
+                        parse_conf_item,
+                        ans,
+                        accumulate_bad_lines
+                    )
             return
         else:
             if not os.path.isabs(val):
@@ -238,13 +365,17 @@ def parse_line(
             try:
                 with open(val, encoding='utf-8', errors='replace') as include:
                     with currently_parsing.set_file(val):
-                        _parse(include, parse_conf_item, ans, accumulate_bad_lines)
+                        _parse(include if config_dependencies is None else config_dependencies.read(include), parse_conf_item, ans, accumulate_bad_lines)
             except FileNotFoundError:
+                if config_dependencies is not None:
+                    config_dependencies.files[val] = None
                 log_error(
                     'Could not find included config file: {}, ignoring'.
                     format(val)
                 )
             except OSError:
+                if config_dependencies is not None:
+                    config_dependencies.is_cacheable = False
                 log_error(
                     'Could not read from included config file: {}, ignoring'.
                     format(val)
@@ -348,18 +479,26 @@ def load_config(
             continue
         if path == '-':
             path = '/dev/stdin'
+            if config_dependencies is not None:
+                config_dependencies.is_cacheable = False
             with currently_parsing.set_file(path):
                 vals = parse_config(sys.stdin)
         else:
             try:
                 with open(path, encoding='utf-8', errors='replace') as f:
                     with currently_parsing.set_file(path):
-                        vals = parse_config(f)
+                        vals = parse_config(f if config_dependencies is None else config_dependencies.read(f))
             except (FileNotFoundError, PermissionError):
+                if config_dependencies is not None:
+                    config_dependencies.files[path] = None
                 continue
         found_paths.append(path)
         ans = merge_configs(ans, vals)
     if overrides is not None:
+        if config_dependencies is not None:
+            overrides = tuple(overrides)
+            for x in overrides:
+                config_dependencies.add_text(x)
         with currently_parsing.set_file('<override>'):
             vals = parse_config(overrides)
         ans = merge_configs(ans, vals)
@@ -8,11 +8,13 @@
 from functools import partial
 from typing import Any, Optional
 
-from .conf.utils import BadLine, parse_config_base
+from .conf.utils import BadLine, ConfigDependencies, parse_config_base, recording_dependencies
 from .conf.utils import load_config as _load_config
-from .constants import cache_dir, defconf
+from .constants import cache_dir, config_dir, defconf, str_version
+from .fast_data_types import GLFW_MOD_KITTY, Color, SingleKey
 from .options.types import Options, defaults, option_names
 from .options.utils import KeyboardMode, KeyboardModeMap, KeyDefinition, MouseMap, MouseMapping, build_action_aliases
+from .types import run_once
 from .typing import TypedDict
 from .utils import log_error
 
@@ -152,10 +154,11 @@ def parse_config(lines: Iterable[str], accumulate_bad_lines: Optional[list[BadLi
     return ans
 
 
-def load_config(*paths: str, overrides: Optional[Iterable[str]] = None, accumulate_bad_lines: Optional[list[BadLine]] = None) -> Options:
+def parse_and_finalize_config(
+    paths: tuple[str, ...], overrides: tuple[str, ...], accumulate_bad_lines: Optional[list[BadLine]] = None
+) -> Options:
     from .options.parse import merge_result_dicts
 
-    overrides = tuple(overrides) if overrides is not None else ()
     opts_dict, found_paths = _load_config(
         defaults, partial(parse_config, accumulate_bad_lines=accumulate_bad_lines), merge_result_dicts, *paths, overrides=overrides)
     opts = Options(opts_dict)
@@ -178,6 +181,146 @@ def load_config(*paths: str, overrides: Optional[Iterable[str]] = None, accumula
     return opts
 
 
+def single_key_from_snapshot(mods: int, is_native: bool, key: int, defined_with_kitty_mod: bool) -> SingleKey:
+    if defined_with_kitty_mod:
+        return SingleKey(mods=GLFW_MOD_KITTY, is_native=is_native, key=key).resolve_kitty_mod(mods)
+    return SingleKey(mods=mods, is_native=is_native, key=key)
+
+
+def reduce_single_key(k: SingleKey) -> tuple[Any, ...]:
+    return single_key_from_snapshot, (k.mods, k.is_native, k.key, k.defined_with_kitty_mod)
+
+
+def reduce_color(c: Color) -> tuple[Any, ...]:
+    return Color, (c.red, c.green, c.blue, c.alpha)
+
+
+# The modules that parse and finalize options or define the classes that are
+# pickled in a snapshot
+snapshot_modules = (
+    'kitty.options.types', 'kitty.options.parse', 'kitty.options.utils', 'kitty.config', 'kitty.conf.utils', 'kitty.types')
+
+
+@run_once
+def option_definitions_hash() -> str:
+    # The modules are read without being imported, as importing the parser is
+    # one of the costs loading a snapshot avoids. The version covers the
+    # classes defined in C and modules whose source is unavailable.
+    from hashlib import sha256
+    from importlib.abc import InspectLoader
+    from importlib.util import find_spec
+    h = sha256(str_version.encode('utf-8'))
+    for name in snapshot_modules:
+        src = None
+        spec = find_spec(name)
+        if spec is not None and isinstance(spec.loader, InspectLoader):
+            with suppress(Exception):
+                src = spec.loader.get_source(name)
+        h.update(f'{name}:{len(src) if src else -1}:'.encode('utf-8'))
+        if src:
+            h.update(src.encode('utf-8'))
+    return h.hexdigest()
+
+
+def is_private(st: os.stat_result) -> bool:
+    import stat
+    return st.st_uid == os.geteuid() and not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+class ConfigSnapshots:
+
+    '''
+    Snapshots of finalized options stored on disk, one per set of config
+    files and overrides, so that when none of the files, includes or
+    referenced environment variables have changed, the options are loaded
+    in one shot instead of being parsed again. Snapshots are validated by
+    the mtimes and hashes of every file that was read, see
+    :class:`kitty.conf.utils.ConfigDependencies`. Errors logged while parsing
+    are stored and logged again when a snapshot is loaded. Configs that have
+    bad lines are never stored. Snapshots that are not owned by the current
+    user or are writable by others are ignored, as loading them runs pickle.
+    '''
+
+    format_version = 1
+
+    def __init__(self, cache_path: str = '', max_entries: int = 8):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+
+    def path_for(self, paths: tuple[str, ...], overrides: tuple[str, ...]) -> str:
+        from hashlib import sha256
+        key = json.dumps([self.format_version, option_definitions_hash(), config_dir, [os.path.abspath(p) for p in paths if p], overrides])
+        return os.path.join(self.cache_path or cache_dir(), 'config-snapshots', sha256(key.encode('utf-8')).hexdigest())
+
+    def parse(self, paths: tuple[str, ...], overrides: tuple[str, ...], accumulate_bad_lines: Optional[list[BadLine]] = None) -> Options:
+        return parse_and_finalize_config(paths, overrides, accumulate_bad_lines)
+
+    def load(self, path: str) -> Optional[Options]:
+        import pickle
+        try:
+            with open(path, 'rb') as f:
+                if not is_private(os.fstat(f.fileno())) or not is_private(os.stat(os.path.dirname(path))):
+                    return None
+                deps, data = pickle.load(f)
+            if not isinstance(deps, ConfigDependencies) or not deps.is_current():
+                return None
+            opts = pickle.loads(data)
+        except Exception:
+            return None
+        if not isinstance(opts, Options):
+            return None
+        for msg in deps.errors:
+            log_error(msg)
+        return opts
+
+    def save(self, path: str, opts: Options, deps: ConfigDependencies) -> None:
+        import copyreg
+        import io
+        import pickle
+        buf = io.BytesIO()
+        p = pickle.Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL)
+        p.dispatch_table = copyreg.dispatch_table.copy()
+        p.dispatch_table[Color] = reduce_color
+        p.dispatch_table[SingleKey] = reduce_single_key
+        with suppress(Exception):
+            p.dump(opts)
+            os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+            atomic_save(pickle.dumps((deps, buf.getvalue()), protocol=pickle.HIGHEST_PROTOCOL), path)
+            os.chmod(path, 0o600)  # atomic_save() copies the mode of any existing file
+            self.prune(os.path.dirname(path))
+
+    def prune(self, dirpath: str) -> None:
+        entries = []
+        for x in os.scandir(dirpath):
+            with suppress(OSError):
+                entries.append((x.stat().st_mtime_ns, x.path))
+        entries.sort()
+        for _, path in entries[:-self.max_entries]:
+            with suppress(OSError):
+                os.remove(path)
+
+    def load_config(self, paths: tuple[str, ...], overrides: tuple[str, ...], accumulate_bad_lines: Optional[list[BadLine]] = None) -> Options:
+        if not paths or '-' in paths:
+            return self.parse(paths, overrides, accumulate_bad_lines)
+        path = self.path_for(paths, overrides)
+        opts = self.load(path)
+        if opts is not None:
+            return opts
+        num_of_bad_lines = 0 if accumulate_bad_lines is None else len(accumulate_bad_lines)
+        with recording_dependencies() as deps:
+            opts = self.parse(paths, overrides, accumulate_bad_lines)
+        if deps.is_cacheable and (accumulate_bad_lines is None or len(accumulate_bad_lines) == num_of_bad_lines):
+            self.save(path, opts, deps)
+        return opts
+
+
+config_snapshots = ConfigSnapshots()
+
+
+def load_config(*paths: str, overrides: Optional[Iterable[str]] = None, accumulate_bad_lines: Optional[list[BadLine]] = None) -> Options:
+    return config_snapshots.load_config(paths, tuple(overrides) if overrides is not None else (), accumulate_bad_lines)
+
+
 class KittyCommonOpts(TypedDict):
     select_by_word_characters: str
     open_url_with: list[str]
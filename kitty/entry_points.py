@@ -42,11 +42,19 @@ def complete(args: list[str]) -> None:
     os.execvp(kitten_exe(), args)
 
 
+def run_kitty_main() -> None:
+    from time import monotonic
+
+    # used to report the time taken by imports with --debug-startup
+    setattr(sys, 'kitty_main_import_started_at', monotonic())
+    from kitty.main import main as kitty_main
+    kitty_main()
+
+
 def open_urls(args: list[str]) -> None:
     setattr(sys, 'cmdline_args_for_open', True)
     sys.argv = ['kitty'] + args[1:]
-    from kitty.main import main as kitty_main
-    kitty_main()
+    run_kitty_main()
 
 
 def launch(args: list[str]) -> None:
@@ -190,7 +198,6 @@ def main() -> None:
         if first_arg.startswith('+'):
             namespaced(['+', first_arg[1:]] + sys.argv[2:])
         else:
-            from kitty.main import main as kitty_main
-            kitty_main()
+            run_kitty_main()
     else:
         func(sys.argv[1:])
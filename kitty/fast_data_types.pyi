@@ -1100,6 +1100,9 @@ class Line:
     def sprite_at(self, cell: int) -> Tuple[int, int, int]:
         pass
 
+    def copy_char(self, src: int, to: 'Line', dest: int) -> None:
+        pass
+
 
 def test_shape(line: Line,
                path: Optional[str] = None,
@@ -1155,6 +1158,8 @@ class HistoryBuf:
 
 class LineBuf:
 
+    def __init__(self, ynum: int, xnum: int): ...
+
     def is_continued(self, idx: int) -> bool:
         pass
 
@@ -1721,7 +1726,7 @@ class StreamingBase64Decoder:
 
 
 
-class StreamingBase64Encodeer:
+class StreamingBase64Encoder:
     def __init__(self, add_trailing_bytes: bool = True) -> None: ...
     # encode the specified data
     def encode(self, data: ReadableBuffer) -> bytes: ...
@@ -8,9 +8,11 @@
 import re
 import stat
 import tempfile
+import threading
 from base64 import b85decode
 from collections import defaultdict, deque
-from collections.abc import Iterable, Iterator
+from collections.abc import Hashable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from dataclasses import Field, dataclass, field, fields
 from enum import Enum, auto
@@ -18,7 +20,7 @@
 from gettext import gettext as _
 from itertools import count
 from time import time_ns
-from typing import IO, Any, Callable, DefaultDict, Deque, Optional, Union
+from typing import IO, Any, Callable, DefaultDict, Deque, NamedTuple, Optional, Union
 
 from kittens.transfer.utils import IdentityCompressor, ZlibCompressor, abspath, expand_home, home_path
 from kitty.fast_data_types import ESC_OSC, FILE_TRANSFER_CODE, AES256GCMDecrypt, add_timer, base64_decode, base64_encode, get_boss, get_options, monotonic
@@ -29,6 +31,9 @@
 
 EXPIRE_TIME = 10  # minutes
 MAX_ACTIVE_RECEIVES = MAX_ACTIVE_SENDS = 10
+RECEIVE_WORKERS = 4
+MAX_PREFETCHED_CHUNKS = 8
+MAX_PENDING_RECEIVE_BYTES = 64 * 1024 * 1024
 ftc_prefix = str(FILE_TRANSFER_CODE)
 
 
@@ -376,6 +381,40 @@ def __call__(self, data: bytes, is_last: bool = False) -> bytes:
         return ans
 
 
+class SignatureCache:
+
+    '''
+    A cache of rsync signatures of files keyed by (device, inode, size, mtime)
+    so that signatures of unchanged files are not re-computed. The total
+    size of cached signatures is bounded by max_size.
+    '''
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.entries: dict[tuple[int, int, int, int], bytes] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple[int, int, int, int]) -> Optional[bytes]:
+        with self.lock:
+            ans = self.entries.pop(key, None)
+            if ans is not None:
+                self.entries[key] = ans
+            return ans
+
+    def set(self, key: tuple[int, int, int, int], val: bytes) -> None:
+        if len(val) > self.max_size:
+            return
+        with self.lock:
+            self.size += len(val) - len(self.entries.pop(key, b''))
+            self.entries[key] = val
+            while self.size > self.max_size:
+                self.size -= len(self.entries.pop(next(iter(self.entries))))
+
+
+signature_cache = SignatureCache()
+
+
 class PatchFile:
 
     def __init__(self, path: str, expected_size: int):
@@ -387,6 +426,7 @@ def __init__(self, path: str, expected_size: int):
         self.src_file: Optional[io.BufferedReader] = None
         self._dest_file: Optional[IO[bytes]] = None
         self.closed = False
+        self.signature: Optional[bytes] = None
 
     @property
     def dest_file(self) -> IO[bytes]:
@@ -439,6 +479,27 @@ def next_signature_block(self, buf: memoryview) -> int:
             self.signature_done = True
         return n
 
+    def compute_signature(self) -> None:
+        '''
+        Compute the signature of the whole file at once, which can be done in
+        a worker thread, using the cached signature if the file is unchanged.
+        '''
+        self.src_file = open(self.path, 'rb')
+        st = os.fstat(self.src_file.fileno())
+        key = st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+        sig = signature_cache.get(key)
+        if sig is None:
+            buf = memoryview(bytearray(64))
+            ans = bytearray()
+            ans += buf[:self.patcher.signature_header(buf)]
+            while (n := self.src_file.readinto(self.block_buffer)) > 0:
+                ans += buf[:self.patcher.sign_block(self.block_buffer[:n], buf)]
+            self.src_file.seek(0, os.SEEK_SET)
+            sig = bytes(ans)
+            signature_cache.set(key, sig)
+        self.signature = sig
+        self.signature_done = True
+
 
 class DestFile:
 
@@ -466,7 +527,7 @@ def __init__(self, ftc: FileTransmissionCommand) -> None:
         self.closed = self.ftype is FileType.directory
         self.actual_file: Union[PatchFile, IO[bytes], None] = None
         self.failed = False
-        self.bytes_written = 0
+        self.bytes_written = self.bytes_reported = 0
 
     def signature_iterator(self) -> PatchFile:
         self.actual_file = PatchFile(self.name, self.existing_stat.st_size if self.existing_stat is not None else 0)
@@ -582,6 +643,155 @@ def check_bypass(password: str, request_id: str, bypass_data: str) -> bool:
     return False
 
 
+class WorkerJob(NamedTuple):
+    func: Callable[[], None]
+    size: int
+    on_done: Optional[Callable[[Optional[Exception]], None]]
+
+
+@run_once
+def receive_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=RECEIVE_WORKERS, thread_name_prefix='FileReceive')
+
+
+class ReceiveWorkers:
+
+    '''
+    Runs the decompression, rsync patching and disk writes for received files
+    in a pool of worker threads, so that large transfers do not block the GUI
+    thread. The jobs for a single key (file) are run in order, one at a time,
+    while the jobs for different keys run in parallel. The GUI thread never
+    waits for the workers, data that has not been written yet stays queued and
+    actions that depend on earlier writes are deferred via :meth:`when_done`.
+    Once more than max_pending_bytes are queued the workers are
+    :attr:`backlogged`, and callers should hold off on accepting more data.
+    The on_done callbacks of jobs and the deferred actions are called in the
+    thread that calls :meth:`process_finished`. With num_workers=0 jobs are
+    run immediately in the calling thread.
+    '''
+
+    def __init__(self, num_workers: int = RECEIVE_WORKERS, max_pending_bytes: int = MAX_PENDING_RECEIVE_BYTES):
+        self.num_workers = num_workers
+        self.max_pending_bytes = max_pending_bytes
+        self.lock = threading.Condition()
+        self.queues: dict[Hashable, Deque[WorkerJob]] = {}
+        self.finished: Deque[tuple[Hashable, WorkerJob, Optional[Exception]]] = deque()
+        self.waiters: list[tuple[frozenset[Hashable], Callable[[], None]]] = []
+        self.pending_bytes = 0
+
+    @property
+    def has_work(self) -> bool:
+        with self.lock:
+            return bool(self.queues or self.finished or self.waiters)
+
+    @property
+    def backlogged(self) -> bool:
+        with self.lock:
+            return self.pending_bytes > self.max_pending_bytes
+
+    def submit(self, key: Hashable, func: Callable[[], None], size: int, on_done: Optional[Callable[[Optional[Exception]], None]]) -> None:
+        job = WorkerJob(func, size, on_done)
+        if self.num_workers < 1:
+            err = self.run_job(job)
+            if on_done is not None:
+                on_done(err)
+            return
+        with self.lock:
+            self.pending_bytes += size
+            q = self.queues.get(key)
+            if q is None:
+                self.queues[key] = q = deque()
+                receive_executor().submit(self.run_queue, key, q)
+            q.append(job)
+
+    def run_job(self, job: WorkerJob) -> Optional[Exception]:
+        try:
+            job.func()
+        except Exception as e:
+            return e
+        return None
+
+    def run_queue(self, key: Hashable, q: Deque[WorkerJob]) -> None:
+        while True:
+            with self.lock:
+                if not q:
+                    del self.queues[key]
+                    self.lock.notify_all()
+                    return
+                job = q[0]
+            err = self.run_job(job)
+            with self.lock:
+                job = q.popleft()  # cancel() may have removed its on_done callback
+                self.finished.append((key, job, err))
+                self.pending_bytes -= job.size
+                self.lock.notify_all()
+
+    def process_finished(self) -> None:
+        with self.lock:
+            n = 0
+            while n < len(self.waiters) and self.waiters[n][0].isdisjoint(self.queues):
+                n += 1
+            ready, self.waiters = self.waiters[:n], self.waiters[n:]
+        while True:
+            with self.lock:
+                if not self.finished:
+                    break
+                key, job, err = self.finished.popleft()
+            if job.on_done is not None:
+                job.on_done(err)
+        for keys, callback in ready:
+            callback()
+
+    def when_done(self, keys: Iterable[Hashable], callback: Callable[[], None]) -> None:
+        '''
+        Call callback once all jobs queued so far for the specified keys have
+        finished and their on_done callbacks have been called. Callbacks are
+        called in the order they are added.
+        '''
+        kset = frozenset(keys)
+        with self.lock:
+            defer = bool(self.waiters) or not kset.isdisjoint(self.queues) or any(x[0] in kset for x in self.finished)
+            if defer:
+                self.waiters.append((kset, callback))
+        if not defer:
+            callback()
+
+    def wait(self, keys: Optional[Iterable[Hashable]] = None) -> None:
+        '''
+        Wait for all queued jobs for the specified keys, or all keys, to
+        finish. Must not be used in the GUI thread.
+        '''
+        kset = None if keys is None else set(keys)
+        with self.lock:
+            while any(kset is None or k in kset for k in self.queues):
+                self.lock.wait()
+        self.process_finished()
+
+    def cancel(self, keys: Iterable[Hashable], cleanup: Callable[[Any], None]) -> None:
+        '''
+        Drop queued jobs and deferred actions for the specified keys, without
+        calling their callbacks. cleanup is called with each key once no job
+        is running for it, in the worker thread if a job is still running.
+        '''
+        kset = set(keys)
+        idle = []
+        with self.lock:
+            for k in kset:
+                q = self.queues.get(k)
+                if q:
+                    # the first job may already be running
+                    while len(q) > 1:
+                        self.pending_bytes -= q.pop().size
+                    q[0] = q[0]._replace(on_done=None)
+                    q.append(WorkerJob(partial(cleanup, k), 0, None))
+                else:
+                    idle.append(k)
+            self.finished = deque(x for x in self.finished if x[0] not in kset)
+            self.waiters = [w for w in self.waiters if w[0].isdisjoint(kset)]
+        for k in idle:
+            cleanup(k)
+
+
 class ActiveReceive:
     id: str
     files: dict[str, DestFile]
@@ -609,8 +819,10 @@ def close(self) -> None:
             x.close()
         self.files = {}
 
-    def cancel(self) -> None:
-        self.close()
+    def cancel(self, workers: ReceiveWorkers) -> None:
+        # files being written to by a worker are closed by it, once it is done
+        files, self.files = self.files, {}
+        workers.cancel(files.values(), DestFile.close)
 
     def start_file(self, ftc: FileTransmissionCommand) -> DestFile:
         self.last_activity_at = monotonic()
@@ -622,21 +834,41 @@ def start_file(self, ftc: FileTransmissionCommand) -> DestFile:
         self.files[ftc.file_id] = df = DestFile(ftc)
         return df
 
-    def add_data(self, ftc: FileTransmissionCommand) -> DestFile:
+    def add_data(self, ftc: FileTransmissionCommand, workers: ReceiveWorkers, on_done: Callable[[DestFile, Optional[Exception]], None]) -> None:
         self.last_activity_at = monotonic()
         df = self.files.get(ftc.file_id)
         if df is None:
             raise TransmissionError(file_id=ftc.file_id, msg='Cannot write to a file without first starting it')
         if df.failed:
-            return df
-        try:
-            df.write_data(self.files, ftc.data, ftc.action is Action.end_data)
-        except Exception:
-            df.failed = True
-            with suppress(Exception):
-                df.close()
-            raise
-        return df
+            return
+        data, is_last = ftc.data, ftc.action is Action.end_data
+
+        def write() -> None:
+            if df.failed:
+                return
+            try:
+                df.write_data(self.files, data, is_last)
+            except Exception:
+                df.failed = True
+                with suppress(Exception):
+                    df.close()
+                raise
+
+        def write_now() -> None:
+            try:
+                write()
+            except Exception as err:
+                on_done(df, err)
+            else:
+                on_done(df, None)
+
+        if df.ftype is FileType.regular:
+            workers.submit(df, write, len(data), partial(on_done, df))
+        elif df.ftype is FileType.link and is_last:
+            # the target of the hard link must have been written
+            workers.when_done(self.files.values(), write_now)
+        else:
+            write_now()
 
     def commit(self, send_os_error: Callable[[OSError, str, 'ActiveReceive', str], None]) -> None:
         directories = sorted((df for df in self.files.values() if df.ftype is FileType.directory), key=lambda x: len(x.name), reverse=True)
@@ -670,6 +902,9 @@ def __init__(self, ftc: FileTransmissionCommand):
         self.differ = rsync.Differ() if self.waiting_for_signature else None
         self.buf = bytearray()
         self.write_pos = 0
+        self.prefetched: Optional[Deque[Union[tuple[bytes, int, bool], Exception]]] = None
+        self.prefetch_lock = threading.Lock()
+        self.prefetch_running = self.prefetch_stopped = self.prefetch_done = False
 
     def write(self, b: ReadableBuffer) -> None:
         self.buf[self.write_pos:self.write_pos+len(b)] = b
@@ -679,45 +914,112 @@ def write(self, b: ReadableBuffer) -> None:
     def ready_to_transmit(self) -> bool:
         return not self.transmitted and not self.waiting_for_signature
 
+    @property
+    def waiting_for_prefetch(self) -> bool:
+        return self.prefetched is not None and not self.prefetched
+
     def close(self) -> None:
+        with self.prefetch_lock:
+            self.prefetch_stopped = True
+            if self.prefetch_running:
+                return  # the prefetch job closes the file once it is done
+        self.release()
+
+    def release(self) -> None:
         if self.open_file is not None:
             self.open_file.close()
             self.open_file = None
         self.differ = None
 
-    def next_chunk(self, sz: int = 1024 * 1024) -> tuple[bytes, int]:
+    def start_prefetch(self) -> None:
+        '''
+        Compute the chunks to transmit in the pool of worker threads, so that
+        the deltas of multiple files are computed in parallel with reading
+        from disk and with the GUI thread.
+        '''
+        if self.prefetched is None:
+            self.prefetched = deque()
+            self.schedule_prefetch()
+
+    def schedule_prefetch(self) -> None:
+        with self.prefetch_lock:
+            if self.prefetch_running or self.prefetch_stopped or self.prefetch_done:
+                return
+            self.prefetch_running = True
+        receive_executor().submit(self.prefetch)
+
+    def prefetch(self) -> None:
+        # Stops once MAX_PREFETCHED_CHUNKS are ready, rather than waiting for
+        # them to be consumed, so as not to tie up a worker thread.
+        # next_chunk() schedules it again.
+        assert self.prefetched is not None
+        while True:
+            with self.prefetch_lock:
+                if self.prefetch_stopped or self.prefetch_done or len(self.prefetched) >= MAX_PREFETCHED_CHUNKS:
+                    self.prefetch_running = False
+                    stopped = self.prefetch_stopped
+                    break
+            item: Union[tuple[bytes, int, bool], Exception]
+            try:
+                chunk, sz, done = self.produce_chunk()
+                item = bytes(chunk), sz, done
+            except Exception as err:
+                item, done = err, True
+            self.prefetched.append(item)
+            self.prefetch_done = done
+        if stopped:
+            self.release()
+
+    def produce_chunk(self, sz: int = 1024 * 1024) -> tuple[bytes, int, bool]:
+        done = False
         if self.target:
-            self.transmitted = True
+            done = True
             data = self.target
         else:
             if self.open_file is None:
-                self.transmitted = True
+                done = True
                 data = b''
             else:
                 if self.differ is None:
                     data = self.open_file.read(sz)
                     if not data or self.open_file.tell() >= self.stat.st_size:
-                        self.transmitted = True
+                        done = True
                 else:
                     self.write_pos = 0
                     has_more = self.differ.next_op(self.open_file.readinto, self.write)
                     data = memoryview(self.buf)[:self.write_pos]
                     if not has_more:
-                        self.transmitted = True
+                        done = True
         uncompressed_sz = len(data)
         cchunk = self.compressor.compress(data)
-        if self.transmitted and not isinstance(self.compressor, IdentityCompressor):
+        if done and not isinstance(self.compressor, IdentityCompressor):
             cchunk += self.compressor.flush()
-        if self.transmitted:
+        return cchunk, uncompressed_sz, done
+
+    def next_chunk(self, sz: int = 1024 * 1024) -> tuple[bytes, int]:
+        if self.prefetched is None:
+            cchunk, uncompressed_sz, done = self.produce_chunk(sz)
+        else:
+            try:
+                item = self.prefetched.popleft()
+            except IndexError:
+                return b'', 0
+            self.schedule_prefetch()
+            if isinstance(item, Exception):
+                raise item
+            cchunk, uncompressed_sz, done = item
+        if done:
+            self.transmitted = True
             self.close()
         return cchunk, uncompressed_sz
 
 
 class ActiveSend:
 
-    def __init__(self, request_id: str, quiet: int, bypass: str, num_of_args: int) -> None:
+    def __init__(self, request_id: str, quiet: int, bypass: str, num_of_args: int, num_workers: int = 0) -> None:
         self.id = request_id
         self.expected_num_of_args = num_of_args
+        self.num_workers = num_workers
         self.bypass_ok: Optional[bool] = None
         if bypass:
             byp = get_options().file_transfer_confirmation_bypass
@@ -761,6 +1063,8 @@ def add_signature_data(self, cmd: FileTransmissionCommand) -> None:
         if cmd.action is Action.end_data:
             sl.finish_signature_data()
             af.waiting_for_signature = False
+            if self.num_workers > 0 and sum(1 for f in self.queued_files_map.values() if f.prefetched is not None) < self.num_workers:
+                af.start_prefetch()
 
     @property
     def is_expired(self) -> bool:
@@ -770,6 +1074,13 @@ def close(self) -> None:
         if self.active_file is not None:
             self.active_file.close()
             self.active_file = None
+        for f in self.queued_files_map.values():
+            if f.prefetched is not None:
+                f.close()
+
+    @property
+    def waiting_for_prefetch(self) -> bool:
+        return not self.pending_chunks and self.active_file is not None and self.active_file.waiting_for_prefetch
 
     def next_chunk(self) -> Optional[FileTransmissionCommand]:
         self.last_activity_at = monotonic()
@@ -784,7 +1095,11 @@ def next_chunk(self) -> Optional[FileTransmissionCommand]:
             if af is None:
                 return None
             self.queued_files_map.pop(af.file_id, None)
+            if self.num_workers > 0 and af.differ is not None:
+                af.start_prefetch()
         while True:
+            if af.waiting_for_prefetch:
+                return None
             chunk, uncompressed_sz = af.next_chunk()
             if af.transmitted:
                 self.active_file = None
@@ -804,12 +1119,19 @@ def return_chunk(self, ftc: FileTransmissionCommand) -> None:
 
 class FileTransmission:
 
-    def __init__(self, window_id: int):
+    def __init__(self, window_id: int, num_workers: int = RECEIVE_WORKERS):
         self.window_id = window_id
         self.active_receives: dict[str, ActiveReceive] = {}
         self.active_sends: dict[str, ActiveSend] = {}
         self.pending_receive_responses: Deque[FileTransmissionCommand] = deque()
         self.pending_timer: Optional[int] = None
+        self.receive_workers = ReceiveWorkers(num_workers)
+        self.receive_workers_timer: Optional[int] = None
+        # Files whose STARTED response is held back while the workers are
+        # backlogged. The sender transmits the data of a file only after
+        # receiving it, so this slows down the sender.
+        self.files_waiting_to_start: Deque[tuple[ActiveReceive, DestFile]] = deque()
+        self.prefetch_timer: Optional[int] = None
 
     def callback_after(self, callback: Callable[[Optional[int]], None], timeout: float = 0) -> Optional[int]:
         return add_timer(callback, timeout, False)
@@ -832,7 +1154,7 @@ def try_pending(self, timer_id: Optional[int]) -> None:
 
     def __del__(self) -> None:
         for ar in self.active_receives.values():
-            ar.close()
+            ar.cancel(self.receive_workers)
         self.active_receives = {}
         for a in self.active_sends.values():
             a.close()
@@ -842,7 +1164,60 @@ def __del__(self) -> None:
     def drop_receive(self, receive_id: str) -> None:
         ar = self.active_receives.pop(receive_id, None)
         if ar is not None:
-            ar.close()
+            self.files_waiting_to_start = deque(x for x in self.files_waiting_to_start if x[0] is not ar)
+            ar.cancel(self.receive_workers)
+
+    def start_receive_workers_timer(self) -> None:
+        if self.receive_workers_timer is None and self.receive_workers.has_work:
+            self.receive_workers_timer = self.callback_after(self.process_finished_writes, 0.01)
+
+    def process_finished_writes(self, timer_id: Optional[int] = None) -> None:
+        self.receive_workers_timer = None
+        self.receive_workers.process_finished()
+        self.start_waiting_files()
+        self.start_receive_workers_timer()
+
+    def start_waiting_files(self) -> None:
+        while self.files_waiting_to_start and not self.receive_workers.backlogged:
+            ar, df = self.files_waiting_to_start.popleft()
+            if self.active_receives.get(ar.id) is ar and not df.closed:
+                self.start_file_transfer(ar, df)
+
+    def on_signature_computed(self, ar: ActiveReceive, fs: PatchFile, file_id: str, err: Optional[Exception]) -> None:
+        if self.active_receives.get(ar.id) is not ar:
+            return
+        if err is not None:
+            with suppress(ValueError):
+                ar.pending_files_to_transmit_signature_of.remove((fs, file_id))
+            if isinstance(err, OSError):
+                self.send_fail_on_os_error(err, 'Failed to read signature', ar, file_id)
+            elif ar.send_errors:
+                self.send_transmission_error(ar.id, TransmissionError(file_id=file_id, msg=str(err)))
+        self.transmit_rsync_signature(ar.id)
+
+    def on_data_written(self, ar: ActiveReceive, df: DestFile, err: Optional[Exception]) -> None:
+        self.start_waiting_files()
+        if self.active_receives.get(ar.id) is not ar:
+            return
+        ar.last_activity_at = monotonic()
+        if err is None:
+            if df.failed or not ar.send_acknowledgements:
+                return
+            if df.closed:
+                self.send_status_response(code=ErrorCode.OK, request_id=ar.id, file_id=df.file_id, name=df.name, size=df.bytes_written)
+            elif df.bytes_written > df.bytes_reported:
+                self.send_status_response(code=ErrorCode.PROGRESS, request_id=ar.id, file_id=df.file_id, size=df.bytes_written)
+            df.bytes_reported = df.bytes_written
+        elif isinstance(err, TransmissionError):
+            if ar.send_errors:
+                self.send_transmission_error(ar.id, err)
+        else:
+            import traceback
+            st = ''.join(traceback.format_exception(type(err), err, err.__traceback__))
+            log_error(f'Transmission protocol failed to write data to file with error: {st}')
+            if ar.send_errors:
+                te = TransmissionError(file_id=df.file_id, msg=str(err))
+                self.send_transmission_error(ar.id, te)
 
     def drop_send(self, send_id: str) -> None:
         a = self.active_sends.pop(send_id, None)
@@ -929,7 +1304,7 @@ def handle_send_cmd(self, cmd: FileTransmissionCommand) -> None:
             if len(self.active_sends) >= MAX_ACTIVE_SENDS:
                 log_error('New File transmission send with too many active receives, ignoring')
                 return
-            asd = self.active_sends[cmd.id] = ActiveSend(cmd.id, cmd.quiet, cmd.bypass, cmd.size)
+            asd = self.active_sends[cmd.id] = ActiveSend(cmd.id, cmd.quiet, cmd.bypass, cmd.size, self.receive_workers.num_workers)
             self.start_send(asd.id)
             return
         if cmd.action is Action.cancel:
@@ -965,6 +1340,8 @@ def pump_send_chunks(self, asd: ActiveSend) -> None:
                 self.drop_send(asd.id)
                 break
             if ftc is None:
+                if asd.waiting_for_prefetch and self.prefetch_timer is None:
+                    self.prefetch_timer = self.callback_after(self.pump_prefetched_sends, 0.01)
                 break
             ftc.id = asd.id
             if not self.write_ftc_to_child(ftc, use_pending=False):
@@ -972,6 +1349,10 @@ def pump_send_chunks(self, asd: ActiveSend) -> None:
                 self.callback_after(self.pump_sends, 0.05)
                 break
 
+    def pump_prefetched_sends(self, timer_id: Optional[int]) -> None:
+        self.prefetch_timer = None
+        self.pump_sends(timer_id)
+
     def pump_sends(self, timer_id: Optional[int]) -> None:
         for asd in self.active_sends.values():
             if asd.metadata_sent:
@@ -1023,63 +1404,59 @@ def handle_receive_cmd(self, cmd: FileTransmissionCommand) -> None:
                         self.send_fail_on_os_error(err, 'Failed to create directory', ar, df.file_id)
                     else:
                         self.send_status_response(ErrorCode.OK, ar.id, df.file_id, name=df.name)
-                else:
-                    if ar.send_acknowledgements:
-                        sz = df.existing_stat.st_size if df.existing_stat is not None else -1
-                        ttype = TransmissionType.rsync \
-                            if sz > -1 and df.ttype is TransmissionType.rsync and df.ftype is FileType.regular else TransmissionType.simple
-                        self.send_status_response(code=ErrorCode.STARTED, request_id=ar.id, file_id=df.file_id, name=df.name, size=sz, ttype=ttype)
-                        df.ttype = ttype
-                        if ttype is TransmissionType.rsync:
-                            try:
-                                fs = df.signature_iterator()
-                            except OSError as err:
-                                self.send_fail_on_os_error(err, 'Failed to open file to read signature', ar, df.file_id)
-                            else:
-                                ar.pending_files_to_transmit_signature_of.append((fs, df.file_id))
-                                self.callback_after(partial(self.transmit_rsync_signature, ar.id))
+                elif ar.send_acknowledgements:
+                    self.files_waiting_to_start.append((ar, df))
+                    self.start_waiting_files()
+                    self.start_receive_workers_timer()
         elif cmd.action in (Action.data, Action.end_data):
             try:
-                before = 0
-                bf = ar.files.get(cmd.file_id)
-                if bf is not None:
-                    before = bf.bytes_written
-                df = ar.add_data(cmd)
-                if df.failed:
-                    return
-                if ar.send_acknowledgements:
-                    if df.closed:
-                        self.send_status_response(
-                            code=ErrorCode.OK, request_id=ar.id, file_id=df.file_id, name=df.name, size=df.bytes_written)
-                    elif df.bytes_written > before:
-                        self.send_status_response(
-                            code=ErrorCode.PROGRESS, request_id=ar.id, file_id=df.file_id, size=df.bytes_written)
+                ar.add_data(cmd, self.receive_workers, partial(self.on_data_written, ar))
             except TransmissionError as err:
                 if ar.send_errors:
                     self.send_transmission_error(ar.id, err)
-            except Exception as err:
-                import traceback
-                st = traceback.format_exc()
-                log_error(f'Transmission protocol failed to write data to file with error: {st}')
-                if ar.send_errors:
-                    te = TransmissionError(file_id=cmd.file_id, msg=str(err))
-                    self.send_transmission_error(ar.id, te)
+            self.start_receive_workers_timer()
         elif cmd.action is Action.finish:
-            try:
-                ar.commit(self.send_fail_on_os_error)
-            except TransmissionError as err:
-                if ar.send_errors:
-                    self.send_transmission_error(ar.id, err)
-            except Exception as err:
-                log_error(f'Transmission protocol failed to commit receive with error: {err}')
-                if ar.send_errors:
-                    te = TransmissionError(msg=str(err))
-                    self.send_transmission_error(ar.id, te)
-            finally:
-                self.drop_receive(ar.id)
+            # directory metadata must be applied after all files in them are written
+            self.receive_workers.when_done(ar.files.values(), partial(self.finish_receive, ar))
+            self.start_receive_workers_timer()
         else:
             log_error(f'Transmission receive command with unknown action: {cmd.action}, ignoring')
 
+    def start_file_transfer(self, ar: ActiveReceive, df: DestFile) -> None:
+        sz = df.existing_stat.st_size if df.existing_stat is not None else -1
+        ttype = TransmissionType.rsync \
+            if sz > -1 and df.ttype is TransmissionType.rsync and df.ftype is FileType.regular else TransmissionType.simple
+        self.send_status_response(code=ErrorCode.STARTED, request_id=ar.id, file_id=df.file_id, name=df.name, size=sz, ttype=ttype)
+        df.ttype = ttype
+        if ttype is TransmissionType.rsync:
+            try:
+                fs = df.signature_iterator()
+            except OSError as err:
+                self.send_fail_on_os_error(err, 'Failed to open file to read signature', ar, df.file_id)
+            else:
+                ar.pending_files_to_transmit_signature_of.append((fs, df.file_id))
+                if self.receive_workers.num_workers > 0:
+                    self.receive_workers.submit(df, fs.compute_signature, 0, partial(self.on_signature_computed, ar, fs, df.file_id))
+                    self.start_receive_workers_timer()
+                else:
+                    self.callback_after(partial(self.transmit_rsync_signature, ar.id))
+
+    def finish_receive(self, ar: ActiveReceive) -> None:
+        if self.active_receives.get(ar.id) is not ar:
+            return
+        try:
+            ar.commit(self.send_fail_on_os_error)
+        except TransmissionError as err:
+            if ar.send_errors:
+                self.send_transmission_error(ar.id, err)
+        except Exception as err:
+            log_error(f'Transmission protocol failed to commit receive with error: {err}')
+            if ar.send_errors:
+                te = TransmissionError(msg=str(err))
+                self.send_transmission_error(ar.id, te)
+        finally:
+            self.drop_receive(ar.id)
+
     def transmit_rsync_signature(self, receive_id: str, timer_id: Optional[int] = None) -> None:
         q = self.active_receives.get(receive_id)
         if q is None:
@@ -1094,23 +1471,32 @@ def transmit_rsync_signature(self, receive_id: str, timer_id: Optional[int] = No
         if not ar.pending_files_to_transmit_signature_of:
             return
         fs, file_id = ar.pending_files_to_transmit_signature_of[0]
-        pos = 0
-        buf = memoryview(bytearray(4096))
-        is_finished = False
-        while len(buf) >= pos + 32:
-            try:
-                n = fs.next_signature_block(buf[pos:])
-            except OSError as err:
-                if ar.send_errors:
-                    self.send_fail_on_os_error(err, 'Failed to read signature', ar, file_id)
-                return
-            if not n:
-                is_finished = True
-                ar.pending_files_to_transmit_signature_of.popleft()
-                break
-            pos += n
+        if fs.signature is not None:
+            # computed by a worker thread, send it all at once
+            chunk = memoryview(fs.signature)
+            fs.signature = None
+            is_finished = True
+            ar.pending_files_to_transmit_signature_of.popleft()
+        elif self.receive_workers.num_workers > 0:
+            return  # will be called again when the signature is computed
+        else:
+            pos = 0
+            buf = memoryview(bytearray(4096))
+            is_finished = False
+            while len(buf) >= pos + 32:
+                try:
+                    n = fs.next_signature_block(buf[pos:])
+                except OSError as err:
+                    if ar.send_errors:
+                        self.send_fail_on_os_error(err, 'Failed to read signature', ar, file_id)
+                    return
+                if not n:
+                    is_finished = True
+                    ar.pending_files_to_transmit_signature_of.popleft()
+                    break
+                pos += n
+            chunk = buf[:pos]
 
-        chunk = buf[:pos]
         has_capacity = True
 
         def write_ftc(data: FileTransmissionCommand) -> None:
@@ -1230,8 +1616,8 @@ def active_file(self, rid: str = '', file_id: str = '') -> DestFile:
 
 class TestFileTransmission(FileTransmission):
 
-    def __init__(self, allow: bool = True) -> None:
-        super().__init__(0)
+    def __init__(self, allow: bool = True, num_workers: int = 0) -> None:
+        super().__init__(0, num_workers)
         self.test_responses: list[dict[str, Union[str, int, bytes]]] = []
         self.allow = allow
 
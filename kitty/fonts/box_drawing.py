@@ -11,7 +11,7 @@
 from functools import lru_cache, wraps
 from functools import partial as p
 from itertools import repeat
-from typing import Any, Callable, Literal, Optional
+from typing import Any, Callable, Literal, Optional, Union
 
 scale = (0.001, 1., 1.5, 2.)
 _dpi = 96.0
@@ -28,23 +28,49 @@ def thickness(level: int = 1, horizontal: bool = True) -> int:
     return int(math.ceil(pts * (_dpi / 72.0)))
 
 
+@lru_cache(maxsize=64)
+def filled(val: int, num: int) -> bytes:
+    return bytes((val,)) * num
+
+
+def fill_span(buf: BufType, start: int, stop: int, step: int = 1, val: int = 255) -> None:
+    # Equivalent to setting buf[i] = val for i in range(start, stop, step) but
+    # done with a single slice assignment, unless some index is out of bounds
+    num = len(range(start, stop, step))
+    if num > 0:
+        last = start + (num - 1) * step
+        if start >= 0 and last < len(buf):
+            buf[start:last + 1:step] = filled(val, num)
+        else:
+            for i in range(start, stop, step):
+                buf[i] = val
+
+
+def fill_rect(buf: BufType, width: int, x1: int, x2: int, y1: int, y2: int, val: int = 255) -> None:
+    if x2 > x1:
+        for y in range(y1, y2):
+            offset = y * width
+            fill_span(buf, offset + x1, offset + x2, 1, val)
+
+
+def fill_columns(buf: BufType, width: int, x1: int, x2: int, y1: int, y2: int, val: int = 255) -> None:
+    if y2 > y1:
+        for x in range(x1, x2):
+            fill_span(buf, x + y1 * width, x + y2 * width, width, val)
+
+
 def draw_hline(buf: BufType, width: int, x1: int, x2: int, y: int, level: int, supersample_factor: int = 1) -> None:
     ' Draw a horizontal line between [x1, x2) centered at y with the thickness given by level and supersample factor '
     sz = int(supersample_factor * thickness(level=level, horizontal=False))
     start = y - sz // 2
-    for y in range(start, start + sz):
-        offset = y * width
-        for x in range(x1, x2):
-            buf[offset + x] = 255
+    fill_rect(buf, width, x1, x2, start, start + sz)
 
 
 def draw_vline(buf: BufType, width: int, y1: int, y2: int, x: int, level: int, supersample_factor: float = 1.0) -> None:
     ' Draw a vertical line between [y1, y2) centered at x with the thickness given by level and supersample factor '
     sz = int(supersample_factor * thickness(level=level, horizontal=True))
     start = x - sz // 2
-    for x in range(start, start + sz):
-        for y in range(y1, y2):
-            buf[x + y * width] = 255
+    fill_columns(buf, width, start, start + sz, y1, y2)
 
 
 def half_hline(buf: BufType, width: int, height: int, level: int = 1, which: str = 'left', extend_by: int = 0) -> None:
@@ -80,11 +106,8 @@ def add_hholes(buf: BufType, width: int, height: int, level: int = 1, num: int =
     hole_sz = width // hole_factor
     start = height // 2 - line_sz // 2
     holes = get_holes(width, hole_sz, num)
-    for y in range(start, start + line_sz):
-        offset = y * width
-        for hole in holes:
-            for x in hole:
-                buf[offset + x] = 0
+    for hole in holes:
+        fill_rect(buf, width, hole[0], hole[-1] + 1, start, start + line_sz, 0)
 
 
 def add_vholes(buf: BufType, width: int, height: int, level: int = 1, num: int = 1) -> None:
@@ -92,10 +115,8 @@ def add_vholes(buf: BufType, width: int, height: int, level: int = 1, num: int =
     hole_sz = height // hole_factor
     start = width // 2 - line_sz // 2
     holes = get_holes(height, hole_sz, num)
-    for x in range(start, start + line_sz):
-        for hole in holes:
-            for y in hole:
-                buf[x + width * y] = 0
+    for hole in holes:
+        fill_columns(buf, width, start, start + line_sz, hole[0], hole[-1] + 1, 0)
 
 
 def hline(buf: BufType, width: int, height: int, level: int = 1) -> None:
@@ -146,6 +167,12 @@ def cross(buf: BufType, width: int, height: int, a: int = 1, b: int = 1, c: int
 
 def downsample(src: BufType, dest: BufType, dest_width: int, dest_height: int, factor: int = 4) -> None:
     src_width = factor * dest_width
+    shift = (factor * factor).bit_length() - 1
+    if factor > 1 and 1 << shift == factor * factor and 255 * factor * factor < 65536:
+        # Work on whole rows at a time by packing the pixels into 16 bit
+        # lanes of a single integer, see downsample_rows()
+        downsample_rows(src, dest, dest_width, dest_height, factor, shift)
+        return
 
     def average_intensity_in_src(dest_x: int, dest_y: int) -> int:
         src_y = dest_y * factor
@@ -163,6 +190,39 @@ def average_intensity_in_src(dest_x: int, dest_y: int) -> int:
             dest[offset + x] = min(255, dest[offset + x] + average_intensity_in_src(x, y))
 
 
+def downsample_rows(src: BufType, dest: BufType, dest_width: int, dest_height: int, factor: int, shift: int) -> None:
+    # Every pixel of a row becomes a 16 bit lane of an integer, so that
+    # integer addition adds all pixels of two rows at once. The lanes are
+    # wide enough that the sum of factor*factor pixels never carries into
+    # the next lane.
+    src_width = factor * dest_width
+    lanes = bytearray(2 * src_width)
+    dest_lanes = bytearray(2 * dest_width)
+    num_bytes = 2 * src_width
+    low_bits = int.from_bytes(b'\x01\x00' * dest_width, 'little')
+    for y in range(dest_height):
+        total = 0
+        for src_y in range(y * factor, (y + 1) * factor):
+            offset = src_y * src_width
+            lanes[::2] = src[offset:offset + src_width]
+            total += int.from_bytes(lanes, 'little')
+        # lane x now has the sum of columns x to x + factor - 1
+        block_sum = total
+        for i in range(1, factor):
+            block_sum += total >> (16 * i)
+        # the low byte of the lane of the first column of each block is the
+        # average, after the shift bits of the next lane end up in the high byte
+        averages = (block_sum >> shift).to_bytes(num_bytes, 'little')[::2 * factor]
+        offset = dest_width * y
+        dest_lanes[::2] = dest[offset:offset + dest_width]
+        val = int.from_bytes(dest_lanes, 'little')
+        dest_lanes[::2] = averages
+        # saturating add, setting lanes that overflowed 255 to 255
+        val += int.from_bytes(dest_lanes, 'little')
+        val |= ((val >> 8) & low_bits) * 255
+        dest[offset:offset + dest_width] = val.to_bytes(2 * dest_width, 'little')[::2]
+
+
 class SSByteArray(bytearray):
     supersample_factor = 1
 
@@ -185,10 +245,17 @@ def supersampled_wrapper(buf: BufType, width: int, height: int, *args: Any, **kw
 
 def fill_region(buf: BufType, width: int, height: int, xlimits: Iterable[Iterable[float]], inverted: bool = False) -> None:
     full, empty = (0, 255) if inverted else (255, 0)
-    for y in range(height):
-        offset = y * width
-        for x, (upper, lower) in enumerate(xlimits):
-            buf[x + offset] = full if upper <= y <= lower else empty
+    xlimits = tuple(xlimits)
+    if len(xlimits) > width:
+        for y in range(height):
+            offset = y * width
+            for x, (upper, lower) in enumerate(xlimits):
+                buf[x + offset] = full if upper <= y <= lower else empty
+        return
+    for x, (upper, lower) in enumerate(xlimits):
+        # the pixels in column x with upper <= y <= lower
+        fill_columns(buf, width, x, x + 1, 0, height, empty)
+        fill_columns(buf, width, x, x + 1, max(0, math.ceil(upper)), min(height - 1, math.floor(lower)) + 1, full)
 
 
 def line_equation(x1: int, y1: int, x2: int, y2: int) -> Callable[[int], float]:
@@ -263,13 +330,9 @@ def thick_line(buf: BufType, width: int, height: int, thickness_in_pixels: int,
     leq = line_equation(*p1, *p2)
     delta, extra = divmod(thickness_in_pixels, 2)
 
-    for x in range(p1[0], p2[0] + 1):
-        if 0 <= x < width:
-            y_p = leq(x)
-            r = range(int(y_p) - delta, int(y_p) + delta + extra)
-            for y in r:
-                if 0 <= y < height:
-                    buf[x + y * width] = 255
+    for x in range(max(0, p1[0]), min(width, p2[0] + 1)):
+        y_p = int(leq(x))
+        fill_columns(buf, width, x, x + 1, max(0, y_p - delta), min(height, y_p + delta + extra))
 
 
 @supersampled()
@@ -446,11 +509,13 @@ def D(buf: SSByteArray, width: int, height: int, left: bool = True) -> None:
     else:
         mbuf = bytearray(width * height)
         fill_region(mbuf, width, height, xlimits)
-        for y in range(height):
-            offset = y * width
-            for src_x in range(width):
-                dest_x = width - 1 - src_x
-                buf[offset + dest_x] = mbuf[offset + src_x]
+        mirror(mbuf, buf, width, height)
+
+
+def mirror(src: BufType, dest: BufType, width: int, height: int) -> None:
+    ' Copy src to dest flipped horizontally '
+    for offset in range(0, width * height, width):
+        dest[offset:offset + width] = src[offset + width - 1:offset - 1 if offset else None:-1]
 
 
 def draw_parametrized_curve(
@@ -470,13 +535,7 @@ def draw_parametrized_curve(
             continue
         x_p, y_p = p
         seen.add(p)
-        for y in range(y_p - delta, y_p + delta + extra):
-            if 0 <= y < height:
-                offset = y * width
-                for x in range(x_p - delta, x_p + delta + extra):
-                    if 0 <= x < width:
-                        pos = offset + x
-                        buf[pos] = min(255, buf[pos] + 255)
+        fill_rect(buf, width, max(0, x_p - delta), min(width, x_p + delta + extra), max(0, y_p - delta), min(height, y_p + delta + extra))
 
 
 def circle_equations(
@@ -569,11 +628,7 @@ def rounded_separator(buf: SSByteArray, width: int, height: int, level: int = 1,
         mbuf = SSByteArray(width * height)
         mbuf.supersample_factor = buf.supersample_factor
         draw_parametrized_curve(mbuf, width, height, level, bezier_x, bezier_y)
-        for y in range(height):
-            offset = y * width
-            for src_x in range(width):
-                dest_x = width - 1 - src_x
-                buf[offset + dest_x] = mbuf[offset + src_x]
+        mirror(mbuf, buf, width, height)
 
 
 @supersampled()
@@ -589,9 +644,11 @@ def draw_circle(buf: SSByteArray, width: int, height: int, scale: float = 1.0, g
     radius = int(scale * min(w, h) - gap / 2)
     fill = 0 if invert else 255
     for y in range(height):
-        for x in range(width):
-            if (x - w) ** 2 + (y - h) ** 2 <= radius ** 2:
-                buf[y * width + x] = fill
+        # the pixels with (x - w) ** 2 + (y - h) ** 2 <= radius ** 2
+        q = radius ** 2 - (y - h) ** 2
+        if q >= 0:
+            dx = math.isqrt(q)
+            fill_rect(buf, width, max(0, w - dx), min(width, w + dx + 1), y, y + 1, fill)
 
 
 @supersampled()
@@ -817,12 +874,9 @@ def shade(
                 continue
 
             # Fill the square
-            for yr in range(square_height):
-                y = r * square_height + yr + ey
-                offset = width * y
-                for xc in range(square_width):
-                    x = c * square_width + xc + ex
-                    buf[offset + x] = 255
+            x = c * square_width + ex
+            y = r * square_height + ey
+            fill_rect(buf, width, x, x + square_width, y, y + square_height)
 
     if not fill_blank:
         return
@@ -840,9 +894,7 @@ def shade(
         rows = range(height)
 
     for r in rows:
-        off = r * width
-        for c in cols:
-            buf[off + c] = 255
+        fill_rect(buf, width, cols.start, cols.stop, r, r + 1)
 
 
 def mask(
@@ -864,10 +916,7 @@ def quad(buf: BufType, width: int, height: int, x: int = 0, y: int = 0) -> None:
     num_rows = height // 2
     top = y * num_rows
     bottom = height if y else num_rows
-    for r in range(top, bottom):
-        off = r * width
-        for c in range(left, right):
-            buf[off + c] = 255
+    fill_rect(buf, width, left, right, top, bottom)
 
 
 def sextant(buf: BufType, width: int, height: int, level: int = 1, which: int = 0) -> None:
@@ -883,10 +932,7 @@ def draw_sextant(row: int = 0, col: int = 0) -> None:
             x_start, x_end = 0, width // 2
         else:
             x_start, x_end = width // 2, width
-        for r in range(y_start, y_end):
-            off = r * width
-            for c in range(x_start, x_end):
-                buf[c + off] = 255
+        fill_rect(buf, width, x_start, x_end, y_start, y_end)
 
     def add_row(q: int, r: int) -> None:
         if q & 1:
@@ -908,18 +954,11 @@ def smooth_mosaic(
     bx, by = int(b[0] * (width - 1)), int(b[1] * (height - 1))
     line = line_equation(ax, ay, bx, by)
 
-    def lower_condition(x: int, y: int) -> bool:
-        return y >= line(x)
-
-    def upper_condition(x: int, y: int) -> bool:
-        return y <= line(x)
-
-    condition = lower_condition if lower else upper_condition
-    for y in range(height):
-        offset = width * y
-        for x in range(width):
-            if condition(x, y):
-                buf[offset + x] = 255
+    for x in range(width):
+        if lower:  # the pixels in column x with y >= line(x)
+            fill_columns(buf, width, x, x + 1, max(0, math.ceil(line(x))), height)
+        else:  # the pixels in column x with y <= line(x)
+            fill_columns(buf, width, x, x + 1, 0, min(height - 1, math.floor(line(x))) + 1)
 
 
 def eight_range(size: int, which: int) -> range:
@@ -948,10 +987,7 @@ def eight_bar(buf: BufType, width: int, height: int, level: int = 1, which: int
     else:
         y_range = range(0, height)
         x_range = eight_range(width, which)
-    for y in y_range:
-        offset = y * width
-        for x in x_range:
-            buf[offset + x] = 255
+    fill_rect(buf, width, x_range.start, x_range.stop, y_range.start, y_range.stop)
 
 
 def eight_block(buf: BufType, width: int, height: int, level: int = 1, which: tuple[int, ...] = (0,), horizontal: bool = False) -> None:
@@ -964,10 +1000,7 @@ def frame(buf: BufType, width: int, height: int, edges: tuple[Literal['l', 'r',
     v = thickness(level=level, horizontal=False)
 
     def line(x1: int, x2: int, y1: int, y2: int) -> None:
-        for y in range(y1, y2):
-            offset = y * width
-            for x in range(x1, x2):
-                buf[x + offset] = 255
+        fill_rect(buf, width, x1, x2, y1, y2)
 
     def hline(y1: int, y2: int) -> None:
         line(0, width, y1, y2)
@@ -1004,10 +1037,7 @@ def progress_bar(buf: BufType, width: int, height: int, which: Literal['l', 'm',
         x1, x2 = 0, width
     else:
         x1, x2 = 0, width - gap_factor*v
-    for y in range(y1, y2):
-        offset = y * width
-        for x in range(x1, x2):
-            buf[x + offset] = 255
+    fill_rect(buf, width, x1, x2, y1, y2)
 
 
 @lru_cache(maxsize=64)
@@ -1032,10 +1062,7 @@ def braille_dot(buf: BufType, width: int, height: int, col: int, row: int) -> No
     x_start = x_gaps[col] + col * dot_width
     y_start = y_gaps[row] + row * dot_height
     if y_start < height and x_start < width:
-        for y in range(y_start, min(height, y_start + dot_height)):
-            offset = y * width
-            for x in range(x_start, min(width, x_start + dot_width)):
-                buf[offset + x] = 255
+        fill_rect(buf, width, x_start, min(width, x_start + dot_width), y_start, min(height, y_start + dot_height))
 
 
 def braille(buf: BufType, width: int, height: int, which: int = 0) -> None:
@@ -1395,6 +1422,14 @@ def render_box_char(ch: str, buf: BufType, width: int, height: int, dpi: float =
     return buf
 
 
+def render_box_chars(chars: Iterable[str], width: int, height: int, dpi: float = 96.0) -> Iterator[tuple[str, bytearray]]:
+    ' Render many glyphs of the same size, yielding (char, rendered bitmap) '
+    for ch in chars:
+        buf = bytearray(width * height)
+        render_box_char(ch, buf, width, height, dpi)
+        yield ch, buf
+
+
 def render_missing_glyph(buf: BufType, width: int, height: int) -> None:
     frame(buf, width, height)
 
@@ -1409,9 +1444,8 @@ def test_char(ch: str, sz: int = 48) -> None:
         try:
             render_box_char(ch, buf, width, height)
 
-            def join_cells(*cells: bytes) -> bytes:
-                cells = tuple(bytes(x) for x in cells)
-                return concat_cells(width, height, False, cells)
+            def join_cells(*cells: Union[bytes, bytearray]) -> bytes:
+                return concat_cells(width, height, False, tuple(bytes(x) for x in cells))
 
             rgb_data = join_cells(buf)
             display_bitmap(rgb_data, width, height)
@@ -1428,9 +1462,8 @@ def test_drawing(sz: int = 48, family: str = 'monospace', start: int = 0x2500, n
     with setup_for_testing(family, sz) as (_, width, height):
         space = bytearray(width * height)
 
-        def join_cells(cells: Iterable[bytes]) -> bytes:
-            cells = tuple(bytes(x) for x in cells)
-            return concat_cells(width, height, False, cells)
+        def join_cells(cells: Iterable[Union[bytes, bytearray]]) -> bytes:
+            return concat_cells(width, height, False, tuple(bytes(x) for x in cells))
 
         def render_chr(ch: str) -> bytearray:
             if ch in box_chars:
@@ -0,0 +1,224 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+import os
+import struct
+import zlib
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import closing, contextmanager, suppress
+from heapq import heapify, heappop
+from time import monotonic
+from typing import Optional
+
+from kitty.constants import cache_dir, str_version
+from kitty.utils import lock_file, unlock_file
+
+from . import box_drawing
+from .box_drawing import box_chars, render_box_chars
+
+record_header = struct.Struct('<III')  # codepoint, length, crc32 of data
+record_format_version = 2
+Geometry = tuple[int, int, float]  # cell width, cell height, dpi
+
+
+class BoxDrawingCache:
+
+    '''
+    A cache of rendered box drawing glyphs, stored on disk so that the glyphs
+    for a cell size seen before, for example at a previous zoom level or in a
+    previous run, do not need to be rendered again. The glyphs for every
+    combination of cell size, dpi and box drawing scale are stored in a single
+    file, as a sequence of records of the form (codepoint, length, crc32, data)
+    that are appended to as new glyphs are rendered. Files are only modified
+    while holding a lock, so that several kitty instances can share the cache,
+    and records that fail their checksum are discarded when read. The number
+    of such files on disk is bounded by max_geometries.
+    '''
+
+    lock_file_name = '.lock'
+
+    def __init__(self, cache_path: str = '', max_geometries: int = 32, max_geometries_in_memory: int = 4):
+        self.cache_path = cache_path
+        self.cache_dir = ''
+        self.max_geometries = max_geometries
+        self.max_geometries_in_memory = max_geometries_in_memory
+        self.in_memory: OrderedDict[str, dict[int, bytes]] = OrderedDict()
+        self.names: dict[tuple[int, int, float, tuple[float, ...]], str] = {}
+        self.pending_writes: Optional[dict[str, list[tuple[int, bytes]]]] = None
+
+    def ensure_subdir(self) -> str:
+        if not self.cache_dir:
+            import stat
+            x = os.path.abspath(os.path.join(self.cache_path or cache_dir(), 'box-drawing'))
+            os.makedirs(x, mode=stat.S_IREAD | stat.S_IWRITE | stat.S_IEXEC, exist_ok=True)
+            self.cache_dir = x
+        return self.cache_dir
+
+    def __enter__(self) -> None:
+        self.ensure_subdir()
+        self.lock_file = open(os.path.join(self.cache_dir, self.lock_file_name), 'wb')
+        try:
+            lock_file(self.lock_file)
+        except Exception:
+            self.lock_file.close()
+            raise
+
+    def __exit__(self, *a: object) -> None:
+        with closing(self.lock_file):
+            unlock_file(self.lock_file)
+
+    def name_for(self, width: int, height: int, dpi: float) -> str:
+        key = width, height, dpi, box_drawing.scale
+        ans = self.names.get(key)
+        if ans is None:
+            from hashlib import sha256
+            ans = self.names[key] = sha256(repr((record_format_version, str_version) + key).encode()).hexdigest()
+        return ans
+
+    def read_glyphs(self, name: str, size: int) -> dict[int, bytes]:
+        ans: dict[int, bytes] = {}
+        with suppress(OSError), self:
+            path = os.path.join(self.cache_dir, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            pos = 0
+            while pos + record_header.size <= len(data):
+                codepoint, length, crc = record_header.unpack_from(data, pos)
+                start = pos + record_header.size
+                if length != size or start + length > len(data):
+                    break
+                g = data[start:start + length]
+                if zlib.crc32(g) != crc:
+                    break
+                ans[codepoint] = g
+                pos = start + length
+            if pos < len(data):
+                # A write was interrupted or the file is corrupt, drop
+                # everything after the last valid record so that records
+                # appended later can be read
+                os.truncate(path, pos)
+        return ans
+
+    def write_glyphs(self, name: str, glyphs: Iterable[tuple[int, bytes]]) -> None:
+        data = b''.join(record_header.pack(codepoint, len(g), zlib.crc32(g)) + g for codepoint, g in glyphs)
+        if not data:
+            return
+        with suppress(OSError), self:
+            path = os.path.join(self.cache_dir, name)
+            is_new = not os.path.exists(path)
+            with open(path, 'ab') as f:
+                f.write(data)
+            if is_new:
+                self.prune()
+
+    def prune(self) -> None:
+        entries = []
+        for e in os.scandir(self.cache_dir):
+            if e.name == self.lock_file_name:
+                continue
+            with suppress(OSError):
+                entries.append((e.stat().st_mtime_ns, e.path))
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_geometries)]:
+            with suppress(FileNotFoundError):
+                os.remove(path)
+
+    def glyphs_for(self, width: int, height: int, dpi: float) -> tuple[str, dict[int, bytes]]:
+        name = self.name_for(width, height, dpi)
+        glyphs = self.in_memory.get(name)
+        if glyphs is None:
+            self.in_memory[name] = glyphs = self.read_glyphs(name, width * height)
+            while len(self.in_memory) > self.max_geometries_in_memory:
+                self.in_memory.popitem(last=False)
+        else:
+            self.in_memory.move_to_end(name)
+        return name, glyphs
+
+    def render_many(self, codepoints: Iterable[int], width: int, height: int, dpi: float) -> dict[int, bytes]:
+        ' Return the rendered glyphs for all the specified codepoints, rendering only those not already cached '
+        name, glyphs = self.glyphs_for(width, height, dpi)
+        codepoints = tuple(codepoints)
+        missing = [chr(c) for c in codepoints if c not in glyphs]
+        if missing:
+            rendered = tuple((ord(ch), bytes(buf)) for ch, buf in render_box_chars(missing, width, height, dpi))
+            glyphs.update(rendered)
+            if self.pending_writes is None:
+                self.write_glyphs(name, rendered)
+            else:
+                self.pending_writes.setdefault(name, []).extend(rendered)
+        return {c: glyphs[c] for c in codepoints}
+
+    def __call__(self, codepoint: int, width: int, height: int, dpi: float) -> bytes:
+        return self.render_many((codepoint,), width, height, dpi)[codepoint]
+
+    @contextmanager
+    def batched_writes(self) -> Iterator[None]:
+        ' Write the glyphs rendered in this context to disk once, at the end, instead of after every render '
+        if self.pending_writes is not None:
+            yield
+            return
+        self.pending_writes = {}
+        try:
+            yield
+        finally:
+            pending, self.pending_writes = self.pending_writes, None
+            for name, glyphs in pending.items():
+                self.write_glyphs(name, glyphs)
+
+    def clear_memory(self) -> None:
+        self.in_memory.clear()
+
+
+def prefetch_priority(codepoint: int) -> int:
+    if 0x2500 <= codepoint <= 0x259f or 0xe0b0 <= codepoint <= 0xe0bf:
+        return 1  # box drawing, block elements and powerline symbols
+    if 0x2800 <= codepoint <= 0x28ff:
+        return 2  # braille
+    return 3
+
+
+class BoxDrawingPrefetcher:
+
+    '''
+    Renders the glyphs of all box drawing characters for the cell geometries
+    in use into the glyph cache ahead of time, so that they need not be
+    rendered when first displayed. Rendering is done a little at a time via
+    :meth:`render_some` which should be called on every tick of the event loop
+    while it returns True. Glyphs are rendered in order of priority, those
+    currently on screen first, then the commonly used box drawing, powerline
+    and braille characters and finally the rest.
+    '''
+
+    def __init__(self, cache: BoxDrawingCache) -> None:
+        self.cache = cache
+        self.queue: list[tuple[int, int, Geometry]] = []
+
+    def prefetch(self, geometries: Mapping[Geometry, Iterable[int]]) -> None:
+        ' Replace the queue with all glyphs for the specified geometries, each mapped to the codepoints currently on screen '
+        self.queue = []
+        for g, on_screen in geometries.items():
+            seen = set(on_screen)
+            for ch in box_chars:
+                cp = ord(ch)
+                self.queue.append((0 if cp in seen else prefetch_priority(cp), cp, g))
+        heapify(self.queue)
+
+    def render_some(self, time_budget: float = 0.002) -> bool:
+        ' Render queued glyphs until time_budget seconds have passed, returning True if there are more left '
+        end = monotonic() + time_budget
+        with self.cache.batched_writes():
+            while self.queue:
+                _, cp, (width, height, dpi) = heappop(self.queue)
+                self.cache(cp, width, height, dpi)
+                if monotonic() >= end:
+                    break
+        return bool(self.queue)
+
+    def clear(self) -> None:
+        self.queue = []
+
+
+box_drawing_cache = BoxDrawingCache()
+box_drawing_prefetcher = BoxDrawingPrefetcher(box_drawing_cache)
@@ -7,7 +7,7 @@
 from collections.abc import Generator
 from functools import partial
 from math import ceil, cos, floor, pi
-from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, Union, cast
+from typing import TYPE_CHECKING, Any, Callable, Literal, Optional, Union
 
 from kitty.constants import fonts_dir, is_macos
 from kitty.fast_data_types import (
@@ -25,7 +25,8 @@
     test_render_line,
     test_shape,
 )
-from kitty.fonts.box_drawing import BufType, distribute_dots, render_box_char, render_missing_glyph
+from kitty.fonts.box_drawing import distribute_dots, render_missing_glyph
+from kitty.fonts.box_drawing_cache import box_drawing_cache
 from kitty.options.types import Options, defaults
 from kitty.options.utils import parse_font_spec
 from kitty.types import _T
@@ -413,10 +414,7 @@ def prerender_function(
 
 def render_box_drawing(codepoint: int, cell_width: int, cell_height: int, dpi: float) -> tuple[int, CBufType]:
     CharTexture = ctypes.c_ubyte * (cell_width * cell_height)
-    buf = CharTexture()
-    render_box_char(
-        chr(codepoint), cast(BufType, buf), cell_width, cell_height, dpi
-    )
+    buf = CharTexture.from_buffer_copy(box_drawing_cache(codepoint, cell_width, cell_height, dpi))
     return ctypes.addressof(buf), buf
 
 
@@ -2,7 +2,10 @@
 # License: GPLv3 Copyright: 2020, Kovid Goyal <kovid at kovidgoyal.net>
 
 import os
+import posixpath
 import stat
+from collections import OrderedDict
+from collections.abc import Iterable
 from contextlib import suppress
 from typing import Optional
 
@@ -57,48 +60,97 @@ def is_folder(path: str) -> bool:
     return False
 
 
+# Map of file extensions, including the leading period, to mime types, built
+# from the mime database once, when it is initialized
+extension_table: dict[str, str] = {}
+# Bounded LRU cache of mime types guessed with filesystem access, keyed by
+# path, inode, mtime and mode, so that changed files are guessed afresh
+mime_cache: 'OrderedDict[tuple[str, int, int, int], Optional[str]]' = OrderedDict()
+MIME_CACHE_SIZE = 1024
+
+
+def normalize_mime_type(mt: str) -> str:
+    if mt in text_mimes:
+        mt = f'text/{mt.split("/", 1)[-1]}'
+    return mt
+
+
 def initialize_mime_database() -> None:
     if hasattr(initialize_mime_database, 'inited'):
         return
     setattr(initialize_mime_database, 'inited', True)
-    from mimetypes import init
-    init(None)
+    import mimetypes
+    mimetypes.init(None)
     from kitty.constants import config_dir
     local_defs = os.path.join(config_dir, 'mime.types')
     if os.path.exists(local_defs):
-        init((local_defs,))
+        mimetypes.init((local_defs,))
+    extension_table.clear()
+    for ext, mt in mimetypes.types_map.items():
+        extension_table[ext] = normalize_mime_type(mt)
 
 
 def clear_mime_cache() -> None:
     if hasattr(initialize_mime_database, 'inited'):
         delattr(initialize_mime_database, 'inited')
+    extension_table.clear()
+    mime_cache.clear()
 
 
-def guess_type(path: str, allow_filesystem_access: bool = False) -> Optional[str]:
-    is_dir = is_exe = False
-
-    if allow_filesystem_access:
-        with suppress(OSError):
-            st = os.stat(path)
-            is_dir = bool(stat.S_ISDIR(st.st_mode))
-            is_exe = bool(not is_dir and st.st_mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH) and os.access(path, os.X_OK))
-
-    if is_dir:
-        return 'inode/directory'
-    from mimetypes import guess_type as stdlib_guess_type
+def guess_type_from_name(path: str) -> Optional[str]:
+    ' Guess the mime type of path from its name alone, the same way as mimetypes.guess_type() does, without accessing the filesystem '
     initialize_mime_database()
-    mt = None
-    with suppress(Exception):
-        mt = stdlib_guess_type(path)[0]
-    if not mt:
-        ext = path.rpartition('.')[-1].lower()
-        mt = known_extensions.get(ext)
-    if mt in text_mimes:
-        mt = f'text/{mt.split("/", 1)[-1]}'
-    mt = mt or is_special_file(path)
+    from mimetypes import encodings_map, suffix_map
+    base, ext = posixpath.splitext(path)
+    while (q := ext.lower()) in suffix_map:
+        base, ext = posixpath.splitext(base + suffix_map[q])
+    if ext in encodings_map:  # encodings_map is case sensitive
+        base, ext = posixpath.splitext(base)
+    mt = extension_table.get(ext.lower())
     if not mt:
-        if is_dir:
-            mt = 'inode/directory'  # type: ignore
-        elif is_exe:
+        mt = known_extensions.get(path.rpartition('.')[-1].lower())
+    return mt or is_special_file(path)
+
+
+def guess_type_for_stat(path: str, st: os.stat_result) -> Optional[str]:
+    key = path, st.st_ino, st.st_mtime_ns, st.st_mode
+    try:
+        mime_cache.move_to_end(key)
+        return mime_cache[key]
+    except KeyError:
+        pass
+    if stat.S_ISDIR(st.st_mode):
+        mt: Optional[str] = 'inode/directory'
+    else:
+        mt = guess_type_from_name(path)
+        if not mt and st.st_mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH) and os.access(path, os.X_OK):
             mt = 'inode/executable'
+    mime_cache[key] = mt
+    if len(mime_cache) > MIME_CACHE_SIZE:
+        mime_cache.popitem(last=False)
     return mt
+
+
+def guess_type(path: str, allow_filesystem_access: bool = False) -> Optional[str]:
+    if allow_filesystem_access:
+        try:
+            st = os.stat(path)
+        except OSError:
+            pass
+        else:
+            return guess_type_for_stat(path, st)
+    return guess_type_from_name(path)
+
+
+def guess_types(paths: Iterable[str], allow_filesystem_access: bool = False) -> dict[str, Optional[str]]:
+    '''
+    Guess the mime types of many paths at once, for example, for files dropped
+    onto a window. Every distinct path is looked up once.
+    '''
+    initialize_mime_database()
+    ans: dict[str, Optional[str]] = {}
+    for path in paths:
+        if path not in ans:
+            ans[path] = guess_type(path, allow_filesystem_access)
+    return ans
+
@@ -1,7 +1,7 @@
 #!/usr/bin/env python
 # License: GPL v3 Copyright: 2016, Kovid Goyal <kovid at kovidgoyal.net>
 
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable
 from gettext import gettext as _
 from typing import TYPE_CHECKING, Any, Callable, Optional
 
@@ -78,6 +78,8 @@ def update_keymap(self, global_shortcuts:Optional[dict[str, SingleKey]] = None)
             global_shortcuts = self.set_cocoa_global_shortcuts(self.get_options()) if is_macos else {}
         self.global_shortcuts_map: KeyMap = {v: [KeyDefinition(definition=k)] for k, v in global_shortcuts.items()}
         self.global_shortcuts = global_shortcuts
+        self.window_matchers: dict[str, Callable[['Window'], bool]] = {}
+        self.sequence_keymaps: dict[tuple[int, ...], tuple[tuple[KeyDefinition, ...], KeyMap]] = {}
         self.keyboard_modes = self.get_options().keyboard_modes.copy()
         km = self.keyboard_modes[''].keymap
         self.keyboard_modes[''].keymap = km = km.copy()
@@ -115,6 +117,29 @@ def push_keyboard_mode(self, new_mode: str) -> None:
         mode = self.keyboard_modes[new_mode]
         self._push_keyboard_mode(mode)
 
+    def window_matches(self, w: 'Window', expr: str) -> bool:
+        # The match expressions are compiled once into predicates that check
+        # only the specified window, so the cost does not depend on the
+        # number of windows
+        m = self.window_matchers.get(expr)
+        if m is None:
+            m = self.window_matchers[expr] = self.compile_window_matcher(expr)
+        return m(w)
+
+    def sequence_keymap(self, final_actions: list[KeyDefinition]) -> KeyMap:
+        # The keymaps for the remaining keys of multi-key sequences form a
+        # trie that is built lazily as sequences are typed and re-used until
+        # the keymap changes
+        key = tuple(map(id, final_actions))
+        x = self.sequence_keymaps.get(key)
+        if x is None:
+            km: KeyMap = {}
+            for fa in final_actions:
+                km.setdefault(fa.rest[0], []).append(fa.shift_sequence_and_copy())
+            # keep references to final_actions so that their ids remain valid
+            self.sequence_keymaps[key] = x = tuple(final_actions), km
+        return x[1]
+
     def matching_key_actions(self, candidates: Iterable[KeyDefinition]) -> list[KeyDefinition]:
         w = self.get_active_window()
         matches = []
@@ -123,7 +148,7 @@ def matching_key_actions(self, candidates: Iterable[KeyDefinition]) -> list[KeyD
             is_applicable = False
             if x.options.when_focus_on:
                 try:
-                    if w and w in self.match_windows(x.options.when_focus_on):
+                    if w and self.window_matches(w, x.options.when_focus_on):
                         is_applicable = True
                 except Exception:
                     self.clear_keyboard_modes()
@@ -187,8 +212,7 @@ def dispatch_possible_special_key(self, ev: KeyEvent) -> bool:
                         sm = KeyboardMode('__sequence__')
                         sm.on_action = 'end'
                         sm.sequence_keys = [ev]
-                        for fa in final_actions:
-                            sm.keymap[fa.rest[0]].append(fa.shift_sequence_and_copy())
+                        sm.keymap = self.sequence_keymap(final_actions)
                         self._push_keyboard_mode(sm)
                         self.debug_print('\n\x1b[35mKeyPress\x1b[m matched sequence prefix, ', end='')
                     else:
@@ -202,9 +226,7 @@ def dispatch_possible_special_key(self, ev: KeyEvent) -> bool:
                             return consumed
                         mode.sequence_keys.append(ev)
                         self.debug_print('\n\x1b[35mKeyPress\x1b[m matched sequence prefix, ', end='')
-                        mode.keymap.clear()
-                        for fa in final_actions:
-                            mode.keymap[fa.rest[0]].append(fa.shift_sequence_and_copy())
+                        mode.keymap = self.sequence_keymap(final_actions)
                     return True
                 final_action = final_actions[0]
                 consumed = self.combine(final_action.definition)
@@ -221,8 +243,8 @@ def dispatch_possible_special_key(self, ev: KeyEvent) -> bool:
     def get_active_window(self) -> Optional['Window']:
         return get_boss().active_window
 
-    def match_windows(self, expr: str) -> Iterator['Window']:
-        return get_boss().match_windows(expr)
+    def compile_window_matcher(self, expr: str) -> Callable[['Window'], bool]:
+        return get_boss().window_matcher(expr)
 
     def show_error(self, title: str, msg: str) -> None:
         return get_boss().show_error(title, msg)
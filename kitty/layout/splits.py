@@ -8,7 +8,7 @@
 from kitty.typing import EdgeLiteral, WindowType
 from kitty.window_list import WindowGroup, WindowList
 
-from .base import BorderLine, Layout, LayoutOpts, NeighborsMap, blank_rects_for_window, lgd, window_geometry_from_layouts
+from .base import BorderLine, Layout, LayoutOpts, NeighborsMap, Rect, blank_rects_for_window, lgd, window_geometry_from_layouts
 
 
 class Extent(NamedTuple):
@@ -26,6 +26,14 @@ def __init__(self, horizontal: bool = True):
         self.top = self.left = self.width = self.height = 0
         self.between_borders: List[Edges] = []
         self.first_extent = self.second_extent = Extent()
+        # State used to skip laying out subtrees that have not changed since
+        # they were last laid out, see update_layout_state()
+        self.state_key: Tuple[Any, ...] = ()
+        self.layout_key: Tuple[Any, ...] = ()
+        self.subtree_changed = True
+        self.border = 0
+        self.min_width = self.min_height = 0
+        self.blank_rects: List[Rect] = []
 
     def __repr__(self) -> str:
         return 'Pair(horizontal={}, bias={:.2f}, one={}, two={}, between_borders={})'.format(
@@ -159,10 +167,12 @@ def apply_window_geometry(
         self, window_id: int,
         window_geometry: WindowGeometry,
         id_window_map: Dict[int, WindowGroup],
-        layout_object: Layout
+        layout_object: 'Splits'
     ) -> None:
         wg = id_window_map[window_id]
-        wg.set_geometry(window_geometry)
+        if not all(w.geometry == window_geometry for w in wg):
+            wg.set_geometry(window_geometry)
+        layout_object.group_geometries[window_id] = window_geometry
         layout_object.blank_rects.extend(blank_rects_for_window(window_geometry))
 
     def effective_border(self, id_window_map: Dict[int, WindowGroup]) -> int:
@@ -200,15 +210,74 @@ def minimum_height(self, id_window_map: Dict[int, WindowGroup]) -> int:
             ans += lgd.cell_height
         return ans
 
+    def update_layout_state(
+        self, id_window_map: Dict[int, WindowGroup], group_keys: Dict[int, Tuple[Any, ...]], stale_group_ids: Collection[int]
+    ) -> bool:
+        '''
+        Compute the minimum size of this pair and whether anything in its
+        subtree has changed since it was last laid out, in a single pass over
+        the subtree. Returns True if the subtree has changed.
+        '''
+        changed = False
+        border = -1
+        child_keys: List[Any] = []
+        for q in (self.one, self.two):
+            if isinstance(q, Pair):
+                if q.update_layout_state(id_window_map, group_keys, stale_group_ids):
+                    changed = True
+                if border < 0:
+                    border = q.border
+                child_keys.append(None)
+            elif q is not None:
+                if q in stale_group_ids:
+                    changed = True
+                if border < 0:
+                    border = id_window_map[q].effective_border()
+                child_keys.append(group_keys[q])
+            else:
+                child_keys.append(None)
+        self.border = max(0, border)
+        bw = self.border if lgd.draw_minimal_borders else 0
+        self.min_width, self.min_height = lgd.cell_width, lgd.cell_height
+        if not self.is_redundant:
+            if self.horizontal:
+                self.min_width = 2 * bw + sum(q.min_width if isinstance(q, Pair) else lgd.cell_width for q in (self.one, self.two))
+            else:
+                self.min_height = 2 * bw + sum(q.min_height if isinstance(q, Pair) else lgd.cell_height for q in (self.one, self.two))
+        state_key = (self.horizontal, self.bias, self.border, self.one, self.two, *child_keys)
+        if state_key != self.state_key:
+            self.state_key = state_key
+            changed = True
+        if changed:
+            self.subtree_changed = True
+        return changed
+
     def layout_pair(
         self,
         left: int, top: int, width: int, height: int,
         id_window_map: Dict[int, WindowGroup],
-        layout_object: Layout
+        layout_object: 'Splits'
+    ) -> None:
+        layout_key = (left, top, width, height, lgd.cell_width, lgd.cell_height, lgd.draw_minimal_borders, lgd.alignment_x, lgd.alignment_y)
+        if not self.subtree_changed and layout_key == self.layout_key:
+            # The windows in this subtree already have the right geometry
+            layout_object.blank_rects.extend(self.blank_rects)
+            return
+        start = len(layout_object.blank_rects)
+        self.do_layout_pair(left, top, width, height, id_window_map, layout_object)
+        self.layout_key = layout_key
+        self.subtree_changed = False
+        self.blank_rects = layout_object.blank_rects[start:]
+
+    def do_layout_pair(
+        self,
+        left: int, top: int, width: int, height: int,
+        id_window_map: Dict[int, WindowGroup],
+        layout_object: 'Splits'
     ) -> None:
         self.between_borders = []
         self.left, self.top, self.width, self.height = left, top, width, height
-        bw = self.effective_border(id_window_map) if lgd.draw_minimal_borders else 0
+        bw = self.border if lgd.draw_minimal_borders else 0
         border_mult = 0 if lgd.draw_minimal_borders else 1
         bw2 = bw * 2
         self.first_extent = self.second_extent = Extent()
@@ -226,8 +295,8 @@ def layout_pair(
             self.apply_window_geometry(q, geom, id_window_map, layout_object)
             return
         if self.horizontal:
-            min_w1 = self.one.minimum_width(id_window_map) if isinstance(self.one, Pair) else lgd.cell_width
-            min_w2 = self.two.minimum_width(id_window_map) if isinstance(self.two, Pair) else lgd.cell_width
+            min_w1 = self.one.min_width if isinstance(self.one, Pair) else lgd.cell_width
+            min_w2 = self.two.min_width if isinstance(self.two, Pair) else lgd.cell_width
             w1 = max(min_w1, int(self.bias * width) - bw)
             w2 = width - w1 - bw2
             if w2 < min_w2 and w1 >= min_w1 + bw2:
@@ -257,8 +326,8 @@ def layout_pair(
                 geom = window_geometry_from_layouts(xl, yl)
                 self.apply_window_geometry(self.two, geom, id_window_map, layout_object)
         else:
-            min_h1 = self.one.minimum_height(id_window_map) if isinstance(self.one, Pair) else lgd.cell_height
-            min_h2 = self.two.minimum_height(id_window_map) if isinstance(self.two, Pair) else lgd.cell_height
+            min_h1 = self.one.min_height if isinstance(self.one, Pair) else lgd.cell_height
+            min_h2 = self.two.min_height if isinstance(self.two, Pair) else lgd.cell_height
             h1 = max(min_h1, int(self.bias * height) - bw)
             h2 = height - h1 - bw2
             if h2 < min_h2 and h1 >= min_h1 + bw2:
@@ -297,7 +366,7 @@ def modify_size_of_child(self, which: int, increment: float, is_horizontal: bool
                 self.bias = new_bias
                 return True
             return False
-        parent = self.parent(layout_object.pairs_root)
+        parent = layout_object.parent_of(self)
         if parent is not None:
             which = 1 if parent.one is self else 2
             return parent.modify_size_of_child(which, increment, is_horizontal, layout_object)
@@ -310,7 +379,7 @@ def borders_for_window(self, layout_object: 'Splits', window_id: int) -> Generat
         q = self
         found_same_direction = found_transverse1 = found_transverse2 = False
         while not (found_same_direction and found_transverse1 and found_transverse2):
-            parent = q.parent(layout_object.pairs_root)
+            parent = layout_object.parent_of(q)
             if parent is None:
                 break
             q = parent
@@ -389,7 +458,7 @@ def edges(g: WindowGeometry) -> Tuple[int, int]:
 
         child = self
         while True:
-            parent = child.parent(layout_object.pairs_root)
+            parent = layout_object.parent_of(child)
             if parent is None:
                 break
             other = parent.two if child is parent.one else parent.one
@@ -438,6 +507,13 @@ class Splits(Layout):
     layout_opts = SplitsLayoutOpts({})
     no_minimal_window_borders = True
 
+    def __init__(self, os_window_id: int, tab_id: int, layout_opts: str = '') -> None:
+        # The geometry last given to each window group by this layout
+        self.group_geometries: Dict[int, WindowGeometry] = {}
+        self.neighbors_cache: Dict[int, NeighborsMap] = {}
+        self._tree_index: Optional[Tuple[Dict[Pair, Pair], Dict[int, Pair]]] = None
+        super().__init__(os_window_id, tab_id, layout_opts)
+
     @property
     def default_axis_is_horizontal(self) -> bool:
         return self.layout_opts.default_axis_is_horizontal
@@ -452,6 +528,32 @@ def pairs_root(self) -> Pair:
     @pairs_root.setter
     def pairs_root(self, root: Pair) -> None:
         self._pairs_root = root
+        self.tree_changed()
+
+    def tree_changed(self) -> None:
+        self._tree_index = None
+        self.neighbors_cache.clear()
+
+    @property
+    def tree_index(self) -> Tuple[Dict[Pair, Pair], Dict[int, Pair]]:
+        ' Maps of pair to parent pair and window group id to pair, built once per change to the tree '
+        if self._tree_index is None:
+            parents: Dict[Pair, Pair] = {}
+            window_pairs: Dict[int, Pair] = {}
+            for pair in self.pairs_root.self_and_descendants():
+                for q in (pair.one, pair.two):
+                    if isinstance(q, Pair):
+                        parents[q] = pair
+                    elif q is not None:
+                        window_pairs[q] = pair
+            self._tree_index = parents, window_pairs
+        return self._tree_index
+
+    def parent_of(self, pair: Pair) -> Optional[Pair]:
+        return self.tree_index[0].get(pair)
+
+    def pair_for_window(self, window_id: int) -> Optional[Pair]:
+        return self.tree_index[1].get(window_id)
 
     def remove_windows(self, *windows_to_remove: int) -> None:
         root = self.pairs_root
@@ -462,6 +564,9 @@ def remove_windows(self, *windows_to_remove: int) -> None:
             q = root.one or root.two
             if isinstance(q, Pair):
                 self.pairs_root = q
+        for wid in windows_to_remove:
+            self.group_geometries.pop(wid, None)
+        self.tree_changed()
 
     def do_layout(self, all_windows: WindowList) -> None:
         groups = tuple(all_windows.iter_all_layoutable_groups())
@@ -478,10 +583,19 @@ def do_layout(self, all_windows: WindowList) -> None:
         if windows_to_add:
             for wid in sorted(windows_to_add, key=id_idx_map.__getitem__):
                 root.balanced_add(wid)
+        # Neighbors depend on the geometry of windows, so are recomputed after every layout
+        self.tree_changed()
 
         if window_count == 1:
             self.layout_single_window_group(groups[0])
         else:
+            # Only the subtrees whose windows, biases or position have changed are laid out again
+            border_mult = 0 if lgd.draw_minimal_borders else 1
+            group_keys = {
+                wg.id: (tuple(w.id for w in wg), tuple(wg.decoration(e, border_mult=border_mult) for e in ('left', 'top', 'right', 'bottom')))
+                for wg in groups}
+            stale_group_ids = {wg.id for wg in groups if wg.geometry != self.group_geometries.get(wg.id)}
+            root.update_layout_state(id_window_map, group_keys, stale_group_ids)
             root.layout_pair(lgd.central.left, lgd.central.top, lgd.central.width, lgd.central.height, id_window_map, self)
 
     def add_non_overlay_window(
@@ -506,7 +620,7 @@ def add_non_overlay_window(
             ag = all_windows.active_group
             assert ag is not None
             group_id = ag.id
-            pair = self.pairs_root.pair_for_window(group_id)
+            pair = self.pair_for_window(group_id)
             if pair is not None:
                 if location == 'split':
                     wwidth = aw.geometry.right - aw.geometry.left
@@ -514,11 +628,13 @@ def add_non_overlay_window(
                     horizontal = wwidth >= wheight
                 target_group = all_windows.add_window(window, next_to=aw, before=not after)
                 parent_pair = pair.split_and_add(group_id, target_group.id, horizontal, after)
+                self.tree_changed()
                 if bias is not None:
                     parent_pair.bias = bias if parent_pair.one == target_group.id else (1 - bias)
                 return
         all_windows.add_window(window)
         p = self.pairs_root.balanced_add(window.id)
+        self.tree_changed()
         if bias is not None:
             p.bias = bias
 
@@ -532,7 +648,7 @@ def modify_size_of_window(
         grp = all_windows.group_for_window(window_id)
         if grp is None:
             return False
-        pair = self.pairs_root.pair_for_window(grp.id)
+        pair = self.pair_for_window(grp.id)
         if pair is None:
             return False
         which = 1 if pair.one == grp.id else 2
@@ -556,7 +672,7 @@ def minimal_borders(self, all_windows: WindowList) -> Generator[BorderLine, None
         active_group_id = -1 if ag is None else ag.id
         for grp_id, needs_borders in needs_borders_map.items():
             if needs_borders:
-                qpair = self.pairs_root.pair_for_window(grp_id)
+                qpair = self.pair_for_window(grp_id)
                 if qpair is not None:
                     color = BorderColor.active if grp_id is active_group_id else BorderColor.bell
                     for edges in qpair.borders_for_window(self, grp_id):
@@ -565,10 +681,13 @@ def minimal_borders(self, all_windows: WindowList) -> Generator[BorderLine, None
     def neighbors_for_window(self, window: WindowType, all_windows: WindowList) -> NeighborsMap:
         wg = all_windows.group_for_window(window)
         assert wg is not None
-        pair = self.pairs_root.pair_for_window(wg.id)
-        ans: NeighborsMap = {'left': [], 'right': [], 'top': [], 'bottom': []}
-        if pair is not None:
-            pair.neighbors_for_window(wg.id, ans, self, all_windows)
+        ans = self.neighbors_cache.get(wg.id)
+        if ans is None:
+            pair = self.pair_for_window(wg.id)
+            ans = {'left': [], 'right': [], 'top': [], 'bottom': []}
+            if pair is not None:
+                pair.neighbors_for_window(wg.id, ans, self, all_windows)
+            self.neighbors_cache[wg.id] = ans
         return ans
 
     def move_window(self, all_windows: WindowList, delta: int = 1) -> bool:
@@ -580,6 +699,7 @@ def move_window(self, all_windows: WindowList, delta: int = 1) -> bool:
         after = all_windows.groups[before_idx]
         if moved and before.id != after.id:
             self.pairs_root.swap_windows(before.id, after.id)
+            self.tree_changed()
         return moved
 
     def move_window_to_group(self, all_windows: WindowList, group: int) -> bool:
@@ -591,6 +711,7 @@ def move_window_to_group(self, all_windows: WindowList, group: int) -> bool:
         after = all_windows.groups[before_idx]
         if moved and before.id != after.id:
             self.pairs_root.swap_windows(before.id, after.id)
+            self.tree_changed()
         return moved
 
     def layout_action(self, action_name: str, args: Sequence[str], all_windows: WindowList) -> Optional[bool]:
@@ -606,12 +727,13 @@ def layout_action(self, action_name: str, args: Sequence[str], all_windows: Wind
             swap = amt in (180, 270)
             wg = all_windows.active_group
             if wg is not None:
-                pair = self.pairs_root.pair_for_window(wg.id)
+                pair = self.pair_for_window(wg.id)
                 if pair is not None and not pair.is_redundant:
                     if rotate:
                         pair.horizontal = not pair.horizontal
                     if swap:
                         pair.one, pair.two = pair.two, pair.one
+                    self.tree_changed()
                     return True
         elif action_name == 'move_to_screen_edge':
             count = 0
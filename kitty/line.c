@@ -870,6 +870,77 @@ mark_text_in_line(PyObject *marker, Line *line) {
     Py_DECREF(text);
 }
 
+static void
+apply_mark_spans(Line *line, const unsigned int *spans, size_t num_spans) {
+    unsigned int match_pos = 0;
+    index_type x = 0;
+    for (size_t i = 0; i < num_spans && x < line->xnum; i++, spans += 3) {
+        const unsigned int l = spans[0], r = spans[1];
+        while (match_pos < l && x < line->xnum) apply_mark(line, 0, &x, &match_pos);
+        const uint16_t am = (spans[2] & MARK_MASK);
+        while (x < line->xnum && match_pos <= r) apply_mark(line, am, &x, &match_pos);
+    }
+    while(x < line->xnum) line->gpu_cells[x++].attrs.mark = 0;
+}
+
+static void
+clear_marks_in_lines(void *container, get_line_func get_line, index_type num) {
+    for (index_type y = 0; y < num; y++) {
+        Line *line = get_line(container, y);
+        for (index_type i = 0; i < line->xnum; i++)  line->gpu_cells[i].attrs.mark = 0;
+    }
+}
+
+void
+mark_text_in_lines(PyObject *marker, void *container, get_line_func get_line, index_type num, bool only_dirty) {
+    // Mark all lines in a single call to the marker, if it supports it, see
+    // Marker.mark_lines() in marks.py
+    if (!num) return;
+    if (!marker) { clear_marks_in_lines(container, get_line, num); return; }
+    RAII_PyObject(mark_lines, PyObject_GetAttrString(marker, "mark_lines"));
+    if (!mark_lines) {
+        PyErr_Clear();
+        for (index_type y = 0; y < num; y++) {
+            Line *line = get_line(container, y);
+            if (!only_dirty || line->attrs.has_dirty_text) mark_text_in_line(marker, line);
+        }
+        return;
+    }
+    RAII_PyObject(texts, PyList_New(num));
+    if (!texts) { PyErr_Clear(); return; }
+    bool has_dirty = false;
+    for (index_type y = 0; y < num; y++) {
+        Line *line = get_line(container, y);
+        PyObject *text;
+        if (!only_dirty || line->attrs.has_dirty_text) {
+            text = line_as_unicode(line, false);
+            if (!text) { PyErr_Clear(); return; }
+            has_dirty = true;
+        } else { text = Py_None; Py_INCREF(text); }
+        PyList_SET_ITEM(texts, y, text);
+    }
+    if (!has_dirty) return;
+    RAII_PyObject(result, PyObject_CallFunctionObjArgs(mark_lines, texts, NULL));
+    PyObject *spans, *offsets;
+    if (!result || !PyArg_ParseTuple(result, "OO", &spans, &offsets)) {
+        report_marker_error(marker);
+        clear_marks_in_lines(container, get_line, num);
+        return;
+    }
+    RAII_PY_BUFFER(sb); RAII_PY_BUFFER(ob);
+    if (PyObject_GetBuffer(spans, &sb, PyBUF_SIMPLE) != 0 || PyObject_GetBuffer(offsets, &ob, PyBUF_SIMPLE) != 0) {
+        report_marker_error(marker);
+        return;
+    }
+    const unsigned int *sp = sb.buf, *op = ob.buf;
+    const size_t num_spans = sb.len / (3 * sizeof(unsigned int)), num_offsets = ob.len / sizeof(unsigned int);
+    for (index_type y = 0; y < num && y + 1 < num_offsets; y++) {
+        if (PyList_GET_ITEM(texts, y) == Py_None) continue;
+        const size_t start = op[y], end = MIN(op[y + 1], num_spans);
+        apply_mark_spans(get_line(container, y), sp + 3 * start, start < end ? end - start : 0);
+    }
+}
+
 PyObject*
 as_text_generic(PyObject *args, void *container, get_line_func get_line, index_type lines, ANSIBuf *ansibuf, bool add_trailing_newline) {
 #define APPEND(x) { PyObject* retval = PyObject_CallFunctionObjArgs(callback, x, NULL); if (!retval) return NULL; Py_DECREF(retval); }
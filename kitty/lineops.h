@@ -131,6 +131,7 @@ void historybuf_set_line_has_image_placeholders(HistoryBuf *self, index_type y,
 void historybuf_refresh_sprite_positions(HistoryBuf *self);
 void historybuf_clear(HistoryBuf *self);
 void mark_text_in_line(PyObject *marker, Line *line);
+void mark_text_in_lines(PyObject *marker, void *container, get_line_func get_line, index_type num, bool only_dirty);
 bool line_has_mark(Line *, uint16_t mark);
 PyObject* as_text_generic(PyObject *args, void *container, get_line_func get_line, index_type lines, ANSIBuf *ansibuf, bool add_trailing_newline);
 bool colors_for_cell(Line *self, const ColorProfile *cp, index_type *x, color_type *fg, color_type *bg, bool *reversed);
@@ -5,7 +5,8 @@
 import os
 import shutil
 import sys
-from collections.abc import Generator, Sequence
+import time
+from collections.abc import Generator, Iterator, Sequence
 from contextlib import contextmanager, suppress
 from typing import Optional
 
@@ -80,12 +81,56 @@ def set_custom_ibeam_cursor() -> None:
         log_error(f'Failed to set custom beam cursor with error: {e}')
 
 
+class StartupTimings:
+
+    '''
+    The time spent in each phase of startup until the first frame is
+    rendered, printed by --debug-startup. The import phase is the time taken
+    to import this module, which imports almost everything startup needs.
+    '''
+
+    phase_names = 'import', 'config parse', 'font setup', 'shader compile', 'child spawn'
+
+    def __init__(self) -> None:
+        now = time.monotonic()
+        # set by the entry point just before it imports this module
+        self.start: float = getattr(sys, 'kitty_main_import_started_at', now)
+        self.phases = {'import': now - self.start}
+        self.first_frame_at = 0.
+        self.print_report = False
+
+    @contextmanager
+    def __call__(self, phase: str) -> Iterator[None]:
+        st = time.monotonic()
+        try:
+            yield
+        finally:
+            self.phases[phase] = self.phases.get(phase, 0) + time.monotonic() - st
+
+    def report(self) -> str:
+        total = self.first_frame_at - self.start
+        lines = [f'Time to first frame: {total * 1000:.1f} ms']
+        for name in self.phase_names:
+            lines.append(f'  {name + ":":16}{self.phases.get(name, 0) * 1000:8.1f} ms')
+        lines.append(f'  {"other:":16}{(total - sum(self.phases.values())) * 1000:8.1f} ms')
+        return '\n'.join(lines)
+
+    def on_first_frame(self) -> None:
+        self.first_frame_at = time.monotonic()
+        if self.print_report:
+            print(self.report(), file=sys.stderr, flush=True)
+
+
+startup_timings = StartupTimings()
+
+
 def load_all_shaders(semi_transparent: bool = False) -> None:
-    try:
-        load_shader_programs(semi_transparent)
-        load_borders_program()
-    except CompileError as err:
-        raise SystemExit(err)
+    with startup_timings('shader compile'):
+        try:
+            load_shader_programs(semi_transparent)
+            load_borders_program()
+        except CompileError as err:
+            raise SystemExit(err)
 
 
 def init_glfw_module(glfw_module: str, debug_keyboard: bool = False, debug_rendering: bool = False, wayland_enable_ime: bool = True) -> None:
@@ -225,12 +270,15 @@ def _run_app(opts: Options, args: CLIOptions, bad_lines: Sequence[BadLine] = (),
                     args.title or appname, args.name or args.cls or appname,
                     wincls, wstate, load_all_shaders, disallow_override_title=bool(args.title), layer_shell_config=run_app.layer_shell_config)
         boss = Boss(opts, args, cached_values, global_shortcuts, talk_fd)
-        boss.start(window_id, startup_sessions)
+        with startup_timings('child spawn'):
+            boss.start(window_id, startup_sessions)
         if args.debug_font_fallback:
             dump_font_debug()
         if bad_lines or boss.misc_config_errors:
             boss.show_bad_config_lines(bad_lines, boss.misc_config_errors)
             boss.misc_config_errors = []
+        startup_timings.print_report = args.debug_startup
+        boss.first_frame_callbacks.append(startup_timings.on_first_frame)
         try:
             boss.child_monitor.main_loop()
         finally:
@@ -249,7 +297,8 @@ def __call__(self, opts: Options, args: CLIOptions, bad_lines: Sequence[BadLine]
         set_scale(opts.box_drawing_scale)
         set_options(opts, is_wayland(), args.debug_rendering, args.debug_font_fallback)
         try:
-            set_font_family(opts, add_builtin_nerd_font=True)
+            with startup_timings('font setup'):
+                set_font_family(opts, add_builtin_nerd_font=True)
             _run_app(opts, args, bad_lines, talk_fd)
         finally:
             set_options(None)
@@ -492,7 +541,8 @@ def cleanup_si() -> None:
                         os.unlink(socket_path)
             atexit.register(cleanup_si)
     bad_lines: list[BadLine] = []
-    opts = create_opts(cli_opts, accumulate_bad_lines=bad_lines)
+    with startup_timings('config parse'):
+        opts = create_opts(cli_opts, accumulate_bad_lines=bad_lines)
     setup_environment(opts, cli_opts)
 
     # set_locale on macOS uses cocoa APIs when LANG is not set, so we have to
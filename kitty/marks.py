@@ -2,10 +2,11 @@
 # License: GPLv3 Copyright: 2020, Kovid Goyal <kovid at kovidgoyal.net>
 
 import re
-from collections.abc import Generator, Iterable, Sequence
+from array import array
+from collections.abc import Generator, Iterable, Iterator, Sequence
 from ctypes import POINTER, c_uint, c_void_p, cast
 from re import Pattern
-from typing import Callable, Union
+from typing import Callable, Optional, Union
 
 from .utils import resolve_custom_file
 
@@ -23,25 +24,70 @@ def get_output_variables(left_address: int, right_address: int, color_address: i
     )
 
 
-def marker_from_regex(expression: Union[str, 'Pattern[str]'], color: int, flags: int = re.UNICODE) -> MarkerFunc:
+class Marker:
+
+    '''
+    Wraps a function that finds the (start, end, color) spans to mark in a line of
+    text. kitty calls :meth:`mark_lines` with all the dirty lines of a screen at
+    once and gets back the spans as flat arrays, which is much cheaper than
+    resuming a generator for every match. The spans for each line are cached
+    keyed by the line text, so that unchanged lines are not re-marked.
+    '''
+
+    max_cache_size = 4096
+
+    def __init__(self, find_spans: Callable[[str], Iterable[tuple[int, int, int]]]):
+        self.find_spans = find_spans
+        self.cache: dict[str, 'array[int]'] = {}
+
+    def spans(self, text: str) -> 'array[int]':
+        ans = self.cache.get(text)
+        if ans is None:
+            ans = array('I')
+            for triple in self.find_spans(text):
+                ans.extend(triple)
+            if len(self.cache) >= self.max_cache_size:
+                del self.cache[next(iter(self.cache))]
+            self.cache[text] = ans
+        return ans
+
+    def mark_lines(self, lines: Sequence[Optional[str]]) -> tuple['array[int]', 'array[int]']:
+        '''
+        Return the spans for all lines as a flat array of (start, end, color)
+        triples and an array of offsets such that the triples for line i are
+        at offsets[i]:offsets[i+1]. Lines that are None are skipped.
+        '''
+        spans, offsets = array('I'), array('I', (0,))
+        for text in lines:
+            if text:
+                spans.extend(self.spans(text))
+            offsets.append(len(spans) // 3)
+        return spans, offsets
+
+    def __call__(self, text: str, left_address: int, right_address: int, color_address: int) -> Generator[None, None, None]:
+        # The per match protocol, used if the batch API is unavailable
+        left, right, colorv = get_output_variables(left_address, right_address, color_address)
+        s = self.spans(text)
+        for i in range(0, len(s), 3):
+            left.value, right.value, colorv.value = s[i], s[i+1], s[i+2]
+            yield
+
+
+def marker_from_regex(expression: Union[str, 'Pattern[str]'], color: int, flags: int = re.UNICODE) -> Marker:
     color = max(1, min(color, 3))
     if isinstance(expression, str):
         pat = re.compile(expression, flags=flags)
     else:
         pat = expression
 
-    def marker(text: str, left_address: int, right_address: int, color_address: int) -> Generator[None, None, None]:
-        left, right, colorv = get_output_variables(left_address, right_address, color_address)
-        colorv.value = color
+    def find_spans(text: str) -> Iterator[tuple[int, int, int]]:
         for match in pat.finditer(text):
-            left.value = match.start()
-            right.value = match.end() - 1
-            yield
+            yield match.start(), match.end() - 1, color
 
-    return marker
+    return Marker(find_spans)
 
 
-def marker_from_multiple_regex(regexes: Iterable[tuple[int, str]], flags: int = re.UNICODE) -> MarkerFunc:
+def marker_from_multiple_regex(regexes: Iterable[tuple[int, str]], flags: int = re.UNICODE) -> Marker:
     expr = ''
     color_map = {}
     for i, (color, spec) in enumerate(regexes):
@@ -50,36 +96,28 @@ def marker_from_multiple_regex(regexes: Iterable[tuple[int, str]], flags: int =
         color_map[grp] = color
     expr = expr[1:]
     pat = re.compile(expr, flags=flags)
+    # map group number to color so that no group name lookup is needed per match
+    colors = [0] * (pat.groups + 1)
+    for grp, idx in pat.groupindex.items():
+        if grp in color_map:
+            colors[idx] = color_map[grp]
 
-    def marker(text: str, left_address: int, right_address: int, color_address: int) -> Generator[None, None, None]:
-        left, right, color = get_output_variables(left_address, right_address, color_address)
+    def find_spans(text: str) -> Iterator[tuple[int, int, int]]:
         for match in pat.finditer(text):
-            left.value = match.start()
-            right.value = match.end() - 1
-            grp = match.lastgroup
-            color.value = color_map[grp] if grp is not None else 0
-            yield
+            yield match.start(), match.end() - 1, colors[match.lastindex or 0]
 
-    return marker
+    return Marker(find_spans)
 
 
-def marker_from_text(expression: str, color: int) -> MarkerFunc:
+def marker_from_text(expression: str, color: int) -> Marker:
     return marker_from_regex(re.escape(expression), color)
 
 
-def marker_from_function(func: Callable[[str], Iterable[tuple[int, int, int]]]) -> MarkerFunc:
-    def marker(text: str, left_address: int, right_address: int, color_address: int) -> Generator[None, None, None]:
-        left, right, colorv = get_output_variables(left_address, right_address, color_address)
-        for (ll, r, c) in func(text):
-            left.value = ll
-            right.value = r
-            colorv.value = c
-            yield
-
-    return marker
+def marker_from_function(func: Callable[[str], Iterable[tuple[int, int, int]]]) -> Marker:
+    return Marker(func)
 
 
-def marker_from_spec(ftype: str, spec: Union[str, Sequence[tuple[int, str]]], flags: int) -> MarkerFunc:
+def marker_from_spec(ftype: str, spec: Union[str, Sequence[tuple[int, str]]], flags: int) -> Marker:
     if ftype == 'regex':
         assert not isinstance(spec, str)
         if len(spec) == 1:
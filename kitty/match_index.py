@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+import re
+from bisect import bisect_left, insort
+from collections.abc import Iterator, Mapping
+from typing import Optional
+
+regex_special_chars = frozenset('.^$*+?{}[]\\|()')
+
+
+def literal_of(query: str) -> Optional[tuple[str, bool]]:
+    '''
+    Return (literal, is_exact) if the regular expression query only matches
+    strings that are equal to (is_exact) or start with literal, None otherwise.
+    '''
+    if not query.startswith('^'):
+        return None
+    is_exact = query.endswith('$') and not query.endswith('\\$')
+    lit = query[1:-1] if is_exact else query[1:]
+    if regex_special_chars.intersection(lit):
+        return None
+    return lit, is_exact
+
+
+class SortedStringIndex:
+
+    def __init__(self) -> None:
+        self.map: dict[str, set[int]] = {}
+        self.keys: list[str] = []
+
+    def add(self, key: str, item_id: int) -> None:
+        s = self.map.get(key)
+        if s is None:
+            self.map[key] = s = set()
+            insort(self.keys, key)
+        s.add(item_id)
+
+    def remove(self, key: str, item_id: int) -> None:
+        s = self.map.get(key)
+        if s is not None:
+            s.discard(item_id)
+            if not s:
+                del self.map[key]
+                del self.keys[bisect_left(self.keys, key)]
+
+    def with_prefix(self, prefix: str) -> Iterator[str]:
+        for i in range(bisect_left(self.keys, prefix), len(self.keys)):
+            k = self.keys[i]
+            if not k.startswith(prefix):
+                break
+            yield k
+
+    def matching(self, lit: str, is_exact: bool) -> set[int]:
+        if is_exact:
+            return set(self.map.get(lit, ()))
+        ans: set[int] = set()
+        for k in self.with_prefix(lit):
+            ans |= self.map[k]
+        return ans
+
+    def searching(self, pat: 're.Pattern[str]') -> set[int]:
+        ans: set[int] = set()
+        for k, ids in self.map.items():
+            if pat.search(k) is not None:
+                ans |= ids
+        return ans
+
+
+class WindowMatchIndex:
+
+    '''
+    Secondary indices of the cheaply tracked properties of windows used by
+    --match queries. They are updated when the windows report changes so that
+    queries on id, pid and exact or prefix queries on title and user variables
+    can be answered without looking at every window. :meth:`matches` returns
+    None for queries it cannot answer, callers must then fall back to scanning
+    all windows.
+    '''
+
+    def __init__(self) -> None:
+        self.titles: dict[int, str] = {}
+        self.title_index = SortedStringIndex()
+        self.pids: dict[int, int] = {}
+        self.user_vars: dict[int, dict[str, str]] = {}
+        self.var_index: dict[str, SortedStringIndex] = {}
+
+    def add_window(self, window_id: int, title: str, pid: Optional[int], user_vars: Mapping[str, str]) -> None:
+        self.remove_window(window_id)
+        self.titles[window_id] = title
+        self.title_index.add(title, window_id)
+        if pid is not None:
+            self.pids[pid] = window_id
+        self.user_vars[window_id] = {}
+        self.update_user_vars(window_id, user_vars)
+
+    def remove_window(self, window_id: int) -> None:
+        title = self.titles.pop(window_id, None)
+        if title is not None:
+            self.title_index.remove(title, window_id)
+        for pid in tuple(pid for pid, wid in self.pids.items() if wid == window_id):
+            del self.pids[pid]
+        for k, v in self.user_vars.pop(window_id, {}).items():
+            self._remove_var(window_id, k, v)
+
+    def update_title(self, window_id: int, title: str) -> None:
+        old = self.titles.get(window_id)
+        if old is None or old == title:
+            return
+        self.title_index.remove(old, window_id)
+        self.titles[window_id] = title
+        self.title_index.add(title, window_id)
+
+    def _remove_var(self, window_id: int, key: str, val: str) -> None:
+        idx = self.var_index.get(key)
+        if idx is not None:
+            idx.remove(val, window_id)
+            if not idx.map:
+                del self.var_index[key]
+
+    def update_user_vars(self, window_id: int, user_vars: Mapping[str, str]) -> None:
+        current = self.user_vars.get(window_id)
+        if current is None:
+            return
+        for k, v in tuple(current.items()):
+            if user_vars.get(k) != v:
+                self._remove_var(window_id, k, v)
+                del current[k]
+        for k, v in user_vars.items():
+            if k not in current:
+                current[k] = v
+                idx = self.var_index.get(k)
+                if idx is None:
+                    self.var_index[k] = idx = SortedStringIndex()
+                idx.add(v, window_id)
+
+    def matches(self, location: str, query: str) -> Optional[set[int]]:
+        if location in ('id', 'pid'):
+            try:
+                q = int(query)
+            except Exception:
+                return set()
+            if str(q) != query:
+                return set()
+            if location == 'id':
+                return {q} if q in self.titles else set()
+            wid = self.pids.get(q)
+            return set() if wid is None else {wid}
+        if location == 'title':
+            lq = literal_of(query)
+            return None if lq is None else self.title_index.matching(*lq)
+        if location == 'var':
+            kq, vq = query.partition('=')[::2]
+            lk = literal_of(kq)
+            if lk is None or not lk[1]:
+                return None
+            idx = self.var_index.get(lk[0])
+            if idx is None:
+                return set()
+            if not vq:
+                return idx.matching('', False)
+            lv = literal_of(vq)
+            if lv is None:
+                try:
+                    return idx.searching(re.compile(vq))
+                except re.error:
+                    return None
+            return idx.matching(*lv)
+        return None
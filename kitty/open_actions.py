@@ -2,13 +2,15 @@
 # License: GPLv3 Copyright: 2020, Kovid Goyal <kovid at kovidgoyal.net>
 
 
+import fnmatch
 import os
 import posixpath
+import re
 import shlex
 from collections.abc import Iterable, Iterator
 from contextlib import suppress
-from typing import Any, NamedTuple, Optional, cast
-from urllib.parse import ParseResult, unquote, urlparse
+from typing import Any, Callable, NamedTuple, Optional, Union, cast
+from urllib.parse import unquote, urlparse
 
 from .conf.utils import KeyAction, to_cmdline_implementation
 from .constants import config_dir
@@ -81,89 +83,193 @@ def parse(lines: Iterable[str]) -> Iterator[OpenAction]:
             yield OpenAction(mc, tuple(actions))
 
 
-def url_matches_criterion(purl: 'ParseResult', url: str, unquoted_path: str, mc: MatchCriteria) -> bool:
-    if mc.type == 'url':
-        import re
-        try:
-            pat = re.compile(mc.value)
-        except re.error:
-            return False
-        return pat.search(unquote(url)) is not None
+class ParsedURL:
+
+    ' A URL parsed once, with the values needed by the match criteria computed lazily '
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.purl = urlparse(url)
+        self.path = unquote(self.purl.path)
+        self.protocol = (self.purl.scheme or 'file').lower()
+        self._unquoted_url: Optional[str] = None
+        self._extensions: Optional[frozenset[str]] = None
+        self._mime_guessed = False
+        self._mime: Optional[str] = None
+
+    @property
+    def unquoted_url(self) -> str:
+        if self._unquoted_url is None:
+            self._unquoted_url = unquote(self.url)
+        return self._unquoted_url
+
+    @property
+    def extensions(self) -> frozenset[str]:
+        ' Everything after every period in the path, so that path.endswith(f".{ext}") if and only if ext is in extensions '
+        if self._extensions is None:
+            path = self.path.lower()
+            ans = set()
+            idx = path.find('.')
+            while idx > -1:
+                ans.add(path[idx+1:])
+                idx = path.find('.', idx + 1)
+            self._extensions = frozenset(ans)
+        return self._extensions
+
+    @property
+    def mime(self) -> Optional[str]:
+        # guess_type() can access the filesystem so do it at most once per URL
+        if not self._mime_guessed:
+            self._mime_guessed = True
+            mt = guess_type(self.path, allow_filesystem_access=self.purl.scheme in ('', 'file'))
+            self._mime = mt.lower() if mt else None
+        return self._mime
+
+
+Predicate = Callable[[ParsedURL], bool]
+
+
+def never_matches(u: ParsedURL) -> bool:
+    return False
+
+
+def compile_regex(pat: str) -> 'Optional[re.Pattern[str]]':
+    try:
+        return re.compile(pat)
+    except re.error:
+        return None
+
+
+def compile_globs(globs: Iterable[str]) -> 'Optional[re.Pattern[str]]':
+    ' A single regex that matches if any of the shell glob patterns match, as fnmatchcase() does '
+    try:
+        return re.compile('|'.join(f'(?:{fnmatch.translate(g)})' for g in globs))
+    except re.error:
+        return None
+
+
+def split_values(val: str) -> frozenset[str]:
+    return frozenset(x.strip() for x in val.split(','))
+
+
+def compile_criterion(mc: MatchCriteria) -> Predicate:
+    if mc.type == 'url' or mc.type == 'fragment_matches':
+        pat = compile_regex(mc.value)
+        if pat is None:
+            return never_matches
+        if mc.type == 'url':
+            return lambda u: pat.search(u.unquoted_url) is not None
+        return lambda u: pat.search(unquote(u.purl.fragment)) is not None
 
     if mc.type == 'mime':
-        import fnmatch
-        mt = guess_type(unquoted_path, allow_filesystem_access=purl.scheme in ('', 'file'))
-        if not mt:
-            return False
-        mt = mt.lower()
-        for mpat in mc.value.split(','):
-            mpat = mpat.strip()
-            with suppress(Exception):
-                if fnmatch.fnmatchcase(mt, mpat):
-                    return True
-        return False
+        mpat = compile_globs(x.strip() for x in mc.value.split(','))
+        if mpat is None:
+            return never_matches
+
+        def mime_matches(u: ParsedURL) -> bool:
+            mt = u.mime
+            return mt is not None and mpat.match(mt) is not None
+        return mime_matches
 
     if mc.type == 'ext':
-        if not purl.path:
-            return False
-        path = unquoted_path.lower()
-        for ext in mc.value.split(','):
-            ext = ext.strip()
-            if path.endswith(f'.{ext}'):
-                return True
-        return False
+        exts = split_values(mc.value)
+        return lambda u: bool(u.purl.path) and not exts.isdisjoint(u.extensions)
 
     if mc.type == 'protocol':
-        protocol = (purl.scheme or 'file').lower()
-        for key in mc.value.split(','):
-            if key.strip() == protocol:
-                return True
-        return False
-
-    if mc.type == 'fragment_matches':
-        import re
-        try:
-            pat = re.compile(mc.value)
-        except re.error:
-            return False
-
-        return pat.search(unquote(purl.fragment)) is not None
-
-    if mc.type == 'path':
-        import fnmatch
-        try:
-            return fnmatch.fnmatchcase(unquoted_path.lower(), mc.value)
-        except Exception:
-            return False
-
-    if mc.type == 'file':
-        import fnmatch
-        try:
-            fname = posixpath.basename(unquoted_path)
-        except Exception:
-            return False
-        try:
-            return fnmatch.fnmatchcase(fname.lower(), mc.value)
-        except Exception:
-            return False
-
-
-def url_matches_criteria(purl: 'ParseResult', url: str, unquoted_path: str, criteria: Iterable[MatchCriteria]) -> bool:
-    for x in criteria:
-        try:
-            if not url_matches_criterion(purl, url, unquoted_path, x):
-                return False
-        except Exception:
-            return False
-    return True
-
-
-def actions_for_url_from_list(url: str, actions: Iterable[OpenAction]) -> Iterator[KeyAction]:
+        protocols = split_values(mc.value)
+        return lambda u: u.protocol in protocols
+
+    if mc.type == 'path' or mc.type == 'file':
+        gpat = compile_globs((mc.value,))
+        if gpat is None:
+            return never_matches
+        if mc.type == 'path':
+            return lambda u: gpat.match(u.path.lower()) is not None
+        return lambda u: gpat.match(posixpath.basename(u.path).lower()) is not None
+
+
+class ActionMatcher:
+
+    '''
+    A list of open actions compiled for matching against many URLs. The
+    criteria of every rule are compiled once. Rules are indexed, as bitmasks,
+    by their protocol and ext criteria, so that only the rules that can
+    possibly match a URL are checked. The url criteria of all rules are
+    combined into a single regex, when it does not match, none of the rules
+    with url criteria need be checked. As when checking the rules in order,
+    the first matching rule wins.
+    '''
+
+    def __init__(self, actions: Iterable[OpenAction]) -> None:
+        self.actions = tuple(actions)
+        self.rules: list[tuple[Predicate, ...]] = []
+        self.by_protocol: dict[str, int] = {}
+        self.any_protocol = 0
+        self.by_ext: dict[str, int] = {}
+        self.any_ext = 0
+        self.url_rules = 0
+        url_patterns = []
+        for i, action in enumerate(self.actions):
+            bit = 1 << i
+            self.rules.append(tuple(map(compile_criterion, action.match_criteria)))
+            for ctype, index in (('protocol', self.by_protocol), ('ext', self.by_ext)):
+                values = next((split_values(mc.value) for mc in action.match_criteria if mc.type == ctype), None)
+                if values is None:
+                    if ctype == 'protocol':
+                        self.any_protocol |= bit
+                    else:
+                        self.any_ext |= bit
+                else:
+                    for v in values:
+                        index[v] = index.get(v, 0) | bit
+            for mc in action.match_criteria:
+                # Patterns with groups are not combined as that would change the numbering of backreferences
+                if mc.type == 'url' and (pat := compile_regex(mc.value)) is not None and not pat.groups:
+                    url_patterns.append(mc.value)
+                    self.url_rules |= bit
+                    break
+        self.any_url = compile_regex('|'.join(f'(?:{x})' for x in url_patterns)) if url_patterns else None
+        if self.any_url is None:
+            self.url_rules = 0
+
+    def candidates(self, u: ParsedURL) -> int:
+        ans = self.by_protocol.get(u.protocol, 0) | self.any_protocol
+        if ~self.any_ext & ans:
+            ext_mask = self.any_ext
+            if u.purl.path:
+                for e in u.extensions:
+                    ext_mask |= self.by_ext.get(e, 0)
+            ans &= ext_mask
+        if ans & self.url_rules and self.any_url is not None and self.any_url.search(u.unquoted_url) is None:
+            ans &= ~self.url_rules
+        return ans
+
+    def match(self, u: ParsedURL) -> Optional[OpenAction]:
+        ' Return the first action all of whose criteria match the URL '
+        mask = self.candidates(u)
+        while mask:
+            low = mask & -mask
+            mask ^= low
+            i = low.bit_length() - 1
+            with suppress(Exception):
+                if all(p(u) for p in self.rules[i]):
+                    return self.actions[i]
+        return None
+
+
+def actions_for_url_from_matchers(url: str, *matchers: ActionMatcher) -> Iterator[KeyAction]:
+    ' Yield the actions of the first rule matching url, from the first of the matchers that has one '
     try:
-        purl = urlparse(url)
+        u = ParsedURL(url)
     except Exception:
         return
-    path = unquote(purl.path)
+    for m in matchers:
+        action = m.match(u)
+        if action is not None:
+            break
+    else:
+        return
+    purl, path = u.purl, u.path
     up = purl.path
     netloc = unquote(purl.netloc) if purl.netloc else ''
     if purl.query:
@@ -192,35 +298,36 @@ def expand(x: Any) -> Any:
             return ans
         return x
 
-    for action in actions:
-        if url_matches_criteria(purl, url, path, action.match_criteria):
-            for ac in action.actions:
-                yield ac._replace(args=tuple(map(expand, ac.args)))
-            return
+    for ac in action.actions:
+        yield ac._replace(args=tuple(map(expand, ac.args)))
 
 
-actions_cache: dict[str, tuple[os.stat_result, tuple[OpenAction, ...]]] = {}
+def actions_for_url_from_list(url: str, actions: Union[ActionMatcher, Iterable[OpenAction]]) -> Iterator[KeyAction]:
+    return actions_for_url_from_matchers(url, actions if isinstance(actions, ActionMatcher) else ActionMatcher(actions))
 
 
-def load_actions_from_path(path: str) -> tuple[OpenAction, ...]:
+actions_cache: dict[str, tuple[tuple[int, int, int], ActionMatcher]] = {}
+
+
+def load_actions_from_path(path: str) -> ActionMatcher:
     try:
         st = os.stat(path)
     except OSError:
-        return ()
+        return ActionMatcher(())
+    key = st.st_mtime_ns, st.st_size, st.st_ino
     x = actions_cache.get(path)
-    if x is None or x[0].st_mtime != st.st_mtime:
+    if x is None or x[0] != key:
+        # Only re-compile when the file changes
         with open(path) as f:
-            actions_cache[path] = st, tuple(parse(f))
-    else:
-        return x[1]
-    return actions_cache[path][1]
+            actions_cache[path] = x = key, ActionMatcher(parse(f))
+    return x[1]
 
 
-def load_open_actions() -> tuple[OpenAction, ...]:
+def load_open_actions() -> ActionMatcher:
     return load_actions_from_path(os.path.join(config_dir, 'open-actions.conf'))
 
 
-def load_launch_actions() -> tuple[OpenAction, ...]:
+def load_launch_actions() -> ActionMatcher:
     return load_actions_from_path(os.path.join(config_dir, 'launch-actions.conf'))
 
 
@@ -229,8 +336,8 @@ def clear_caches() -> None:
 
 
 @run_once
-def default_open_actions() -> tuple[OpenAction, ...]:
-    return tuple(parse('''\
+def default_open_actions() -> ActionMatcher:
+    return ActionMatcher(parse('''\
 # Open kitty HTML docs links
 protocol kitty+doc
 action show_kitty_doc $URL_PATH
@@ -238,8 +345,8 @@ def default_open_actions() -> tuple[OpenAction, ...]:
 
 
 @run_once
-def default_launch_actions() -> tuple[OpenAction, ...]:
-    return tuple(parse('''\
+def default_launch_actions() -> ActionMatcher:
+    return ActionMatcher(parse('''\
 # Open script files
 protocol file
 ext sh,command,tool
@@ -280,22 +387,12 @@ def actions_for_url(url: str, actions_spec: Optional[str] = None) -> Iterator[Ke
     if actions_spec is None:
         actions = load_open_actions()
     else:
-        actions = tuple(parse(actions_spec.splitlines()))
-    found = False
-    for action in actions_for_url_from_list(url, actions):
-        found = True
-        yield action
-    if not found:
-        yield from actions_for_url_from_list(url, default_open_actions())
+        actions = ActionMatcher(parse(actions_spec.splitlines()))
+    yield from actions_for_url_from_matchers(url, actions, default_open_actions())
 
 
 def actions_for_launch(url: str) -> Iterator[KeyAction]:
     # Custom launch actions using kitty URL scheme needs to be prefixed with `kitty:///launch/`
     if url.startswith('kitty://') and not url.startswith('kitty:///launch/'):
         return
-    found = False
-    for action in actions_for_url_from_list(url, load_launch_actions()):
-        found = True
-        yield action
-    if not found:
-        yield from actions_for_url_from_list(url, default_launch_actions())
+    yield from actions_for_url_from_matchers(url, load_launch_actions(), default_launch_actions())
@@ -1194,7 +1194,11 @@
 resizing. On such systems the first number is ignored and redraw is immediate
 after end of resize. On other systems only the first number is used so that kitty
 is "ready" quickly after the end of resizing, while not also continuously
-redrawing, to save energy.
+redrawing, to save energy. The first number is also used when kitty windows are
+resized in quick succession, for example, by repeatedly resizing a window in a
+layout. Then the program running in the window is told only the final size, once
+the size stops changing. Tabs that are not visible are re-laid out after the OS
+window has not been resized for this time, or when they become visible.
 '''
     )
 
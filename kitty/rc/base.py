@@ -174,16 +174,19 @@ class AsyncResponder:
 
     def __init__(self, payload_get: PayloadGetType, window: Optional[Window]) -> None:
         self.async_id: str = payload_get('async_id', missing='')
+        self.request_id: str = payload_get('request_id', missing='')
         self.peer_id: int = payload_get('peer_id', missing=0)
         self.window_id: int = getattr(window, 'id', 0)
 
     def send_data(self, data: Any) -> None:
         from kitty.remote_control import send_response_to_client
-        send_response_to_client(data=data, peer_id=self.peer_id, window_id=self.window_id, async_id=self.async_id)
+        send_response_to_client(
+            data=data, peer_id=self.peer_id, window_id=self.window_id, async_id=self.async_id, request_id=self.request_id)
 
     def send_error(self, error: str) -> None:
         from kitty.remote_control import send_response_to_client
-        send_response_to_client(error=error, peer_id=self.peer_id, window_id=self.window_id, async_id=self.async_id)
+        send_response_to_client(
+            error=error, peer_id=self.peer_id, window_id=self.window_id, async_id=self.async_id, request_id=self.request_id)
 
 
 @dataclass(frozen=True)
@@ -330,6 +333,8 @@ class RemoteCommand:
     string_return_is_error: bool = False
     defaults: Optional[Dict[str, Any]] = None
     is_asynchronous: bool = False
+    # Asynchronous commands that respond synchronously when no async_id is given
+    can_respond_synchronously: bool = False
     options_class: Type[RCOptions] = RCOptions
     protocol_spec: str = ''
     argspec = args_count = args_completion = ArgsHandling()
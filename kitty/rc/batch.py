@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+import json
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from .base import ArgsType, Boss, PayloadGetType, PayloadType, RCOptions, RemoteCommand, ResponseType, Window, command_for_name
+
+if TYPE_CHECKING:
+    from kitty.boss import RCResponse
+    from kitty.cli_stub import BatchRCOptions as CLIOptions
+
+
+class Batch(RemoteCommand):
+
+    protocol_spec = __doc__ = '''
+    commands+/list.str: The commands to run, each a JSON object with the keys :code:`cmd` and :code:`payload`
+    stop_on_error/bool: Boolean indicating whether to stop at the first command that fails
+    '''
+
+    short_desc = 'Run multiple commands at once'
+    desc = (
+        'Run multiple remote control commands in a single request. Each command is specified as a JSON object'
+        ' with the keys :code:`cmd`, the name of the command, and :code:`payload`, the payload of the command as'
+        ' documented in :doc:`rc_protocol`. For example::\n\n'
+        '    kitten @ batch \'{"cmd": "set-tab-title", "payload": {"title": "one"}}\' \'{"cmd": "ls"}\'\n\n'
+        'The commands are run in order, in a single iteration of the kitty event loop, and the result is a JSON'
+        ' list with the response of every command. Every command is subject to the same permission checks as'
+        ' when it is sent individually, except that commands that require the user to allow them are rejected.'
+        ' Commands that can only respond asynchronously and commands that stream data cannot be used in a batch.'
+    )
+    options_spec = '''\
+--stop-on-error
+type=bool-set
+Stop running commands after the first command that fails. Responses are returned only for the commands that were run.
+'''
+    args = RemoteCommand.Args(spec='COMMAND ...', json_field='commands', minimum_count=1)
+
+    def message_to_kitty(self, global_opts: RCOptions, opts: 'CLIOptions', args: ArgsType) -> PayloadType:
+        if not args:
+            self.fatal('Must specify at least one command')
+        return {'commands': args, 'stop_on_error': opts.stop_on_error}
+
+    def sub_command(self, parent: Dict[str, Any], spec: Any) -> Dict[str, Any]:
+        if isinstance(spec, str):
+            spec = json.loads(spec)
+        if not isinstance(spec, dict) or not isinstance(spec.get('cmd'), str):
+            raise ValueError('Commands in a batch must be JSON objects with a cmd key')
+        c = command_for_name(spec['cmd'])
+        if c is self:
+            raise ValueError('Batches cannot be nested')
+        if (c.is_asynchronous and not c.can_respond_synchronously) or c.reads_streaming_data:
+            raise ValueError(f'The {c.name or spec["cmd"]} command cannot be used in a batch')
+        ans = {k: v for k, v in parent.items() if k in ('version', 'password', 'kitty_window_id')}
+        ans['cmd'] = spec['cmd']
+        ans['payload'] = spec.get('payload') or {}
+        return ans
+
+    def run(self, pcmd: Dict[str, Any], execute: Callable[[Dict[str, Any]], 'RCResponse']) -> str:
+        from kitty.child import cached_process_data
+        payload = pcmd.get('payload') or {}
+        stop_on_error = bool(payload.get('stop_on_error'))
+        responses: List[Dict[str, Any]] = []
+        with cached_process_data():
+            for spec in payload.get('commands') or ():
+                try:
+                    response: Optional['RCResponse'] = execute(self.sub_command(pcmd, spec))
+                except Exception as err:
+                    response = {'ok': False, 'error': str(err)}
+                if not isinstance(response, dict):
+                    response = {'ok': True}
+                responses.append(response)
+                if stop_on_error and not response.get('ok'):
+                    break
+        return json.dumps(responses)
+
+    def response_from_kitty(self, boss: Boss, window: Optional[Window], payload_get: PayloadGetType) -> ResponseType:
+        # Only reached when run from within kitty, for example via a
+        # remote_control mapping, which needs no authorization. Batches sent
+        # over a socket or tty are handled by Boss which authorizes every command.
+        from kitty.constants import version
+        from kitty.remote_control import handle_cmd
+        pcmd = {'version': version, 'payload': {'commands': payload_get('commands'), 'stop_on_error': payload_get('stop_on_error')}}
+        return self.run(pcmd, lambda sub: handle_cmd(boss, window, sub, 0, window))
+
+
+batch = Batch()
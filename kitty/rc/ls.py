@@ -2,14 +2,45 @@
 # License: GPLv3 Copyright: 2020, Kovid Goyal <kovid at kovidgoyal.net>
 
 import json
-from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, FrozenSet, List, Optional
 
 from kitty.constants import appname
+from kitty.fast_data_types import add_timer
+from kitty.types import AsyncResponse
 
 from .base import MATCH_TAB_OPTION, MATCH_WINDOW_OPTION, ArgsType, Boss, PayloadGetType, PayloadType, RCOptions, RemoteCommand, ResponseType, Tab, Window
 
 if TYPE_CHECKING:
+    from kitty.boss import OSWindowDict
     from kitty.cli_stub import LSRCOptions as CLIOptions
+    from kitty.tabs import TabDict
+
+
+def strip_common_env_vars(data: List['OSWindowDict']) -> None:
+    all_env_blocks: List[Dict[str, str]] = []
+    for osw in data:
+        for tab in osw.get('tabs', ()):
+            for w in tab.get('windows', ()):
+                if 'env' in w:
+                    all_env_blocks.append(w['env'])
+    if len(all_env_blocks) < 2:
+        return
+    common = dict(all_env_blocks[0])
+    for env in all_env_blocks[1:]:
+        for k in tuple(k for k, v in common.items() if k not in env or env[k] != v):
+            del common[k]
+        if not common:
+            return
+    for env in all_env_blocks:
+        for k in common:
+            env.pop(k, None)
+
+
+def project_fields(data: List['OSWindowDict'], fields: FrozenSet[str]) -> List[Dict[str, Any]]:
+    def p(d: Any, child_key: str = '') -> Dict[str, Any]:
+        return {k: v for k, v in d.items() if k in fields or k == 'id' or k == child_key}
+    return [dict(p(osw, 'tabs'), tabs=[dict(p(tab, 'windows'), windows=[p(w) for w in tab['windows']]) for tab in osw['tabs']]) for osw in data]
 
 
 class LS(RemoteCommand):
@@ -18,6 +49,8 @@ class LS(RemoteCommand):
     match/str: Window to change colors in
     match_tab/str: Tab to change colors in
     self/bool: Boolean indicating whether to list only the window the command is run in
+    fields/str: Comma separated list of fields to output, all fields are output when empty
+    compact/bool: Whether to output JSON without indentation
     '''
 
     short_desc = 'List tabs/windows'
@@ -30,6 +63,7 @@ class LS(RemoteCommand):
         ' running the command inside a kitty window, that window can be identified by the :italic:`is_self` parameter.\n\n'
         'You can use these criteria to select windows/tabs for the other commands.\n\n'
         'You can limit the windows/tabs in the output by using the :option:`--match` and :option:`--match-tab` options.'
+        ' You can limit the fields in the output by using the :option:`--fields` option.'
     )
     options_spec = '''\
 --all-env-vars
@@ -40,10 +74,38 @@ class LS(RemoteCommand):
 --self
 type=bool-set
 Only list the window this command is run in.
+
+
+--fields
+A comma separated list of fields to output, for example: :code:`title,cwd`. The :code:`id`
+of every OS window, tab and window and the :code:`tabs` and :code:`windows` lists are always
+output. Fields that require querying the processes running in the windows, such as
+:code:`env`, :code:`cmdline` and :code:`foreground_processes`, are not computed unless
+requested, making the command much faster with large numbers of windows.
+
+
+--compact
+type=bool-set
+Output compact JSON without indentation or newlines.
 ''' + '\n\n' + MATCH_WINDOW_OPTION + '\n\n' + MATCH_TAB_OPTION.replace('--match -m', '--match-tab -t', 1)
+    # Allows listing to be spread over multiple loop ticks for large numbers of windows
+    is_asynchronous = True
+    can_respond_synchronously = True
+    windows_per_chunk = 32
 
     def message_to_kitty(self, global_opts: RCOptions, opts: 'CLIOptions', args: ArgsType) -> PayloadType:
-        return {'all_env_vars': opts.all_env_vars, 'match': opts.match, 'match_tab': opts.match_tab}
+        return {
+            'all_env_vars': opts.all_env_vars, 'match': opts.match, 'match_tab': opts.match_tab,
+            'fields': opts.fields, 'compact': opts.compact,
+        }
+
+    def serialize(self, data: List['OSWindowDict'], payload_get: PayloadGetType, fields: FrozenSet[str]) -> str:
+        if not payload_get('all_env_vars'):
+            strip_common_env_vars(data)
+        output: List[Any] = project_fields(data, fields) if fields else data
+        if payload_get('compact'):
+            return json.dumps(output, sort_keys=True, separators=(',', ':'))
+        return json.dumps(output, indent=2, sort_keys=True)
 
     def response_from_kitty(self, boss: Boss, window: Optional[Window], payload_get: PayloadGetType) -> ResponseType:
         tab_filter: Optional[Callable[[Tab], bool]] = None
@@ -54,26 +116,53 @@ def response_from_kitty(self, boss: Boss, window: Optional[Window], payload_get:
             def wf(w: Window) -> bool:
                 return w.id in window_ids
             window_filter = wf
-        data = list(boss.list_os_windows(window, tab_filter, window_filter))
-        if not payload_get('all_env_vars'):
-            all_env_blocks: List[Dict[str, str]] = []
-            common_env_vars: Set[Tuple[str, str]] = set()
-            for osw in data:
-                for tab in osw.get('tabs', ()):
-                    for w in tab.get('windows', ()):
-                        env: Dict[str, str] = w.get('env', {})
-                        frozen_env = set(env.items())
-                        if all_env_blocks:
-                            common_env_vars &= frozen_env
-                        else:
-                            common_env_vars = frozen_env
-                        all_env_blocks.append(env)
-            if common_env_vars and len(all_env_blocks) > 1:
-                remove_env_vars = {k for k, v in common_env_vars}
-                for env in all_env_blocks:
-                    for r in remove_env_vars:
-                        env.pop(r, None)
-        return json.dumps(data, indent=2, sort_keys=True)
+        fields = frozenset(filter(None, (x.strip() for x in (payload_get('fields') or '').split(','))))
+        if payload_get('async_id'):
+            windows = [w for w in boss.all_windows if window_filter is None or window_filter(w)]
+            if len(windows) > self.windows_per_chunk:
+                self.list_in_chunks(boss, window, payload_get, windows, fields)
+                return AsyncResponse()
+        data = list(boss.list_os_windows(window, tab_filter, window_filter, (fields | {'id'}) if fields else None))
+        return self.serialize(data, payload_get, fields)
+
+    def list_in_chunks(
+        self, boss: Boss, window: Optional[Window], payload_get: PayloadGetType, windows: List[Window], fields: FrozenSet[str]
+    ) -> None:
+        # Build the listing a few windows at a time, so that the rendering of
+        # all OS windows is not blocked while the listing is being built
+        from kitty.remote_control import active_async_requests
+        responder = self.create_async_responder(payload_get, window)
+        data: Dict[int, 'OSWindowDict'] = {}
+        tab_map: Dict[int, 'TabDict'] = {}
+
+        def merge(osw: 'OSWindowDict') -> None:
+            tabs, osw['tabs'] = osw['tabs'], []
+            target = data.setdefault(osw['id'], osw)
+            for tab in tabs:
+                existing = tab_map.get(tab['id'])
+                if existing is None:
+                    tab_map[tab['id']] = tab
+                    target['tabs'].append(tab)
+                else:
+                    existing['windows'].extend(tab['windows'])
+
+        def do_chunk(pos: int, timer_id: Optional[int] = None) -> None:
+            if responder.async_id not in active_async_requests:
+                return  # cancelled by the client
+            window_ids = frozenset(w.id for w in windows[pos:pos + self.windows_per_chunk])
+            try:
+                for osw in boss.list_os_windows(window, None, lambda w: w.id in window_ids, (fields | {'id'}) if fields else None):
+                    merge(osw)
+            except Exception as err:
+                responder.send_error(str(err))
+                return
+            pos += self.windows_per_chunk
+            if pos < len(windows):
+                add_timer(partial(do_chunk, pos), 0, False)
+            else:
+                responder.send_data(self.serialize(list(data.values()), payload_get, fields))
+
+        do_chunk(0)
 
 
 ls = LS()
@@ -9,6 +9,7 @@
 from collections.abc import Iterable, Iterator, Sequence
 from contextlib import suppress
 from functools import lru_cache, partial
+from itertools import count
 from time import time_ns
 from types import GeneratorType
 from typing import (
@@ -26,13 +27,14 @@
     AES256GCMDecrypt,
     AES256GCMEncrypt,
     EllipticCurveKey,
+    Secret,
     get_boss,
     get_options,
     monotonic,
     read_command_response,
     send_data_to_peer,
 )
-from .rc.base import NoResponse, PayloadGetter, all_command_names, command_for_name
+from .rc.base import NoResponse, PayloadGetter, RemoteControlError, all_command_names, command_for_name
 from .types import AsyncResponse
 from .typing import BossType, WindowType
 from .utils import TTYIO, log_error, parse_address_spec, resolve_custom_file
@@ -47,6 +49,13 @@ def encode_response_for_peer(response: Any) -> bytes:
     return b'\x1bP@kitty-cmd' + json.dumps(response).encode('utf-8') + b'\x1b\\'
 
 
+@lru_cache(maxsize=64)
+def derived_secret(encryption_key: EllipticCurveKey, pubkey: str) -> Secret:
+    # Clients that keep a connection open re-use their key for every command,
+    # so avoid redoing the key exchange for each of them
+    return encryption_key.derive_secret(base64.b85decode(pubkey))
+
+
 def parse_cmd(serialized_cmd: memoryview, encryption_key: EllipticCurveKey) -> dict[str, Any]:
     # See https://github.com/python/cpython/issues/74379 for why we cant use
     # memoryview directly :((
@@ -66,7 +75,7 @@ def parse_cmd(serialized_cmd: memoryview, encryption_key: EllipticCurveKey) -> d
         pubkey = pcmd.get('pubkey', '')
         if not pubkey:
             log_error('Ignoring encrypted rc command without a public key')
-        d = AES256GCMDecrypt(encryption_key.derive_secret(base64.b85decode(pubkey)), base64.b85decode(pcmd['iv']), base64.b85decode(pcmd['tag']))
+        d = AES256GCMDecrypt(derived_secret(encryption_key, pubkey), base64.b85decode(pcmd['iv']), base64.b85decode(pcmd['tag']))
         data = d.add_data_to_be_decrypted(base64.b85decode(pcmd['encrypted']), True)
         pcmd = json.loads(data)
         if not isinstance(pcmd, dict) or 'version' not in pcmd:
@@ -227,6 +236,9 @@ def handle_cmd(
         if len(active_streams) > 32:
             oldest = next(iter(active_streams))
             del active_streams[oldest]
+    request_id = cmd.get('request_id')
+    if request_id:
+        payload['request_id'] = str(request_id)
     if async_id:
         payload['async_id'] = async_id
         if 'cancel_async' in cmd:
@@ -384,6 +396,87 @@ def send_generator() -> Iterator[bytes]:
     return cast(dict[str, Any], json.loads(received.decode('ascii')))
 
 
+class RemoteControlSession:
+
+    '''
+    A persistent connection to a kitty instance, over which any number of
+    remote control commands can be sent, without paying the cost of connecting
+    and, when using a password, of key exchange for every command. Responses
+    are matched to commands by request id, so commands can be pipelined::
+
+        with RemoteControlSession(password='secret') as s:
+            s('set-tab-title', {'title': 'Building'})
+            ids = [s.send_command('send-text', {'data': f'text:{i}'}) for i in range(100)]
+            for request_id in ids:
+                s.wait_for_response(request_id)
+    '''
+
+    def __init__(self, to: str = '', password: str = '', response_timeout: float = 10) -> None:
+        import socket
+        to = to or os.environ.get('KITTY_LISTEN_ON', '')
+        if not to:
+            raise ValueError('No address to connect to was specified and KITTY_LISTEN_ON is not set')
+        self.response_timeout = response_timeout
+        self.encrypter: CommandEncrypter = NoEncryption()
+        if password:
+            encryption_version, pubkey = get_pubkey()
+            self.encrypter = CommandEncrypter(pubkey, encryption_version, password)
+            self.response_timeout = self.encrypter.adjust_response_timeout_for_password(response_timeout)
+        family, address = parse_address_spec(to)[:2]
+        self.socket = socket.socket(family)
+        self.socket.connect(address)
+        self.request_counter = count(1)
+        self.pending = b''
+        self.received: dict[str, dict[str, Any]] = {}
+
+    def __enter__(self) -> 'RemoteControlSession':
+        return self
+
+    def __exit__(self, *a: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        import socket
+        with suppress(OSError):
+            self.socket.shutdown(socket.SHUT_RDWR)
+        self.socket.close()
+
+    def send_command(self, name: str, payload: Any = None, no_response: bool = False) -> str:
+        c = command_for_name(name)
+        cmd = create_basic_command(name, payload, no_response, c.is_asynchronous)
+        cmd['request_id'] = request_id = str(next(self.request_counter))
+        self.socket.sendall(encode_send(self.encrypter(cmd)))
+        return request_id
+
+    def parse_responses(self) -> None:
+        prefix, terminator = b'\x1bP@kitty-cmd', b'\x1b\\'
+        while (start := self.pending.find(prefix)) > -1 and (end := self.pending.find(terminator, start)) > -1:
+            raw, self.pending = self.pending[start + len(prefix):end], self.pending[end + len(terminator):]
+            response = json.loads(raw)
+            if isinstance(response, dict):
+                self.received[str(response.pop('request_id', ''))] = response
+
+    def wait_for_response(self, request_id: str, timeout: Optional[float] = None) -> dict[str, Any]:
+        deadline = monotonic() + (self.response_timeout if timeout is None else timeout)
+        while request_id not in self.received:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f'Timed out waiting for the response to request: {request_id}')
+            self.socket.settimeout(remaining)
+            data = self.socket.recv(65536)
+            if not data:
+                raise SocketClosed('Remote control connection was closed by kitty')
+            self.pending += data
+            self.parse_responses()
+        return self.received.pop(request_id)
+
+    def __call__(self, name: str, payload: Any = None) -> Any:
+        response = self.wait_for_response(self.send_command(name, payload))
+        if not response.get('ok'):
+            raise RemoteControlError(response.get('error') or 'Unknown error')
+        return response.get('data')
+
+
 cli_msg = (
     'Control {appname} by sending it commands. Set the'
     ' :opt:`allow_remote_control` option in :file:`kitty.conf` or use a password, for this'
@@ -457,13 +550,17 @@ def create_basic_command(name: str, payload: Any = None, no_response: bool = Fal
     return ans
 
 
-def send_response_to_client(data: Any = None, error: str = '', peer_id: int = 0, window_id: int = 0, async_id: str = '') -> None:
+def send_response_to_client(
+    data: Any = None, error: str = '', peer_id: int = 0, window_id: int = 0, async_id: str = '', request_id: str = ''
+) -> None:
     if active_async_requests.pop(async_id, None) is None:
         return
     if error:
         response: dict[str, Union[bool, int, str]] = {'ok': False, 'error': error}
     else:
         response = {'ok': True, 'data': data}
+    if request_id:
+        response['request_id'] = request_id
     if peer_id > 0:
         send_data_to_peer(peer_id, encode_response_for_peer(response))
     elif window_id > 0:
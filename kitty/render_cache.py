@@ -3,23 +3,53 @@
 
 import os
 import time
+from collections import OrderedDict
 from collections.abc import Iterator
 from contextlib import closing, suppress
 from functools import partial
+from typing import NamedTuple
 
 from .constants import cache_dir, kitten_exe
 from .utils import lock_file, unlock_file
 
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+class RenderedImage(NamedTuple):
+    width: int
+    height: int
+    fd: int
+
 
 class ImageRenderCache:
 
+    '''
+    A cache of images converted to RGBA data, stored on disk keyed by a hash of
+    the image contents, so identical images at different paths share one entry.
+    The total size of the cache on disk is bounded by max_size. The entries are
+    tracked in an index ordered by last use, which is only re-read from disk
+    when some other process has modified the cache. File descriptors for a few
+    recently used entries are kept open, in front of the disk cache.
+    '''
+
     lock_file_name = '.lock'
 
-    def __init__(self, subdirname: str = 'rgba', max_entries: int = 32, cache_path: str = ''):
+    def __init__(
+        self, subdirname: str = 'rgba', max_entries: int = 256, cache_path: str = '',
+        max_size: int = 256 * 1024 * 1024, max_entries_in_memory: int = 8,
+    ):
         self.subdirname = subdirname
         self.cache_path = cache_path
         self.cache_dir = ''
         self.max_entries = max_entries
+        self.max_size = max_size
+        self.max_entries_in_memory = max_entries_in_memory
+        # name -> size, least recently used first
+        self.index: OrderedDict[str, int] = OrderedDict()
+        self.index_size = 0
+        self.index_dir_mtime = -1
+        self.content_hashes: OrderedDict[tuple[int, int, int, int], str] = OrderedDict()
+        self.in_memory: OrderedDict[str, RenderedImage] = OrderedDict()
 
     def ensure_subdir(self) -> None:
         if not self.cache_dir:
@@ -46,28 +76,54 @@ def entries(self) -> 'Iterator[os.DirEntry[str]]':
             if x.name != self.lock_file_name:
                 yield x
 
-    def prune_entries(self) -> None:
-        entries = list(self.entries())
-        if len(entries) <= self.max_entries:
+    def dir_mtime(self) -> int:
+        return os.stat(self.cache_dir).st_mtime_ns
+
+    def load_index(self) -> None:
+        # The directory mtime changes only when entries are added or removed,
+        # which, since we update it after our own changes, means some other
+        # process has changed the cache
+        if self.dir_mtime() == self.index_dir_mtime:
             return
-        def sort_key(e: 'os.DirEntry[str]') -> float:
+        entries = []
+        for e in self.entries():
             with suppress(OSError):
                 st = e.stat()
-                return st.st_mtime
-            return 0.
+                entries.append((st.st_mtime_ns, e.name, st.st_size))
+        entries.sort()
+        self.index = OrderedDict((name, size) for _, name, size in entries)
+        self.index_size = sum(self.index.values())
+        self.index_dir_mtime = self.dir_mtime()
+
+    def mark_used(self, name: str, size: int) -> None:
+        self.index_size += size - self.index.pop(name, 0)
+        self.index[name] = size
 
-        entries.sort(key=sort_key, reverse=True)
-        for e in entries[self.max_entries:]:
+    def prune_entries(self) -> None:
+        while len(self.index) > 1 and (self.index_size > self.max_size or len(self.index) > self.max_entries):
+            name, size = self.index.popitem(last=False)
+            self.index_size -= size
             with suppress(FileNotFoundError):
-                os.remove(e.path)
+                os.remove(os.path.join(self.cache_dir, name))
 
     def touch(self, path: str) -> None:
         os.utime(path, follow_symlinks=False)
 
     def render_image(self, src_path: str, output_path: str) -> None:
         import stat
+        import struct
         import subprocess
         with open(src_path, 'rb') as src, open(output_path, 'wb', opener=partial(os.open, mode=stat.S_IREAD | stat.S_IWRITE)) as output:
+            if src.read(len(PNG_SIGNATURE)) == PNG_SIGNATURE:
+                # PNG is decoded in process, avoiding the cost of running the kitten
+                from .fast_data_types import load_png_data
+                src.seek(0)
+                with suppress(ValueError):
+                    data, width, height = load_png_data(src.read())
+                    output.write(struct.pack('<II', width, height))
+                    output.write(data)
+                    return
+            src.seek(0)
             cp = subprocess.run([kitten_exe(), '__convert_image__', 'RGBA'], stdin=src, stdout=output, stderr=subprocess.PIPE)
         if cp.returncode != 0:
             raise ValueError(f'Failed to convert path to RGBA data with error: {cp.stderr.decode("utf-8", "replace")}')
@@ -80,23 +136,66 @@ def read_metadata(self, output_path: str) -> tuple[int, int, int]:
             f.seek(0)
             return width, height, os.dup(f.fileno())
 
-    def render(self, src_path: str) -> str:
-        import struct
-        from hashlib import sha256
+    def content_hash(self, src_path: str) -> str:
         src_info = os.stat(src_path)
-        output_name = sha256(struct.pack('@qqqq', src_info.st_dev, src_info.st_ino, src_info.st_size, src_info.st_mtime_ns)).hexdigest()
+        key = src_info.st_dev, src_info.st_ino, src_info.st_size, src_info.st_mtime_ns
+        ans = self.content_hashes.get(key)
+        if ans is None:
+            from hashlib import sha256
+            h = sha256()
+            with open(src_path, 'rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    h.update(chunk)
+            ans = h.hexdigest()
+            self.content_hashes[key] = ans
+            if len(self.content_hashes) > 4 * self.max_entries:
+                self.content_hashes.popitem(last=False)
+        else:
+            self.content_hashes.move_to_end(key)
+        return ans
 
+    def render(self, src_path: str) -> str:
+        output_name = self.content_hash(src_path)
         with self:
+            self.load_index()
             output_path = os.path.join(self.cache_dir, output_name)
             with suppress(OSError):
                 self.touch(output_path)
+                self.mark_used(output_name, self.index.get(output_name) or os.path.getsize(output_path))
                 return output_path
             self.render_image(src_path, output_path)
+            self.mark_used(output_name, os.path.getsize(output_path))
             self.prune_entries()
+            self.index_dir_mtime = self.dir_mtime()
             return output_path
 
+    def evict_from_memory(self, name: str) -> None:
+        q = self.in_memory.pop(name, None)
+        if q is not None:
+            os.close(q.fd)
+
     def __call__(self, src: str) -> tuple[int, int, int]:
-        return self.read_metadata(self.render(src))
+        name = self.content_hash(src)
+        q = self.in_memory.get(name)
+        if q is not None:
+            # Keep the on-disk LRU order in sync so that entries in use are not pruned
+            try:
+                self.touch(os.path.join(self.cache_dir, name))
+            except OSError:
+                # pruned by some other process
+                self.evict_from_memory(name)
+                q = None
+            else:
+                if name in self.index:
+                    self.index.move_to_end(name)
+        if q is None:
+            output_path = self.render(src)
+            q = self.in_memory[name] = RenderedImage(*self.read_metadata(output_path))
+            while len(self.in_memory) > self.max_entries_in_memory:
+                self.evict_from_memory(next(iter(self.in_memory)))
+        else:
+            self.in_memory.move_to_end(name)
+        return q.width, q.height, os.dup(q.fd)
 
 
 class ImageRenderCacheForTesting(ImageRenderCache):
@@ -2383,6 +2383,7 @@ process_cwd_notification(Screen *self, unsigned int code, const char *data, size
         if (x) {
             Py_CLEAR(self->last_reported_cwd);
             self->last_reported_cwd = x;
+            CALLBACK("cwd_reported", NULL);
         } else { PyErr_Clear(); }
     }  // we ignore OSC 6 document reporting as we dont have a use for it
 }
@@ -2721,6 +2722,27 @@ screen_update_only_line_graphics_data(Screen *self) {
     }
 }
 
+static Line*
+get_scrolled_history_line(void *x, int y) {
+    Screen *self = x;
+    historybuf_init_line(self->historybuf, self->scrolled_by - 1 - y, self->historybuf->line);
+    return self->historybuf->line;
+}
+
+static Line*
+get_history_line(void *x, int y) {
+    Screen *self = x;
+    historybuf_init_line(self->historybuf, y, self->historybuf->line);
+    return self->historybuf->line;
+}
+
+static Line*
+get_linebuf_line(void *x, int y) {
+    LineBuf *linebuf = x;
+    linebuf_init_line(linebuf, y);
+    return linebuf->line;
+}
+
 void
 screen_update_cell_data(Screen *self, void *address, FONTS_DATA_HANDLE fonts_data, bool cursor_has_moved) {
     if (self->paused_rendering.expires_at) {
@@ -2747,6 +2769,12 @@ screen_update_cell_data(Screen *self, void *address, FONTS_DATA_HANDLE fonts_dat
     update_overlay_position(self);
     if (self->scrolled_by) self->scrolled_by = MIN(self->scrolled_by + history_line_added_count, self->historybuf->count);
     self->scroll_changed = false;
+    if (screen_has_marker(self)) {
+        // mark all dirty lines with a single call to the marker
+        const index_type num_history_lines = MIN(self->lines, self->scrolled_by);
+        mark_text_in_lines(self->marker, self, get_scrolled_history_line, num_history_lines, true);
+        mark_text_in_lines(self->marker, self->linebuf, get_linebuf_line, self->lines - num_history_lines, true);
+    }
     for (index_type y = 0; y < MIN(self->lines, self->scrolled_by); y++) {
         lnum = self->scrolled_by - 1 - y;
         historybuf_init_line(self->historybuf, lnum, self->historybuf->line);
@@ -2755,7 +2783,6 @@ screen_update_cell_data(Screen *self, void *address, FONTS_DATA_HANDLE fonts_dat
         screen_render_line_graphics(self, self->historybuf->line, y - self->scrolled_by);
         if (self->historybuf->line->attrs.has_dirty_text) {
             render_line(fonts_data, self->historybuf->line, lnum, self->cursor, self->disable_ligatures);
-            if (screen_has_marker(self)) mark_text_in_line(self->marker, self->historybuf->line);
             historybuf_mark_line_clean(self->historybuf, lnum);
         }
         update_line_data(self->historybuf->line, y, address);
@@ -2767,7 +2794,6 @@ screen_update_cell_data(Screen *self, void *address, FONTS_DATA_HANDLE fonts_dat
             (cursor_has_moved && (self->cursor->y == lnum || self->last_rendered.cursor_y == lnum))) {
             render_line(fonts_data, self->linebuf->line, lnum, self->cursor, self->disable_ligatures);
             screen_render_line_graphics(self, self->linebuf->line, y - self->scrolled_by);
-            if (self->linebuf->line->attrs.has_dirty_text && screen_has_marker(self)) mark_text_in_line(self->marker, self->linebuf->line);
             if (is_overlay_active && lnum == self->overlay_line.ynum) render_overlay_line(self, self->linebuf->line, fonts_data);
             linebuf_mark_line_clean(self->linebuf, lnum);
         }
@@ -4467,18 +4493,9 @@ send_escape_code_to_child(Screen *self, PyObject *args) {
 
 static void
 screen_mark_all(Screen *self) {
-    for (index_type y = 0; y < self->main_linebuf->ynum; y++) {
-        linebuf_init_line(self->main_linebuf, y);
-        mark_text_in_line(self->marker, self->main_linebuf->line);
-    }
-    for (index_type y = 0; y < self->alt_linebuf->ynum; y++) {
-        linebuf_init_line(self->alt_linebuf, y);
-        mark_text_in_line(self->marker, self->alt_linebuf->line);
-    }
-    for (index_type y = 0; y < self->historybuf->count; y++) {
-        historybuf_init_line(self->historybuf, y, self->historybuf->line);
-        mark_text_in_line(self->marker, self->historybuf->line);
-    }
+    mark_text_in_lines(self->marker, self->main_linebuf, get_linebuf_line, self->main_linebuf->ynum, false);
+    mark_text_in_lines(self->marker, self->alt_linebuf, get_linebuf_line, self->alt_linebuf->ynum, false);
+    mark_text_in_lines(self->marker, self, get_history_line, self->historybuf->count, false);
     self->is_dirty = true;
 }
 
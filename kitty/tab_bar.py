@@ -18,6 +18,7 @@
 from .fast_data_types import (
     DECAWM,
     Color,
+    LineBuf,
     Region,
     Screen,
     cell_size_for_window,
@@ -193,28 +194,38 @@ def template_has_field(template: str, field: str) -> bool:
 
 class TabAccessor:
 
+    # The values are cached in the tab until its active window changes, as
+    # computing them reads process data from the OS
+
     def __init__(self, tab_id: int):
         self.tab_id = tab_id
 
     @property
     def active_wd(self) -> str:
         tab = get_boss().tab_for_id(self.tab_id)
-        return (tab.get_cwd_of_active_window() if tab else '') or ''
+        return tab.cached_active_window_info('active_wd', lambda: tab.get_cwd_of_active_window() or '') if tab else ''
 
     @property
     def active_oldest_wd(self) -> str:
         tab = get_boss().tab_for_id(self.tab_id)
-        return (tab.get_cwd_of_active_window(oldest=True) if tab else '') or ''
+        return tab.cached_active_window_info('active_oldest_wd', lambda: tab.get_cwd_of_active_window(oldest=True) or '') if tab else ''
 
     @property
     def active_exe(self) -> str:
         tab = get_boss().tab_for_id(self.tab_id)
-        return os.path.basename((tab.get_exe_of_active_window() if tab else '') or '')
+        return tab.cached_active_window_info(
+            'active_exe', lambda: os.path.basename(tab.get_exe_of_active_window() or '')) if tab else ''
 
     @property
     def active_oldest_exe(self) -> str:
         tab = get_boss().tab_for_id(self.tab_id)
-        return os.path.basename((tab.get_exe_of_active_window(oldest=True) if tab else '') or '')
+        return tab.cached_active_window_info(
+            'active_oldest_exe', lambda: os.path.basename(tab.get_exe_of_active_window(oldest=True) or '')) if tab else ''
+
+
+@lru_cache(maxsize=16)
+def tab_accessor_fields_in(template: str) -> tuple[str, ...]:
+    return tuple(f for f in ('active_wd', 'active_oldest_wd', 'active_exe', 'active_oldest_exe') if f'tab.{f}' in template)
 
 
 safe_builtins = {
@@ -444,6 +455,17 @@ def draw_tab_with_powerline(
     return end
 
 
+# These only depend on the position of the tab in the bar via whether it is the
+# first tab, so their output can be cached and moved when the tab moves
+position_independent_draw_funcs = frozenset((draw_tab_with_slant, draw_tab_with_separator, draw_tab_with_fade, draw_tab_with_powerline))
+
+
+class CachedTab(NamedTuple):
+    end: int  # the value returned by the draw function relative to the start of the tab
+    width: int  # the number of cells drawn including any trailing separator
+    cells: Optional[LineBuf]  # None when the tab was only drawn for layout
+
+
 @run_once
 def load_custom_draw_tab() -> DrawTabFunc:
     import runpy
@@ -480,11 +502,14 @@ def __init__(self, os_window_id: int):
         self.blank_rects: tuple[Border, ...] = ()
         self.cell_ranges: list[tuple[int, int]] = []
         self.laid_out_once = False
+        self.tab_cache: dict[tuple[Any, ...], CachedTab] = {}
+        self.tab_cache_epoch: tuple[Any, ...] = ()
         self.apply_options()
 
     def apply_options(self) -> None:
         opts = get_options()
         self.dirty = True
+        self.tab_cache_epoch = ()
         self.margin_width = pt_to_px(opts.tab_bar_margin_width, self.os_window_id)
         self.cell_width, cell_height = cell_size_for_window(self.os_window_id)
         if not hasattr(self, 'screen'):
@@ -568,6 +593,7 @@ def patch_colors(self, spec: dict[str, Optional[int]]) -> None:
             ifg = color_from_int(fg)
             if ifg is not None:
                 self.draw_data = self.draw_data._replace(inactive_fg=ifg)
+        self.tab_cache_epoch = ()
         self.screen.color_profile.reload_from_opts()
         self.screen.color_profile.default_fg = color_from_int(fg)
         self.screen.color_profile.default_bg = color_from_int(bg)
@@ -625,21 +651,70 @@ def layout(self) -> None:
         self.update_blank_rects(central, tab_bar, vw, vh)
         set_tab_bar_render_data(self.os_window_id, self.screen, *g[:4])
 
+    def copy_cells(self, start: int, end: int) -> LineBuf:
+        ans = LineBuf(1, end - start)
+        src, dest = self.screen.line(0), ans.line(0)
+        for x in range(start, end):
+            src.copy_char(x, dest, x - start)
+        return ans
+
+    def paste_cells(self, cells: LineBuf, width: int, at: int) -> None:
+        src, dest = cells.line(0), self.screen.line(0)
+        for x in range(width):
+            src.copy_char(x, dest, at + x)
+
     def update(self, data: Sequence[TabBarData]) -> None:
         if not self.laid_out_once:
             return
         s = self.screen
         last_tab = data[-1] if data else None
         ed = ExtraData()
+        # The drawn cells of every tab are cached keyed by its data, so that
+        # only tabs that have changed are drawn again.
+        epoch = self.draw_data, self.draw_func, s.columns, get_boss().mappings.current_keyboard_mode_name
+        if epoch != self.tab_cache_epoch:
+            self.tab_cache_epoch, self.tab_cache = epoch, {}
+        position_independent = self.draw_func in position_independent_draw_funcs
+        tab_cache: dict[tuple[Any, ...], CachedTab] = {}
+        # Values from the active window of a tab used in the title templates
+        # are not part of TabBarData, so they must be part of the key. They are
+        # cached by the tab, so this does not query the OS.
+        accessor_fields = tab_accessor_fields_in(f'{self.draw_data.title_template}\n{self.draw_data.active_title_template or ""}')
+        accessor_values: dict[int, tuple[str, ...]] = {}
+
+        def cache_key(i: int, t: TabBarData, max_tab_length: int) -> Optional[tuple[Any, ...]]:
+            if not position_independent:
+                # Custom draw functions can use state that is not in the key,
+                # such as the time, so they are always called
+                return None
+            pos = s.cursor.x == 0
+            av = accessor_values.get(t.tab_id)
+            if av is None:
+                ta = TabAccessor(t.tab_id)
+                av = accessor_values[t.tab_id] = tuple(getattr(ta, f) for f in accessor_fields)
+            return t, i, t is last_tab, ed.prev_tab, ed.next_tab, max_tab_length, ed.for_layout, pos, av
 
         def draw_tab(i: int, tab: TabBarData, cell_ranges: list[tuple[int, int]], max_tab_length: int) -> None:
             ed.prev_tab = data[i - 1] if i > 0 else None
             ed.next_tab = data[i + 1] if i + 1 < len(data) else None
-            s.cursor.bg = as_rgb(self.draw_data.tab_bg(t))
-            s.cursor.fg = as_rgb(self.draw_data.tab_fg(t))
             s.cursor.bold, s.cursor.italic = self.active_font_style if t.is_active else self.inactive_font_style
             before = s.cursor.x
-            end = self.draw_func(self.draw_data, s, t, before, max_tab_length, i + 1, t is last_tab, ed)
+            key = cache_key(i, t, max_tab_length)
+            cached = None if key is None else self.tab_cache.get(key)
+            if cached is not None and before + cached.width < s.columns:
+                if cached.cells is not None:
+                    self.paste_cells(cached.cells, cached.width, before)
+                s.cursor.x = before + cached.width
+                end = before + cached.end
+            else:
+                s.cursor.bg = as_rgb(self.draw_data.tab_bg(t))
+                s.cursor.fg = as_rgb(self.draw_data.tab_fg(t))
+                end = self.draw_func(self.draw_data, s, t, before, max_tab_length, i + 1, t is last_tab, ed)
+                cached = None
+                if key is not None and before < s.cursor.x < s.columns:
+                    cached = CachedTab(end - before, s.cursor.x - before, None if ed.for_layout else self.copy_cells(before, s.cursor.x))
+            if key is not None and cached is not None:
+                tab_cache[key] = cached
             s.cursor.bg = s.cursor.fg = 0
             cell_ranges.append((before, end))
             if not ed.for_layout and t is not last_tab and s.cursor.x > s.columns - max_tab_lengths[i+1]:
@@ -689,6 +764,7 @@ def draw_tab(i: int, tab: TabBarData, cell_ranges: list[tuple[int, int]], max_ta
             except StopIteration:
                 break
         self.cell_ranges = cr
+        self.tab_cache = tab_cache
         s.erase_in_line(0, False)  # Ensure no long titles bleed after the last tab
         self.align()
         update_tab_bar_edge_colors(self.os_window_id)
@@ -6,7 +6,7 @@
 import stat
 import weakref
 from collections import deque
-from collections.abc import Generator, Iterable, Iterator, Sequence
+from collections.abc import Container, Generator, Iterable, Iterator, Sequence
 from contextlib import suppress
 from gettext import gettext as _
 from operator import attrgetter
@@ -20,7 +20,7 @@
 )
 
 from .borders import Border, Borders
-from .child import Child
+from .child import Child, ChildStdin
 from .cli_stub import CLIOptions
 from .constants import appname
 from .fast_data_types import (
@@ -29,6 +29,7 @@
     GLFW_PRESS,
     GLFW_RELEASE,
     add_tab,
+    add_timer,
     attach_window,
     current_focused_os_window_id,
     detach_window,
@@ -41,6 +42,7 @@
     monotonic,
     next_window_id,
     remove_tab,
+    remove_timer,
     remove_window,
     ring_bell,
     set_active_tab,
@@ -82,7 +84,7 @@ class TabDict(TypedDict):
 
 class SpecialWindowInstance(NamedTuple):
     cmd: Optional[list[str]]
-    stdin: Optional[bytes]
+    stdin: Optional[ChildStdin]
     override_title: Optional[str]
     cwd_from: Optional[CwdRequest]
     cwd: Optional[str]
@@ -95,7 +97,7 @@ class SpecialWindowInstance(NamedTuple):
 
 def SpecialWindow(
     cmd: Optional[list[str]],
-    stdin: Optional[bytes] = None,
+    stdin: Optional[ChildStdin] = None,
     override_title: Optional[str] = None,
     cwd_from: Optional[CwdRequest] = None,
     cwd: Optional[str] = None,
@@ -142,6 +144,11 @@ def __init__(
         self.enabled_layouts = [x.lower() for x in getattr(session_tab, 'enabled_layouts', None) or get_options().enabled_layouts]
         self.borders = Borders(self.os_window_id, self.id)
         self.windows: WindowList = WindowList(self)
+        # Values derived from the processes running in the active window, used
+        # by the tab bar, valid until the active window, its foreground process
+        # group, title or reported working directory changes
+        self.active_window_info: dict[str, str] = {}
+        self.active_window_info_key: tuple[int, int] = 0, -1
         self._last_used_layout: Optional[str] = None
         self._current_layout_name: Optional[str] = None
         self.cwd = self.args.directory
@@ -247,6 +254,7 @@ def serialize_state(self) -> dict[str, Any]:
 
     def active_window_changed(self) -> None:
         w = self.active_window
+        self.active_window_info.clear()
         set_active_window(self.os_window_id, self.id, 0 if w is None else w.id)
         self.mark_tab_bar_dirty()
         self.relayout_borders()
@@ -290,12 +298,30 @@ def get_exe_of_active_window(self, oldest: bool = False) -> Optional[str]:
         w = self.active_window
         return w.get_exe_of_child(oldest) if w else None
 
+    def cached_active_window_info(self, name: str, compute: Callable[[], str]) -> str:
+        w = self.active_window
+        key = (0, -1) if w is None else (w.id, w.child.foreground_process_group)
+        if key != self.active_window_info_key:
+            self.active_window_info_key = key
+            self.active_window_info.clear()
+        ans = self.active_window_info.get(name)
+        if ans is None:
+            ans = self.active_window_info[name] = compute()
+        return ans
+
+    def active_window_info_changed(self, window: Window) -> None:
+        if window is self.active_window:
+            self.active_window_info.clear()
+            self.mark_tab_bar_dirty()
+
     def set_title(self, title: str) -> None:
         self.name = title or ''
         self.mark_tab_bar_dirty()
 
     def title_changed(self, window: Window) -> None:
         if window is self.active_window:
+            # Shells set the title when running a command or changing directory
+            self.active_window_info.clear()
             tm = self.tab_manager_ref()
             if tm is not None:
                 tm.title_changed(self)
@@ -446,7 +472,7 @@ def launch_child(
         self,
         use_shell: bool = False,
         cmd: Optional[list[str]] = None,
-        stdin: Optional[bytes] = None,
+        stdin: Optional[ChildStdin] = None,
         cwd_from: Optional[CwdRequest] = None,
         cwd: Optional[str] = None,
         env: Optional[dict[str, str]] = None,
@@ -516,7 +542,7 @@ def new_window(
         self,
         use_shell: bool = True,
         cmd: Optional[list[str]] = None,
-        stdin: Optional[bytes] = None,
+        stdin: Optional[ChildStdin] = None,
         override_title: Optional[str] = None,
         cwd_from: Optional[CwdRequest] = None,
         cwd: Optional[str] = None,
@@ -797,14 +823,17 @@ def move_window_forward(self) -> None:
     def move_window_backward(self) -> None:
         self.move_window(-1)
 
-    def list_windows(self, self_window: Optional[Window] = None, window_filter: Optional[Callable[[Window], bool]] = None) -> Generator[WindowDict, None, None]:
+    def list_windows(
+        self, self_window: Optional[Window] = None, window_filter: Optional[Callable[[Window], bool]] = None,
+        window_fields: Optional[Container[str]] = None,
+    ) -> Generator[WindowDict, None, None]:
         active_window = self.active_window
         for w in self:
             if window_filter is None or window_filter(w):
                 yield w.as_dict(
                     is_active=w is active_window,
                     is_focused=w.os_window_id == current_focused_os_window_id() and w is active_window,
-                    is_self=w is self_window)
+                    is_self=w is self_window, fields=window_fields)
 
     def list_groups(self) -> list[dict[str, Any]]:
         return [g.as_simple_dict() for g in self.windows.groups]
@@ -890,6 +919,8 @@ def __init__(self, os_window_id: int, args: CLIOptions, wm_class: str, wm_name:
         self.active_tab_history: Deque[int] = deque()
         self.tab_bar = TabBar(self.os_window_id)
         self._active_tab_idx = 0
+        self.tabs_needing_relayout: set[int] = set()
+        self.relayout_timer: Optional[int] = None
 
         if startup_session is not None:
             for t in startup_session.tabs:
@@ -954,6 +985,10 @@ def _set_active_tab(self, idx: int, store_in_history: bool = True) -> None:
         else:
             self._active_tab_idx = idx
         set_active_tab(self.os_window_id, idx)
+        tab = self.active_tab
+        if tab is not None and tab.id in self.tabs_needing_relayout:
+            self.tabs_needing_relayout.discard(tab.id)
+            tab.relayout()
 
     def tabbar_visibility_changed(self) -> None:
         if not self.tab_bar_hidden:
@@ -977,8 +1012,26 @@ def resize(self, only_tabs: bool = False) -> None:
             if not self.tab_bar_hidden:
                 self.tab_bar.layout()
                 self.mark_tab_bar_dirty()
+        active_tab = self.active_tab
         for tab in self.tabs:
-            tab.relayout()
+            if tab is active_tab:
+                tab.relayout()
+            else:
+                self.tabs_needing_relayout.add(tab.id)
+        if self.tabs_needing_relayout:
+            # Re-laying out a tab re-wraps the text in all its windows, so
+            # tabs that are not visible are re-laid out only once resizing
+            # pauses, or when they become visible
+            if self.relayout_timer is not None:
+                remove_timer(self.relayout_timer)
+            self.relayout_timer = add_timer(self.relayout_pending_tabs, get_options().resize_debounce_time[0], False)
+
+    def relayout_pending_tabs(self, timer_id: Optional[int] = None) -> None:
+        self.relayout_timer = None
+        pending, self.tabs_needing_relayout = self.tabs_needing_relayout, set()
+        for tab in self.tabs:
+            if tab.id in pending:
+                tab.relayout()
 
     def set_active_tab_idx(self, idx: int) -> None:
         self._set_active_tab(idx)
@@ -1059,12 +1112,13 @@ def __len__(self) -> int:
     def list_tabs(
         self, self_window: Optional[Window] = None,
         tab_filter: Optional[Callable[[Tab], bool]] = None,
-        window_filter: Optional[Callable[[Window], bool]] = None
+        window_filter: Optional[Callable[[Window], bool]] = None,
+        window_fields: Optional[Container[str]] = None,
     ) -> Generator[TabDict, None, None]:
         active_tab = self.active_tab
         for tab in self:
             if tab_filter is None or tab_filter(tab):
-                windows = list(tab.list_windows(self_window, window_filter))
+                windows = list(tab.list_windows(self_window, window_filter, window_fields))
                 if windows:
                     yield {
                         'id': tab.id,
@@ -1262,6 +1316,9 @@ def tab_bar_rects(self) -> tuple[Border, ...]:
         return self.tab_bar.blank_rects if self.tab_bar_should_be_visible else ()
 
     def destroy(self) -> None:
+        if self.relayout_timer is not None:
+            remove_timer(self.relayout_timer)
+            self.relayout_timer = None
         for t in self:
             t.destroy()
         self.tab_bar.destroy()
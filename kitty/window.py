@@ -7,12 +7,11 @@
 import sys
 import weakref
 from collections import deque
-from collections.abc import Generator, Iterable, Sequence
+from collections.abc import Container, Generator, Iterable, Iterator, Sequence
 from contextlib import contextmanager, suppress
 from enum import Enum, IntEnum, auto
 from functools import lru_cache, partial
 from gettext import gettext as _
-from itertools import chain
 from re import Pattern
 from time import time_ns
 from typing import (
@@ -23,6 +22,7 @@
     NamedTuple,
     Optional,
     Union,
+    cast,
 )
 
 from .child import ProcessDesc
@@ -74,6 +74,7 @@
     move_cursor_to_mouse_if_in_prompt,
     pointer_name_to_css_name,
     pt_to_px,
+    remove_timer,
     replace_c0_codes_except_nl_space_tab,
     set_window_logo,
     set_window_padding,
@@ -340,32 +341,84 @@ def callback(timer_id: Optional[int]) -> None:
     add_timer(callback, 0, False)
 
 
-def pagerhist(screen: Screen, as_ansi: bool = False, add_wrap_markers: bool = True, upto_output_start: bool = False) -> str:
+# The approximate size, in characters, of the chunks in which text is exported
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def iter_pagerhist(
+    screen: Screen, as_ansi: bool = False, add_wrap_markers: bool = True, upto_output_start: bool = False, chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> Iterator[str]:
     pht = screen.historybuf.pagerhist_as_text(upto_output_start)
-    if pht and (not as_ansi or not add_wrap_markers):
-        sanitizer = text_sanitizer(as_ansi, add_wrap_markers)
-        pht = sanitizer(pht)
-    return pht
+    sanitizer = text_sanitizer(as_ansi, add_wrap_markers) if pht and (not as_ansi or not add_wrap_markers) else None
+    pos = 0
+    while pos < len(pht):
+        # Split only at line ends as the escape codes removed by the sanitizer never span lines
+        end = pht.find('\n', pos + chunk_size)
+        end = len(pht) if end < 0 else end + 1
+        chunk = pht[pos:end]
+        yield sanitizer(chunk) if sanitizer else chunk
+        pos = end
 
 
-def as_text(
+def pagerhist(screen: Screen, as_ansi: bool = False, add_wrap_markers: bool = True, upto_output_start: bool = False) -> str:
+    return ''.join(iter_pagerhist(screen, as_ansi, add_wrap_markers, upto_output_start))
+
+
+class ChunkedText:
+
+    ''' Accumulate text and pass it on to write in chunks of at least chunk_size characters '''
+
+    def __init__(self, write: Callable[[str], None], chunk_size: int = EXPORT_CHUNK_SIZE):
+        self.write, self.chunk_size = write, chunk_size
+        self.parts: list[str] = []
+        self.size = self.num_parts = 0
+
+    def __call__(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        self.num_parts += 1
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.parts:
+            text = ''.join(self.parts)
+            self.parts.clear()
+            self.size = 0
+            self.write(text)
+
+
+def export_text(
     screen: Screen,
+    write: Callable[[str], None],
     as_ansi: bool = False,
     add_history: bool = False,
     add_wrap_markers: bool = False,
     alternate_screen: bool = False,
-    add_cursor: bool = False
-) -> str:
-    lines: list[str] = []
+    add_cursor: bool = False,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> None:
+    '''
+    Export the text of the screen, calling write with successive chunks of
+    approximately chunk_size characters, so that the full scrollback is never
+    present in memory as a single string.
+    '''
+    output = ChunkedText(write, chunk_size)
     add_history = add_history and not (screen.is_using_alternate_linebuf() ^ alternate_screen)
     if alternate_screen:
         f = screen.as_text_alternate
     else:
         f = screen.as_text_non_visual if add_history else screen.as_text
-    f(lines.append, as_ansi, add_wrap_markers)
-    ctext = ''
+    if add_history:
+        for chunk in iter_pagerhist(screen, as_ansi, add_wrap_markers, chunk_size=chunk_size):
+            if chunk:
+                output(chunk)
+        screen.as_text_for_history_buf(output, as_ansi, add_wrap_markers)
+        if as_ansi and output.num_parts:
+            output('\x1b[m')
+    f(output, as_ansi, add_wrap_markers)
     if add_cursor:
-        ctext += '\x1b[?25' + ('h' if screen.cursor_visible else 'l')
+        ctext = '\x1b[?25' + ('h' if screen.cursor_visible else 'l')
         ctext += f'\x1b[{screen.cursor.y + 1};{screen.cursor.x + 1}H'
         shape = screen.cursor.shape
         if shape == NO_CURSOR_SHAPE:
@@ -375,24 +428,55 @@ def as_text(
             if not screen.cursor.blink:
                 code += 1
             ctext += f'\x1b[{code} q'
+        output(ctext)
+    output.flush()
+
+
+def export_text_to_fd(fd: int, screen: Screen, normalize_line_endings: bool = False, **kw: Any) -> int:
+    '''
+    Write the text of the screen, as produced by :func:`export_text`, to the
+    blocking file descriptor fd as UTF-8, one chunk at a time. When
+    normalize_line_endings is True, wrap markers and CRLF line endings are
+    converted to LF. Returns the number of newlines written.
+    '''
+    num_lines = 0
+    pending_cr = False
+
+    def write(text: str) -> None:
+        nonlocal num_lines, pending_cr
+        if normalize_line_endings:
+            if pending_cr:
+                text = '\r' + text
+            # A CRLF may be split across chunks
+            pending_cr = text.endswith('\r')
+            if pending_cr:
+                text = text[:-1]
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        num_lines += text.count('\n')
+        with memoryview(text.encode('utf-8')) as mv:
+            while mv:
+                n = os.write(fd, mv)
+                mv = mv[n:]
 
-    if add_history:
-        pht = pagerhist(screen, as_ansi, add_wrap_markers)
-        h: list[str] = [pht] if pht else []
-        screen.as_text_for_history_buf(h.append, as_ansi, add_wrap_markers)
-        if h:
-            if as_ansi:
-                h[-1] += '\x1b[m'
-        ans = ''.join(chain(h, lines))
-        if ctext:
-            ans += ctext
-        return ans
-    ans = ''.join(lines)
-    if ctext:
-        ans += ctext
-    return ans
+    export_text(screen, write, **kw)
+    if pending_cr:
+        pending_cr = False
+        write('\n')
+    return num_lines
 
 
+def as_text(
+    screen: Screen,
+    as_ansi: bool = False,
+    add_history: bool = False,
+    add_wrap_markers: bool = False,
+    alternate_screen: bool = False,
+    add_cursor: bool = False
+) -> str:
+    parts: list[str] = []
+    export_text(screen, parts.append, as_ansi, add_history, add_wrap_markers, alternate_screen, add_cursor)
+    return ''.join(parts)
+
 
 @run_once
 def load_paste_filter() -> Callable[[str], str]:
@@ -607,6 +691,9 @@ def __init__(
         self.kitten_result_processors: list[Callable[['Window', Any], None]] = []
         self.child_is_launched = False
         self.last_reported_pty_size = (-1, -1, -1, -1)
+        self.pty_size_changed_at = 0.
+        self.pending_pty_size: Optional[tuple[int, int, int, int]] = None
+        self.pending_pty_size_timer: Optional[int] = None
         self.needs_attention = False
         self.ignore_focus_changes = self.initial_ignore_focus_changes
         self.override_title = override_title
@@ -627,6 +714,8 @@ def __init__(
         self.destroyed = False
         self.geometry: WindowGeometry = WindowGeometry(0, 0, 0, 0, 0, 0)
         self.needs_layout = True
+        # The OS window and tab the current geometry was last sent to
+        self.geometry_sent_to: tuple[int, int] = (0, 0)
         self.is_visible_in_layout: bool = True
         self.child = child
         cell_width, cell_height = cell_size_for_window(self.os_window_id)
@@ -718,19 +807,17 @@ def title(self) -> str:
     def __repr__(self) -> str:
         return f'Window(title={self.title}, id={self.id})'
 
-    def as_dict(self, is_focused: bool = False, is_self: bool = False, is_active: bool = False) -> WindowDict:
-        return {
+    def as_dict(
+        self, is_focused: bool = False, is_self: bool = False, is_active: bool = False, fields: Optional[Container[str]] = None
+    ) -> WindowDict:
+        ans: dict[str, Any] = {
             'id': self.id,
             'is_focused': is_focused,
             'is_active': is_active,
             'title': self.title,
             'pid': self.child.pid,
-            'cwd': self.child.current_cwd or self.child.cwd,
-            'cmdline': self.child.cmdline,
             'last_reported_cmdline': self.last_cmd_cmdline,
             'last_cmd_exit_status': self.last_cmd_exit_status,
-            'env': self.child.environ or self.child.final_env,
-            'foreground_processes': self.child.foreground_processes,
             'is_self': is_self,
             'at_prompt': self.at_prompt,
             'lines': self.screen.lines,
@@ -738,6 +825,19 @@ def as_dict(self, is_focused: bool = False, is_self: bool = False, is_active: bo
             'user_vars': self.user_vars,
             'created_at': self.created_at,
         }
+        # The following need to query the child process(es) so only compute
+        # them when they are actually wanted
+        if fields is None or 'cwd' in fields:
+            ans['cwd'] = self.child.current_cwd or self.child.cwd
+        if fields is None or 'cmdline' in fields:
+            ans['cmdline'] = self.child.cmdline
+        if fields is None or 'env' in fields:
+            ans['env'] = self.child.environ or self.child.final_env
+        if fields is None or 'foreground_processes' in fields:
+            ans['foreground_processes'] = self.child.foreground_processes
+        if fields is not None:
+            ans = {k: v for k, v in ans.items() if k in fields}
+        return cast(WindowDict, ans)
 
     def serialize_state(self) -> dict[str, Any]:
         ans = {
@@ -877,6 +977,12 @@ def refresh(self, reload_all_gpu_data: bool = False) -> None:
     def set_geometry(self, new_geometry: WindowGeometry) -> None:
         if self.destroyed:
             return
+        if (
+            not self.needs_layout and new_geometry == self.geometry and self.geometry_sent_to == (self.os_window_id, self.tab_id) and
+            new_geometry.xnum == self.screen.columns and new_geometry.ynum == self.screen.lines
+        ):
+            # Re-laying out a tab leaves most windows where they were, dont re-send their unchanged geometry
+            return
         if self.needs_layout or new_geometry.xnum != self.screen.columns or new_geometry.ynum != self.screen.lines:
             self.screen.resize(max(0, new_geometry.ynum), max(0, new_geometry.xnum))
             self.needs_layout = False
@@ -886,29 +992,60 @@ def set_geometry(self, new_geometry: WindowGeometry) -> None:
             max(0, new_geometry.right - new_geometry.left), max(0, new_geometry.bottom - new_geometry.top))
         update_ime_position = False
         if current_pty_size != self.last_reported_pty_size:
-            boss = get_boss()
-            boss.child_monitor.resize_pty(self.id, *current_pty_size)
-            self.last_resized_at = monotonic()
-            self.last_reported_pty_size = current_pty_size
-            self.notify_child_of_resize()
-            if not self.child_is_launched:
-                self.child.mark_terminal_ready()
-                self.child_is_launched = True
-                update_ime_position = True
-                if boss.args.debug_rendering:
-                    now = monotonic()
-                    print(f'[{now:.3f}] Child launched', file=sys.stderr)
-            elif boss.args.debug_rendering:
-                print(f'[{monotonic():.3f}] SIGWINCH sent to child in window: {self.id} with size: {current_pty_size}', file=sys.stderr)
+            now = monotonic()
+            debounce_time = get_options().resize_debounce_time[0]
+            if self.child_is_launched and (self.pending_pty_size is not None or now - self.pty_size_changed_at < debounce_time):
+                # This is one of a storm of resizes, such as from repeatedly
+                # resizing a window in the layout, only tell the child about
+                # the final size, once the size has stopped changing.
+                self.pending_pty_size = current_pty_size
+                if self.pending_pty_size_timer is not None:
+                    remove_timer(self.pending_pty_size_timer)
+                self.pending_pty_size_timer = add_timer(self.report_pending_pty_size, debounce_time, False)
+                mark_os_window_dirty(self.os_window_id)
+            else:
+                update_ime_position = self.report_pty_size(current_pty_size)
+            self.pty_size_changed_at = now
         else:
+            self.cancel_pending_pty_size()
             mark_os_window_dirty(self.os_window_id)
 
         self.geometry = g = new_geometry
         set_window_render_data(self.os_window_id, self.tab_id, self.id, self.screen, *g[:4])
+        self.geometry_sent_to = self.os_window_id, self.tab_id
         self.update_effective_padding()
         if update_ime_position:
             update_ime_position_for_window(self.id, True)
 
+    def report_pty_size(self, pty_size: tuple[int, int, int, int]) -> bool:
+        boss = get_boss()
+        boss.child_monitor.resize_pty(self.id, *pty_size)
+        self.last_resized_at = monotonic()
+        self.last_reported_pty_size = pty_size
+        self.notify_child_of_resize()
+        if not self.child_is_launched:
+            self.child.mark_terminal_ready()
+            self.child_is_launched = True
+            if boss.args.debug_rendering:
+                now = monotonic()
+                print(f'[{now:.3f}] Child launched', file=sys.stderr)
+            return True
+        if boss.args.debug_rendering:
+            print(f'[{monotonic():.3f}] SIGWINCH sent to child in window: {self.id} with size: {pty_size}', file=sys.stderr)
+        return False
+
+    def report_pending_pty_size(self, timer_id: Optional[int] = None) -> None:
+        self.pending_pty_size_timer = None
+        pty_size, self.pending_pty_size = self.pending_pty_size, None
+        if pty_size is not None and not self.destroyed and pty_size != self.last_reported_pty_size:
+            self.report_pty_size(pty_size)
+
+    def cancel_pending_pty_size(self) -> None:
+        self.pending_pty_size = None
+        if self.pending_pty_size_timer is not None:
+            remove_timer(self.pending_pty_size_timer)
+            self.pending_pty_size_timer = None
+
     def contains(self, x: int, y: int) -> bool:
         g = self.geometry
         return g.left <= x <= g.right and g.top <= y <= g.bottom
@@ -989,6 +1126,7 @@ def write_to_child(self, data: Union[str, bytes]) -> None:
 
     def title_updated(self) -> None:
         update_window_title(self.os_window_id, self.tab_id, self.id, self.title)
+        get_boss().window_match_index.update_title(self.id, self.title)
         t = self.tabref()
         if t is not None:
             t.title_changed(self)
@@ -1043,6 +1181,7 @@ def set_user_var(self, key: str, val: Optional[Union[str, bytes]]) -> None:
             self.call_watchers(self.watchers.on_set_user_var, {'key': key, 'value': val})
         else:
             self.call_watchers(self.watchers.on_set_user_var, {'key': key, 'value': None})
+        get_boss().window_match_index.update_user_vars(self.id, self.user_vars)
 
     # screen callbacks {{{
 
@@ -1180,6 +1319,11 @@ def title_changed(self, new_title: Optional[memoryview], is_base64: bool = False
     def icon_changed(self, new_icon: memoryview) -> None:
         pass  # TODO: Implement this
 
+    def cwd_reported(self) -> None:
+        t = self.tabref()
+        if t is not None:
+            t.active_window_info_changed(self)
+
     @property
     def is_active(self) -> bool:
         return get_boss().active_window is self
@@ -1595,6 +1739,7 @@ def call_watchers(self, which: Iterable[Watcher], data: dict[str, Any]) -> None:
     def destroy(self) -> None:
         self.call_watchers(self.watchers.on_close, {})
         self.destroyed = True
+        self.cancel_pending_pty_size()
         self.clipboard_request_manager.close()
         del self.kitten_result_processors
         if hasattr(self, 'screen'):
@@ -1655,14 +1800,16 @@ def ssh_kitten_cmdline(self) -> list[str]:
                 return q
         return []
 
+    def input_line_number(self, num_lines: int) -> int:
+        ' The line number, in text with num_lines lines ending with the screen contents, of the first line in the window '
+        return num_lines - (self.screen.lines - 1) - self.screen.scrolled_by
+
     def pipe_data(self, text: str, has_wrap_markers: bool = False) -> PipeData:
         text = text or ''
         if has_wrap_markers:
             text = text.replace('\r\n', '\n').replace('\r', '\n')
-        lines = text.count('\n')
-        input_line_number = (lines - (self.screen.lines - 1) - self.screen.scrolled_by)
         return {
-            'input_line_number': input_line_number,
+            'input_line_number': self.input_line_number(text.count('\n')),
             'scrolled_by': self.screen.scrolled_by,
             'cursor_x': self.screen.cursor.x + 1,
             'cursor_y': self.screen.cursor.y + 1,
@@ -1772,10 +1919,15 @@ def current_mouse_position(self) -> Optional['MousePosition']:
 
     @ac('cp', 'Show scrollback in a pager like less')
     def show_scrollback(self) -> None:
-        text = self.as_text(as_ansi=True, add_history=True, add_wrap_markers=True)
-        data = self.pipe_data(text, has_wrap_markers=True)
+        from tempfile import TemporaryFile
+
+        # Export the scrollback a chunk at a time into an anonymous file that
+        # the pager reads as its STDIN, rather than building it in memory
+        output = TemporaryFile()
+        num_lines = export_text_to_fd(
+            output.fileno(), self.screen, normalize_line_endings=True, as_ansi=True, add_history=True, add_wrap_markers=True)
         cursor_on_screen = self.screen.scrolled_by < self.screen.lines - self.screen.cursor.y
-        get_boss().display_scrollback(self, data['text'], data['input_line_number'], report_cursor=cursor_on_screen)
+        get_boss().display_scrollback(self, output, self.input_line_number(num_lines), report_cursor=cursor_on_screen)
 
     def show_cmd_output(self, which: CommandOutput, title: str = 'Command output', as_ansi: bool = True, add_wrap_markers: bool = True) -> None:
         text = self.cmd_output(which, as_ansi=as_ansi, add_wrap_markers=add_wrap_markers)
@@ -72,6 +72,9 @@ def title_changed(self, data, is_base64=False) -> None:
     def icon_changed(self, data) -> None:
         self.iconbuf += str(data, 'utf-8')
 
+    def cwd_reported(self) -> None:
+        pass
+
     def set_dynamic_color(self, code, data='') -> None:
         if code == 22:
             self.set_pointer_shape(data)
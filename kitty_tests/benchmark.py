@@ -0,0 +1,395 @@
+#!/usr/bin/env python
+# License: GPL v3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+'''
+Benchmarks for the Python code that controls kitty: handling of remote control
+commands, matching of windows, layouts, drawing of the tab bar and loading of
+config files. They run headless, against synthetic sessions of the specified
+number of windows or tabs, so no display is needed. Run them with::
+
+    ./benchmark.py --save-baseline baseline.json
+    # make some changes
+    ./benchmark.py --baseline baseline.json
+
+Timings are printed as a table or, with --json, as JSON. When a baseline is
+specified, every timing is compared to it and the exit code is non-zero if any
+benchmark is slower than the baseline by more than --threshold.
+'''
+
+import json
+import os
+import platform
+import sys
+import weakref
+from collections.abc import Iterator
+from statistics import median
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Any, Callable, NamedTuple, Optional
+
+from kitty.boss import Boss
+from kitty.config import finalize_keys, finalize_mouse_mappings
+from kitty.constants import str_version, version
+from kitty.fast_data_types import EllipticCurveKey, Region, set_boss, set_options
+from kitty.layout.base import lgd, set_layout_options
+from kitty.match_index import WindowMatchIndex
+from kitty.options.parse import merge_result_dicts
+from kitty.options.types import Options, defaults
+from kitty.window import Window
+
+from .layout import Window as LayoutWindow
+from .layout import create_layout, create_windows
+
+Setup = Callable[[int, str], Callable[[], Any]]
+all_benchmarks: dict[str, Setup] = {}
+baseline_format_version = 1
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    ' Register a benchmark. The decorated function is called with the session size and a temporary directory and must return the callable to time '
+    def register(setup: Setup) -> Setup:
+        all_benchmarks[name] = setup
+        return setup
+    return register
+
+
+class Timing(NamedTuple):
+    min: float
+    median: float
+    loops: int
+
+
+def time_callable(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.05) -> Timing:
+    ' Time func, calling it in loops that take at least min_time seconds, repeat times. Returns the time per call in seconds. '
+    loops = 1
+    while True:
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+    times = [elapsed / loops]
+    for _ in range(repeat - 1):
+        start = perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((perf_counter() - start) / loops)
+    return Timing(min(times), median(times), loops)
+
+
+# Synthetic sessions {{{
+
+class SyntheticChild:
+
+    def __init__(self, win_id: int) -> None:
+        self.pid = 100000 + win_id
+        self.cwd = self.current_cwd = f'/home/user/projects/p{win_id % 10}/src'
+        self.cmdline = ['/usr/bin/zsh', '-l'] if win_id % 3 else ['/usr/bin/vim', f'file{win_id}.py']
+        self.environ = {'TERM': 'xterm-kitty', 'WINDOW_NUM': str(win_id)}
+
+
+class SyntheticWindow(LayoutWindow):
+
+    ' A window with just enough state to be laid out, matched and targeted by remote control commands '
+
+    matches = Window.matches
+    matches_query = Window.matches_query
+
+    def __init__(self, win_id: int, session: 'SyntheticSession') -> None:
+        super().__init__(win_id)
+        self.session = weakref.ref(session)
+        self.title = f'{win_id}: ' + ('zsh' if win_id % 3 else f'vim file{win_id}.py')
+        self.override_title: Optional[str] = None
+        self.user_vars = {'project': f'p{win_id % 10}'}
+        self.child = SyntheticChild(win_id)
+        self.os_window_id = 1
+        self.needs_attention = False
+        self.allow_remote_control = False
+        self.overlay_parent = None
+
+    def set_user_var(self, key: str, val: Optional[str]) -> None:
+        if val is None:
+            self.user_vars.pop(key, None)
+        else:
+            self.user_vars[key] = val
+        s = self.session()
+        if s is not None:
+            s.window_match_index.update_user_vars(self.id, self.user_vars)
+
+
+class SyntheticSession:
+
+    '''
+    A stand-in for :class:`kitty.boss.Boss` managing num_windows synthetic
+    windows. The methods used to match windows and to handle remote control
+    commands are those of Boss itself.
+    '''
+
+    match_windows = Boss.match_windows
+    window_match_getter = Boss.window_match_getter
+    _handle_remote_command = Boss._handle_remote_command
+    _handle_remote_command_batch = Boss._handle_remote_command_batch
+    _authorize_and_execute_remote_command = Boss._authorize_and_execute_remote_command
+    _execute_remote_command = Boss._execute_remote_command
+
+    def __init__(self, num_windows: int) -> None:
+        self.allow_remote_control = 'y'
+        self.peer_data_map: dict[int, Any] = {}
+        self.encryption_key = EllipticCurveKey()
+        self.window_match_index = WindowMatchIndex()
+        self.os_window_map: dict[int, Any] = {}
+        self.active_tab = self.active_window = None
+        self.mappings = SimpleNamespace(current_keyboard_mode_name='')
+        self.window_id_map: dict[int, SyntheticWindow] = {}
+        for i in range(1, num_windows + 1):
+            w = self.window_id_map[i] = SyntheticWindow(i, self)
+            self.window_match_index.add_window(w.id, w.title, w.child.pid, w.user_vars)
+
+    @property
+    def all_windows(self) -> Iterator[SyntheticWindow]:
+        yield from self.window_id_map.values()
+
+    def tab_for_id(self, tab_id: int) -> None:
+        return None
+
+    def remote_command(self, cmd: str, **payload: Any) -> bytes:
+        return json.dumps({'cmd': cmd, 'version': list(version), 'payload': payload}).encode()
+
+
+def create_session(num_windows: int) -> SyntheticSession:
+    ans = SyntheticSession(num_windows)
+    set_boss(ans)  # type: ignore
+    return ans
+
+
+def setup_options() -> Options:
+    opts = Options(merge_result_dicts(defaults._asdict(), {}))
+    finalize_keys(opts, [])
+    finalize_mouse_mappings(opts, [])
+    set_options(opts)
+    set_layout_options(opts)
+    return opts
+# }}}
+
+
+# Remote control and window matching {{{
+
+def rc_benchmark(cmd: str, **payload: Any) -> Setup:
+    def setup(n: int, tdir: str) -> Callable[[], Any]:
+        s = create_session(n)
+        data = memoryview(s.remote_command(cmd, **payload))
+
+        def run() -> Any:
+            ans = s._handle_remote_command(data)
+            assert isinstance(ans, dict) and ans.get('ok'), ans
+        return run
+    return setup
+
+
+benchmark('rc.set_user_vars.by_id')(rc_benchmark('set-user-vars', match='id:1', var=['x=y']))
+benchmark('rc.set_user_vars.by_var')(rc_benchmark('set-user-vars', match='var:project=p3', var=['x=y']))
+benchmark('rc.set_user_vars.by_cmdline')(rc_benchmark('set-user-vars', match='cmdline:vim', var=['x=y']))
+
+
+def match_benchmark(query: str) -> Setup:
+    def setup(n: int, tdir: str) -> Callable[[], Any]:
+        s = create_session(n)
+        return lambda: tuple(s.match_windows(query))
+    return setup
+
+
+benchmark('match.id')(match_benchmark('id:7'))
+benchmark('match.title')(match_benchmark('title:"^7: "'))
+benchmark('match.cwd')(match_benchmark('cwd:p7'))
+benchmark('match.compound')(match_benchmark('(var:project=p3 or cwd:p7) and not cmdline:vim'))
+# }}}
+
+
+# Layouts {{{
+
+def set_viewport() -> None:
+    # A viewport large enough to hold a thousand windows
+    lgd.central = Region((0, 0, 19199, 10799, 19200, 10800))
+    lgd.cell_width, lgd.cell_height = 8, 16
+
+
+def layout_benchmark(layout_name: str) -> Setup:
+    def setup(n: int, tdir: str) -> Callable[[], Any]:
+        from kitty.layout.interface import all_layouts
+        q = create_layout(all_layouts[layout_name])
+        q._set_dimensions = set_viewport  # type: ignore
+        windows = create_windows(q, n)
+        return lambda: q(windows)
+    return setup
+
+
+for layout_name in ('tall', 'fat', 'grid', 'horizontal', 'vertical', 'splits', 'stack'):
+    benchmark(f'layout.{layout_name}')(layout_benchmark(layout_name))
+# }}}
+
+
+# Tab bar {{{
+
+@benchmark('tab_bar.switch_tab')
+def tab_bar_switch_tab(n: int, tdir: str) -> Callable[[], Any]:
+    from kitty.fast_data_types import DECAWM
+    from kitty.tab_bar import TabBar, TabBarData
+    create_session(0)
+    tb = TabBar(0)
+    tb.screen.resize(1, 480)
+    tb.screen.reset_mode(DECAWM)
+    tb.laid_out_once = True
+
+    def tab(i: int, active: int) -> TabBarData:
+        return TabBarData(f'{i}: zsh ~/projects/p{i % 10}', i == active, False, i + 1, 1, 1, 'tall', False, None, None, None, None)
+
+    tabs = [tab(i, 0) for i in range(n)]
+    active = 0
+
+    def run() -> None:
+        # Changing the active tab, as happens on every switch, changes the data of two tabs
+        nonlocal active
+        prev, active = active, (active + 1) % n
+        tabs[prev], tabs[active] = tab(prev, active), tab(active, active)
+        tb.update(tabs)
+    return run
+# }}}
+
+
+# Config {{{
+
+def write_config(n: int, tdir: str) -> str:
+    lines = ['font_size 12', 'scrollback_lines 10000', 'enabled_layouts tall,grid,splits']
+    for i in range(n):
+        lines.append(f'map ctrl+shift+f{i % 12 + 1}>{chr(ord("a") + i % 26)}>{i % 10} send_text all {i}')
+        lines.append(f'env KITTY_BENCHMARK_VAR{i}=value{i}')
+        lines.append(f'symbol_map U+{0xe000 + i:X} Symbols Nerd Font Mono')
+        lines.append(f'color{i % 256} #{i % 256:02x}{(3 * i) % 256:02x}{(7 * i) % 256:02x}')
+    path = os.path.join(tdir, f'kitty-{n}.conf')
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines))
+    return path
+
+
+@benchmark('config.parse')
+def config_parse(n: int, tdir: str) -> Callable[[], Any]:
+    from kitty.config import ConfigSnapshots
+    path = write_config(n, tdir)
+    snapshots = ConfigSnapshots(os.path.join(tdir, 'parse'))
+    return lambda: snapshots.parse((path,), ())
+
+
+@benchmark('config.load_snapshot')
+def config_load_snapshot(n: int, tdir: str) -> Callable[[], Any]:
+    from kitty.config import ConfigSnapshots
+    path = write_config(n, tdir)
+    snapshots = ConfigSnapshots(os.path.join(tdir, 'snapshots'))
+    snapshots.load_config((path,), ())
+    return lambda: snapshots.load_config((path,), ())
+# }}}
+
+
+def run_benchmarks(names: list[str], sizes: list[int], repeat: int = 5, min_time: float = 0.05) -> dict[str, dict[str, Timing]]:
+    from tempfile import TemporaryDirectory
+    ans: dict[str, dict[str, Timing]] = {}
+    setup_options()
+    with TemporaryDirectory() as tdir:
+        for name in names:
+            setup = all_benchmarks[name]
+            for n in sizes:
+                ans.setdefault(name, {})[str(n)] = time_callable(setup(n, tdir), repeat, min_time)
+    set_options(None)
+    return ans
+
+
+def environment() -> dict[str, str]:
+    return {'kitty': str_version, 'python': platform.python_version(), 'machine': platform.machine(), 'system': platform.system()}
+
+
+def as_json(results: dict[str, dict[str, Timing]]) -> dict[str, Any]:
+    return {
+        'version': baseline_format_version, 'environment': environment(),
+        'results': {name: {n: t._asdict() for n, t in r.items()} for name, r in results.items()},
+    }
+
+
+def compare_with_baseline(
+    results: dict[str, dict[str, Timing]], baseline: dict[str, Any], threshold: float = 0.25
+) -> Iterator[tuple[str, str, float, float, bool]]:
+    ' Yield (name, size, baseline time, time, is_regression) for every timing that is also present in the baseline '
+    base = baseline.get('results', {})
+    for name, r in results.items():
+        for n, t in r.items():
+            b = base.get(name, {}).get(n)
+            if b:
+                yield name, n, b['min'], t.min, t.min > b['min'] * (1 + threshold)
+
+
+def format_time(x: float) -> str:
+    for unit, factor in (('s', 1), ('ms', 1e3), ('µs', 1e6)):
+        if x * factor >= 1:
+            return f'{x * factor:.2f} {unit}'
+    return f'{x * 1e9:.0f} ns'
+
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark the control plane of kitty, headless, against synthetic sessions')
+    parser.add_argument(
+        'name', nargs='*', default=[],
+        help='Names or name prefixes of the benchmarks to run, for example: layout or match.id. Runs all benchmarks by default.')
+    parser.add_argument('--sizes', default='10,100,1000', help='Comma separated list of session sizes, the number of windows, tabs or config entries')
+    parser.add_argument('--repeat', default=5, type=int, help='The number of times to time each benchmark, the minimum is reported')
+    parser.add_argument('--min-time', default=0.05, type=float, help='The minimum time in seconds for a single timing of a benchmark')
+    parser.add_argument('--json', action='store_true', help='Output the timings as JSON')
+    parser.add_argument('--save-baseline', default='', help='Save the timings as a baseline to the specified file')
+    parser.add_argument('--baseline', default='', help='Compare the timings to the baseline in the specified file')
+    parser.add_argument('--threshold', default=0.25, type=float, help='The fraction by which a timing must exceed the baseline to count as a regression')
+    parser.add_argument('--list', action='store_true', help='List the available benchmarks')
+    args = parser.parse_args()
+    if args.list:
+        print('\n'.join(all_benchmarks))
+        return
+    names = [x for x in all_benchmarks if not args.name or any(x == q or x.startswith(q + '.') for q in args.name)]
+    if not names:
+        raise SystemExit(f'No benchmarks match: {" ".join(args.name)}')
+    sizes = [int(x) for x in args.sizes.split(',')]
+    results = run_benchmarks(names, sizes, args.repeat, args.min_time)
+    data = as_json(results)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    regressions = []
+    comparisons: dict[tuple[str, str], tuple[float, bool]] = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for name, n, before, after, is_regression in compare_with_baseline(results, baseline, args.threshold):
+            comparisons[(name, n)] = after / before, is_regression
+            if is_regression:
+                regressions.append(f'{name}[{n}]')
+        data['baseline'] = {f'{name}[{n}]': ratio for (name, n), (ratio, _) in comparisons.items()}
+        data['regressions'] = regressions
+    if args.json:
+        json.dump(data, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        for name, r in results.items():
+            for n, t in r.items():
+                line = f'{name:>28} {n:>6}: {format_time(t.min):>10} (median: {format_time(t.median)})'
+                c = comparisons.get((name, n))
+                if c is not None:
+                    ratio, is_regression = c
+                    q = f'{ratio:.2f}x baseline'
+                    line += ' ' + (f'\x1b[31m{q}\x1b[39m' if is_regression else q)
+                print(line)
+        if regressions:
+            print(f'\x1b[31mRegressions\x1b[39m: {" ".join(regressions)}', file=sys.stderr)
+    if regressions:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
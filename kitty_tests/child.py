@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2024, Kovid Goyal <kovid at kovidgoyal.net>
+
+
+import os
+import shutil
+import tempfile
+
+from kitty.constants import is_macos
+
+from . import BaseTest
+
+
+class TestChild(BaseTest):
+
+    def setUp(self):
+        if is_macos:
+            self.skipTest('Sessions are not walked via /proc on macOS')
+        self.tdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tdir)
+
+    def add_process(self, pid, ppid, pgrp, sid, children=(), name='sh'):
+        base = os.path.join(self.tdir, str(pid))
+        os.makedirs(os.path.join(base, 'task', str(pid)), exist_ok=True)
+        with open(os.path.join(base, 'stat'), 'w') as f:
+            f.write(f'{pid} ({name}) S {ppid} {pgrp} {sid} 34816 {pgrp} 4194304 0\n')
+        with open(os.path.join(base, 'task', str(pid), 'children'), 'w') as f:
+            f.write(' '.join(map(str, children)))
+
+    def test_process_group_index(self):
+        from kitty import child
+        from kitty.child import Child, ProcessGroupIndex, session_group_map
+        orig_proc_dir, orig_can_walk = child.proc_dir, child.can_walk_session_tree
+        child.proc_dir, child.can_walk_session_tree = self.tdir, lambda: True
+        try:
+            self.add_process(100, 1, 100, 100, children=(101, 103))
+            self.add_process(101, 100, 101, 100, children=(102,))
+            self.add_process(102, 101, 101, 100, name='a b) c')
+            # moved into its own session, so no longer part of the session of 100
+            self.add_process(103, 100, 103, 103)
+            self.add_process(200, 1, 200, 200)
+            self.ae(dict(session_group_map(100)), {100: [100], 101: [101, 102]})
+            self.ae(dict(session_group_map(200)), {200: [200]})
+
+            idx = ProcessGroupIndex()
+            # Unregistered sessions fall back to scanning all processes
+            self.ae(idx.processes_in_group(103, 100), [103])
+            idx.add_session(100)
+            self.ae(idx.processes_in_group(101, 100), [101, 102])
+            self.ae(idx.processes_in_group(103, 100), [])
+            with idx.cached():
+                self.ae(idx.processes_in_group(101, 100), [101, 102])
+                self.add_process(104, 101, 101, 100)
+                self.add_process(101, 100, 101, 100, children=(102, 104))
+                self.ae(idx.processes_in_group(101, 100), [101, 102])
+            self.assertFalse(idx.session_maps)
+            self.ae(idx.processes_in_group(101, 100), [101, 102, 104])
+            idx.remove_session(100)
+            self.assertNotIn(100, idx.sessions)
+
+            c = Child.__new__(Child)
+            c.pid = 100
+            child.process_group_index.add_session(100)
+            c.mark_dead()
+            self.assertNotIn(100, child.process_group_index.sessions)
+        finally:
+            child.proc_dir, child.can_walk_session_tree = orig_proc_dir, orig_can_walk
@@ -30,3 +30,40 @@ def t(data, expected):
         for x in 'bGlnaHQgd29y':
             wr.add_base64_data(x)
         self.ae(wr.data_for(), b'light wor')
+
+    def test_clipboard_tempfile(self):
+        import base64
+        import os
+
+        from kitty.clipboard import Tempfile
+        tf = Tempfile(max_size=16)
+        tf.write(b'0123456789')
+        self.assertIsNone(tf.file)
+        v = tf.view(2, 3)
+        self.ae(v, b'234')
+        tf.write(memoryview(b'abcdef'))
+        self.assertIsNone(tf.file)
+        self.ae(v, b'234')
+        tf.write(b'ghi')
+        self.assertIsNotNone(tf.file)
+        self.ae(tf.tell(), 19)
+        self.ae(tf.view(8, 6), b'89abcd')
+        first = tf.view(0)
+        tf.write(b'jkl')
+        self.ae(first, b'0123456789abcdefghi')
+        self.ae(tf.view(15), b'fghijkl')
+        self.ae(tf.view(30), b'')
+        chunker = tf.create_chunker(1, 20)()
+        self.ae(b''.join(iter(chunker, b'')), b'123456789abcdefghijk')
+
+        data = os.urandom(300 * 1024 + 7)
+        wr = WriteRequest(max_size=64, rollover_size=1024)
+        encoded = base64.standard_b64encode(data)
+        for i in range(0, len(encoded), 100 * 1024 + 3):
+            wr.add_base64_data(encoded[i:i + 100 * 1024 + 3], 'application/octet-stream')
+        wr.add_base64_data('dGl0bGU=')
+        wr.flush_base64_data()
+        self.assertIsNotNone(wr.tempfile.file)
+        self.ae(wr.data_for('application/octet-stream'), data)
+        self.ae(wr.data_for(), b'title')
+        self.ae(wr.data_for('application/octet-stream', 10, 5), data[10:15])
@@ -6,6 +6,7 @@
 import shutil
 import stat
 import tempfile
+import threading
 from collections import namedtuple
 from contextlib import contextmanager
 from pathlib import Path
@@ -13,7 +14,21 @@
 from kittens.transfer.rsync import Differ, Hasher, Patcher, parse_ftc
 from kittens.transfer.utils import set_paths
 from kitty.constants import kitten_exe
-from kitty.file_transmission import Action, Compression, FileTransmissionCommand, FileType, TransmissionType, ZlibDecompressor
+from kitty.file_transmission import (
+    MAX_PREFETCHED_CHUNKS,
+    Action,
+    Compression,
+    FileTransmissionCommand,
+    FileType,
+    PatchFile,
+    ReceiveWorkers,
+    SignatureCache,
+    SourceFile,
+    TransmissionType,
+    ZlibDecompressor,
+    signature_cache,
+    split_for_transfer,
+)
 from kitty.file_transmission import TestFileTransmission as FileTransmission
 
 from . import PTY, BaseTest
@@ -170,6 +185,16 @@ def write_ftc_to_child(self, payload: FileTransmissionCommand, appendleft: bool
         return True
 
 
+class ThreadedFileTransmission(FileTransmission):
+
+    def __init__(self, allow=True):
+        super().__init__(allow=allow, num_workers=2)
+
+    def callback_after(self, callback, timeout=0):
+        # completions are processed by calling receive_workers.wait()
+        return None
+
+
 class TransferPTY(PTY):
 
     def __init__(self, cmd, cwd, allow=True, env=None):
@@ -302,6 +327,167 @@ def test_file_get(self):
             received = b''.join(x['data'] for x in ft.test_responses)
             self.ae(received.decode('utf-8'), src)
 
+    def test_receive_workers(self):
+        import time
+        w = ReceiveWorkers(num_workers=2)
+        done, errors = [], []
+
+        def job(key, i):
+            def f():
+                time.sleep(0.001 * (3 - i))
+                if i == 2 and key == 'b':
+                    raise ValueError('b2')
+                done.append((key, i))
+            return f
+
+        for i in range(4):
+            for key in 'ab':
+                w.submit(key, job(key, i), 2, errors.append)
+        w.wait()
+        self.ae([i for k, i in done if k == 'a'], [0, 1, 2, 3])
+        self.ae([i for k, i in done if k == 'b'], [0, 1, 3])
+        self.ae([str(e) for e in errors if e is not None], ['b2'])
+        self.ae(len(errors), 8)
+        self.ae(w.pending_bytes, 0)
+        self.assertFalse(w.backlogged)
+        self.assertFalse(w.has_work)
+
+        # deferred actions run, in order, after the jobs they depend on
+        gate, events = threading.Event(), []
+        w.submit('a', gate.wait, 1, lambda err: events.append('a done'))
+        w.submit('b', lambda: None, 1, lambda err: events.append('b done'))
+        w.when_done(('a',), lambda: events.append('after a'))
+        w.when_done(('c',), lambda: events.append('after c'))
+        self.ae(events, [])
+        w.wait(('b',))
+        self.ae(events, ['b done'])
+        gate.set()
+        w.wait()
+        self.ae(events, ['b done', 'a done', 'after a', 'after c'])
+        w.when_done(('a',), lambda: events.append('immediate'))
+        self.ae(events[-1], 'immediate')
+
+        # cancel does not wait for running jobs, cleanup runs after them
+        gate.clear()
+        events = []
+        w.submit('a', gate.wait, 1, lambda err: events.append('a done'))
+        w.submit('a', lambda: events.append('queued'), 1, lambda err: events.append('queued done'))
+        w.when_done(('a',), lambda: events.append('after a'))
+        w.cancel(('a', 'b'), lambda k: events.append(f'cleanup {k}'))
+        self.ae(events, ['cleanup b'])
+        gate.set()
+        w.wait()
+        self.ae(events, ['cleanup b', 'cleanup a'])
+        self.ae(w.pending_bytes, 0)
+        self.assertFalse(w.has_work)
+
+        # writes happen in worker threads with responses sent on completion
+        ft = ThreadedFileTransmission()
+        dest = os.path.join(self.tdir, 'dest')
+        data = os.urandom(8192)
+        ft.handle_serialized_command(serialized_cmd(action='send'))
+        ft.handle_serialized_command(serialized_cmd(action='file', file_id='1', name=dest))
+        for ftc in split_for_transfer(data, session_id='test', file_id='1', mark_last=True, chunk_size=1024):
+            ft.handle_serialized_command(ftc.serialize())
+        ft.receive_workers.wait()
+        with open(dest, 'rb') as f:
+            self.ae(f.read(), data)
+        self.ae(ft.test_responses[-1], response(file_id='1', status='OK', name=dest, size=len(data)))
+        ft.handle_serialized_command(serialized_cmd(action='finish'))
+        self.assertNotIn('test', ft.active_receives)
+
+        # finish is deferred until pending writes are done, without blocking
+        ft.handle_serialized_command(serialized_cmd(action='send'))
+        ft.handle_serialized_command(serialized_cmd(action='file', file_id='1', name=dest))
+        gate = threading.Event()
+        ft.receive_workers.submit(ft.active_receives['test'].files['1'], gate.wait, 0, None)
+        for ftc in split_for_transfer(data[::-1], session_id='test', file_id='1', mark_last=True, chunk_size=1024):
+            ft.handle_serialized_command(ftc.serialize())
+        ft.handle_serialized_command(serialized_cmd(action='finish'))
+        self.assertIn('test', ft.active_receives)
+        gate.set()
+        ft.receive_workers.wait()
+        self.assertNotIn('test', ft.active_receives)
+        with open(dest, 'rb') as f:
+            self.ae(f.read(), data[::-1])
+
+        # new files are not started while the workers are backlogged, which
+        # makes the sender wait before sending their data
+        def started():
+            return [r['file_id'] for r in ft.test_responses if r.get('status') == 'STARTED']
+
+        ft = ThreadedFileTransmission()
+        ft.receive_workers.max_pending_bytes = 1024
+        ft.handle_serialized_command(serialized_cmd(action='send'))
+        ft.handle_serialized_command(serialized_cmd(action='file', file_id='1', name=dest))
+        self.ae(started(), ['1'])
+        gate.clear()
+        ft.receive_workers.submit('other', gate.wait, 4096, None)
+        self.assertTrue(ft.receive_workers.backlogged)
+        ft.handle_serialized_command(serialized_cmd(action='file', file_id='2', name=dest + '2'))
+        ft.handle_serialized_command(serialized_cmd(action='file', file_id='3', name=dest + '3'))
+        self.ae(started(), ['1'])
+        gate.set()
+        ft.receive_workers.wait()
+        ft.process_finished_writes()
+        self.assertFalse(ft.receive_workers.backlogged)
+        self.ae(started(), ['1', '2', '3'])
+        ft.handle_serialized_command(serialized_cmd(action='cancel'))
+
+    def test_send_prefetch(self):
+        import time
+        src = os.path.join(self.tdir, 'src')
+        data = os.urandom(10 * 1024 * 1024 + 17)
+        with open(src, 'wb') as f:
+            f.write(data)
+        sf = SourceFile(FileTransmissionCommand(file_id='1', name=src))
+        sf.start_prefetch()
+        received = []
+        while not sf.transmitted:
+            if sf.waiting_for_prefetch:
+                time.sleep(0.001)
+                continue
+            self.assertLessEqual(len(sf.prefetched), MAX_PREFETCHED_CHUNKS)
+            received.append(sf.next_chunk()[0])
+        self.ae(b''.join(received), data)
+        while sf.prefetch_running:
+            time.sleep(0.001)
+        self.assertIsNone(sf.open_file)
+
+        # closing while a chunk is being produced leaves closing the file to the prefetch job
+        sf = SourceFile(FileTransmissionCommand(file_id='1', name=src))
+        sf.start_prefetch()
+        sf.close()
+        while sf.prefetch_running:
+            time.sleep(0.001)
+        self.assertIsNone(sf.open_file)
+        self.assertLessEqual(len(sf.prefetched), 1)
+
+    def test_rsync_signature_cache(self):
+        src = os.path.join(self.tdir, 'src')
+        with open(src, 'wb') as f:
+            f.write(os.urandom(64 * 1024 + 17))
+        sz = os.path.getsize(src)
+        pf = PatchFile(src, sz)
+        buf = memoryview(bytearray(4096))
+        expected = bytearray()
+        while (n := pf.next_signature_block(buf)):
+            expected += buf[:n]
+        pf.close()
+        for i in range(2):
+            pf = PatchFile(src, sz)
+            pf.compute_signature()
+            self.ae(pf.signature, bytes(expected))
+            pf.close()
+        st = os.stat(src)
+        self.assertIs(signature_cache.get((st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)), pf.signature)
+        cache = SignatureCache(max_size=10)
+        cache.set((1, 1, 1, 1), b'12345')
+        cache.set((2, 1, 1, 1), b'12345')
+        cache.set((3, 1, 1, 1), b'12345')
+        self.ae(list(cache.entries), [(2, 1, 1, 1), (3, 1, 1, 1)])
+        self.assertIsNone(cache.get((1, 1, 1, 1)))
+
     def test_parse_ftc(self):
         def t(raw, *expected):
             a = []
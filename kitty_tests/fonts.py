@@ -18,7 +18,8 @@
     wcwidth,
 )
 from kitty.fonts import family_name_to_key
-from kitty.fonts.box_drawing import box_chars
+from kitty.fonts.box_drawing import box_chars, render_box_char
+from kitty.fonts.box_drawing_cache import BoxDrawingCache, BoxDrawingPrefetcher, record_header
 from kitty.fonts.common import FontSpec, all_fonts_map, face_from_descriptor, get_font_files, get_named_style, spec_for_face
 from kitty.fonts.render import coalesce_symbol_maps, render_string, setup_for_testing, shape_string
 from kitty.options.types import Options
@@ -207,6 +208,88 @@ def test_box_drawing(self):
         test_render_line(line)
         self.assertEqual(len(self.sprites) - prerendered, len(box_chars))
 
+    def test_box_drawing_cache(self):
+        renders = []
+
+        class Cache(BoxDrawingCache):
+            def write_glyphs(self, name, glyphs):
+                glyphs = tuple(glyphs)
+                renders.extend(c for c, _ in glyphs)
+                super().write_glyphs(name, glyphs)
+
+        chars = tuple(map(ord, '─╭▒🬀⣿'))
+        c = Cache(cache_path=self.tdir, max_geometries=2)
+        glyphs = c.render_many(chars, 8, 16, 96)
+        for ch in chars:
+            self.ae(glyphs[ch], bytes(render_box_char(chr(ch), bytearray(8 * 16), 8, 16, 96)))
+        self.ae(renders, list(chars))
+        self.ae(c(chars[0], 8, 16, 96), glyphs[chars[0]])
+        self.ae(len(renders), len(chars))
+        # a new instance reads the glyphs from disk
+        c = Cache(cache_path=self.tdir, max_geometries=2)
+        self.ae(c.render_many(chars, 8, 16, 96), glyphs)
+        self.ae(len(renders), len(chars))
+        # a different size or dpi is a different entry
+        c(chars[0], 9, 18, 96)
+        c(chars[0], 8, 16, 192)
+        self.ae(len(renders), len(chars) + 2)
+        self.ae(len(os.listdir(c.cache_dir)) - 1, 2)
+        # a truncated entry is ignored after the last complete glyph
+        c.clear_memory()
+        name = c.name_for(8, 16, 192)
+        with open(os.path.join(c.cache_dir, name), 'ab') as f:
+            f.write(b'\0\0')
+        c.render_many(chars[:2], 8, 16, 192)
+        self.ae(len(renders), len(chars) + 3)
+        c.clear_memory()
+        c.render_many(chars[:2], 8, 16, 192)
+        self.ae(len(renders), len(chars) + 3)
+        # a corrupted glyph and everything after it is discarded
+        c.clear_memory()
+        with open(os.path.join(c.cache_dir, name), 'r+b') as f:
+            f.seek(record_header.size + 3)
+            byte = f.read(1)
+            f.seek(-1, os.SEEK_CUR)
+            f.write(b'\x01' if byte == b'\0' else b'\0')
+        c.render_many(chars[:2], 8, 16, 192)
+        self.ae(renders[-2:], list(chars[:2]))
+        c.clear_memory()
+        self.ae(c(chars[0], 8, 16, 192), bytes(render_box_char(chr(chars[0]), bytearray(8 * 16), 8, 16, 192)))
+        self.ae(len(renders), len(chars) + 5)
+
+    def test_box_drawing_prefetch(self):
+        c = BoxDrawingCache(cache_path=self.tdir)
+        p = BoxDrawingPrefetcher(c)
+        on_screen = ord('⣿'), ord('🬀')
+        p.prefetch({(8, 16, 96.): on_screen + (ord('a'),)})
+        self.assertTrue(p.render_some(0))
+        self.assertTrue(p.render_some(0))
+        _, glyphs = c.glyphs_for(8, 16, 96.)
+        self.ae(set(glyphs), set(on_screen))
+        self.assertTrue(p.render_some(0))
+        self.ae(set(glyphs), set(on_screen) | {0x2500})
+        while p.render_some():
+            pass
+        self.ae(set(glyphs), set(map(ord, box_chars)))
+        # glyphs rendered in a single call are written to disk together
+        writes = []
+
+        class Cache(BoxDrawingCache):
+            def write_glyphs(self, name, glyphs):
+                writes.append(len(glyphs))
+                super().write_glyphs(name, glyphs)
+
+        c = Cache(cache_path=self.tdir)
+        p = BoxDrawingPrefetcher(c)
+        p.prefetch({(7, 15, 96.): (), (9, 18, 96.): ()})
+        while p.render_some(0.01):
+            pass
+        self.ae(sum(writes), 2 * len(box_chars))
+        self.assertLess(len(writes), len(box_chars))
+        self.ae(len(c.glyphs_for(9, 18, 96.)[1]), len(box_chars))
+        c.clear_memory()
+        self.ae(len(c.glyphs_for(7, 15, 96.)[1]), len(box_chars))
+
     def test_font_rendering(self):
         render_string('ab\u0347\u0305你好|\U0001F601|\U0001F64f|\U0001F63a|')
         text = 'He\u0347\u0305llo\u0341, w\u0302or\u0306l\u0354d!'
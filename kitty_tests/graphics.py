@@ -1245,17 +1245,20 @@ def test_graphics_quota_enforcement(self):
     def test_cached_rgba_conversion(self):
         from kitty.render_cache import ImageRenderCacheForTesting
         w, h = 5, 3
-        rgba_data = byte_block(w * h * 4)
-        img = Image.frombytes('RGBA', (w, h), rgba_data)
-        buf = BytesIO()
-        img.save(buf, 'PNG')
-        png_data = buf.getvalue()
+
+        def png(rgba_data):
+            img = Image.frombytes('RGBA', (w, h), rgba_data)
+            buf = BytesIO()
+            img.save(buf, 'PNG')
+            return buf.getvalue()
+
         with tempfile.TemporaryDirectory() as cache_path:
             irc = ImageRenderCacheForTesting(cache_path)
             srcs, outputs = [], []
             for i in range(2 * irc.max_entries):
+                rgba_data = bytes((i + x) % 256 for x in range(w * h * 4))
                 with open(os.path.join(cache_path, f'{i}.png'), 'wb') as f:
-                    f.write(png_data)
+                    f.write(png(rgba_data))
                 srcs.append(f.name)
                 outputs.append(irc.render(f.name))
                 entries = list(irc.entries())
@@ -1277,3 +1280,32 @@ def test_cached_rgba_conversion(self):
                 self.ae((width, height), (w, h))
                 f.seek(8)
                 self.ae(rgba_data, f.read())
+            width, height, fd = irc(remaining_srcs[-1])
+            with open(fd, 'rb') as f:
+                f.seek(8)
+                self.ae(rgba_data, f.read())
+            self.ae(len(irc.in_memory), 1)
+            # hits in memory update the order of entries on disk
+            irc.render(remaining_srcs[0])
+            os.close(irc(remaining_srcs[-1])[2])
+            self.ae(list(irc.index), [os.path.basename(x) for x in remaining_outputs])
+            self.assertGreater(os.path.getmtime(remaining_outputs[-1]), os.path.getmtime(remaining_outputs[0]))
+            # entries removed from disk by another process are rendered again
+            os.remove(remaining_outputs[-1])
+            os.close(irc(remaining_srcs[-1])[2])
+            self.ae(irc.num_of_renders, len(outputs) + 1)
+            self.assertTrue(os.path.exists(remaining_outputs[-1]))
+
+            # identical content at a different path shares the cache entry
+            with open(remaining_srcs[-1], 'rb') as src, open(os.path.join(cache_path, 'copy.png'), 'wb') as f:
+                f.write(src.read())
+            self.ae(irc.render(f.name), remaining_outputs[-1])
+            self.ae(irc.num_of_renders, len(outputs) + 1)
+
+            # size based pruning
+            irc.max_size = os.path.getsize(remaining_outputs[-1])
+            with open(os.path.join(cache_path, 'new.png'), 'wb') as f:
+                f.write(png(byte_block(w * h * 4)[::-1]))
+            new_output = irc.render(f.name)
+            self.ae([e.path for e in irc.entries()], [new_output])
+            self.ae(list(irc.index), [os.path.basename(new_output)])
@@ -531,15 +531,15 @@ def __init__(self, *lines, active_window = Window()):
                 self.options = load_config(overrides=lines, accumulate_bad_lines=bad_lines)
                 af(bad_lines)
                 self.ignore_os_keyboard_processing = False
+                self.compiled_matchers = []
                 super().__init__()
 
             def get_active_window(self):
                 return self.active_window
 
-            def match_windows(self, expr: str):
-                for w in self.windows:
-                    if str(w.id) == expr:
-                        yield w
+            def compile_window_matcher(self, expr: str):
+                self.compiled_matchers.append(expr)
+                return lambda w: w in self.windows and str(w.id) == expr
 
             def show_error(self, title: str, msg: str) -> None:
                 pass
@@ -633,6 +633,21 @@ def __call__(self, *keys: str):
         self.ae(tm('ctrl+shift+t'), [True])
         tm.active_window = tm.windows[1]
         self.ae(tm('ctrl+shift+t'), [False])
+        self.ae(tm('ctrl+shift+t'), [False])
+        self.ae(tm.compiled_matchers, ['2'])
+
+        # sequences with focus selection, the keymaps for the remaining keys are re-used
+        tm = TM('map alt+p>1>3 multi1', 'map --when-focus-on 2 alt+p>1>2 multi2')
+        self.ae(tm('alt+p', '1', '3'), [True, True, True])
+        self.ae(tm.actions, ['multi1'])
+        tm.windows.append(Window(2))
+        tm.active_window = tm.windows[1]
+        self.ae(tm('alt+p', '1', '2'), [True, True, True])
+        self.ae(tm.actions, ['multi2'])
+        num = len(tm.sequence_keymaps)
+        self.ae(tm('alt+p', '1', '2'), [True, True, True])
+        self.ae(tm.actions, ['multi2'])
+        self.ae(len(tm.sequence_keymaps), num)
 
         # modal mappings
         tm = TM('map --new-mode mw --on-unknown end kitty_mod+f7', 'map --mode mw left neighboring_window left', 'map --mode mw right neighboring_window right')
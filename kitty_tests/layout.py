@@ -257,3 +257,64 @@ def test_splits(self):
         self.ae(q.neighbors_for_window(windows[1], all_windows), {'left': [1], 'right': [], 'top': [], 'bottom': [3, 4]})
         self.ae(q.neighbors_for_window(windows[2], all_windows), {'left': [1], 'right': [4], 'top': [2], 'bottom': []})
         self.ae(q.neighbors_for_window(windows[3], all_windows), {'left': [3], 'right': [], 'top': [2], 'bottom': []})
+
+    def test_splits_incremental_layout(self):
+        from kitty.fast_data_types import Region
+        from kitty.layout.base import lgd
+
+        def set_dimensions():
+            lgd.central = Region((0, 0, 1199, 799, 1200, 800))
+            lgd.cell_width, lgd.cell_height = 10, 20
+
+        q = create_layout(Splits)
+        q._set_dimensions = set_dimensions
+        all_windows = create_windows(q, num=0)
+        q.add_window(all_windows, Window(1))
+        for i, (target, location) in enumerate((
+            (1, 'vsplit'), (1, 'hsplit'), (2, 'hsplit'), (1, 'vsplit'), (2, 'vsplit'), (3, 'vsplit'), (4, 'vsplit')
+        ), start=2):
+            all_windows.set_active_group(target)
+            q.add_window(all_windows, Window(i), location=location)
+        calls = []
+        for w in all_windows:
+            w.set_geometry = lambda g, w=w: (calls.append(w.id), Window.set_geometry(w, g))
+
+        def relayout():
+            del calls[:]
+            q(all_windows)
+            return {w.id: w.geometry for w in all_windows}, q.blank_rects, [p.between_borders for p in q.pairs_root.self_and_descendants()]
+
+        def full_relayout():
+            for pair in q.pairs_root.self_and_descendants():
+                pair.subtree_changed = True
+            q.group_geometries.clear()
+            return relayout()
+
+        first = relayout()
+        self.ae(sorted(calls), list(range(1, 9)))
+        self.ae(relayout(), first)
+        self.ae(calls, [])
+
+        # Resizing a window only lays out the subtree containing it
+        self.assertTrue(q.modify_size_of_window(all_windows, 8, 0.1))
+        before = first[0]
+        after = relayout()
+        self.ae(sorted(calls), [4, 8])
+        self.ae({wid for wid, g in after[0].items() if g != before[wid]}, {4, 8})
+        self.ae(full_relayout(), after)
+
+        # Windows that another layout moved are laid out again
+        for w in all_windows:
+            Window.set_geometry(w, WindowGeometry(0, 0, 0, 0, 0, 0))
+        self.ae(relayout(), after)
+        self.ae(sorted(calls), list(range(1, 9)))
+
+        # Removing a window
+        all_windows.remove_window(all_windows.id_map[5])
+        after = relayout()
+        self.ae(sorted(calls), [1])
+        self.ae(full_relayout(), after)
+        n = q.neighbors_for_window(all_windows.id_map[6], all_windows)
+        self.assertIs(q.neighbors_for_window(all_windows.id_map[6], all_windows), n)
+        q(all_windows)
+        self.assertIsNot(q.neighbors_for_window(all_windows.id_map[6], all_windows), n)
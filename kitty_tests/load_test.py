@@ -0,0 +1,388 @@
+#!/usr/bin/env python
+# License: GPL v3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+'''
+A headless load test of kitty. Builds the tabs and windows described by one or
+more session files, giving every window a real Screen sized by the layout of
+its tab, then drives output into the screens at the specified rate per window,
+simulating the main loop, while running remote control commands against the
+session. Reports the latency of the main loop, the memory used per window and
+the latency of remote control commands under load. Run it with::
+
+    ./benchmark.py load --tabs 50 --windows-per-tab 8 --rates 1000,10000,100000
+    ./benchmark.py load my.session --duration 10 --json
+
+Without session files, a session with the specified number of tabs and
+windows is generated. No rendering is done, so the results are a lower bound
+on the cost of a real session.
+'''
+
+import gc
+import json
+import os
+import random
+import sys
+from collections.abc import Iterator, Sequence
+from functools import partial
+from time import perf_counter, sleep
+from typing import Any, NamedTuple, Optional
+
+from kitty.fast_data_types import Region, Screen, set_options
+from kitty.launch import LaunchSpec
+from kitty.layout.base import lgd
+from kitty.layout.interface import all_layouts
+from kitty.options.types import Options
+from kitty.session import Session, WindowSpec, parse_session
+from kitty.window import Window
+from kitty.window_list import WindowList
+
+from . import Callbacks, parse_bytes
+from .benchmark import SyntheticSession, SyntheticWindow, environment, format_time, setup_options
+from .layout import Tab as LayoutTab
+from .layout import create_layout
+
+CELL_WIDTH, CELL_HEIGHT = 8, 16
+
+
+def synthetic_session(num_tabs: int, windows_per_tab: int, layouts: Sequence[str] = ('tall', 'grid', 'splits', 'stack')) -> str:
+    ' Return the text of a session file with the specified number of tabs and windows '
+    lines = []
+    for t in range(num_tabs):
+        if t:
+            lines.append(f'new_tab tab{t}')
+        lines.append(f'layout {layouts[t % len(layouts)]}')
+        for w in range(windows_per_tab):
+            p = (t * windows_per_tab + w) % 10
+            cmd = 'vim main.py' if w % 3 == 2 else 'zsh -l'
+            lines.append(f'launch --title "{t}.{w}: {cmd}" --var project=p{p} --cwd /home/user/projects/p{p} {cmd}')
+    return '\n'.join(lines)
+
+
+def synthetic_output(size: int = 256 * 1024) -> bytes:
+    ' Output of the kind produced by shells, compilers, log tails and progress bars '
+    r = random.Random(1)
+    words = ('the', 'quick', 'brown', 'fox', 'jumps', 'over', 'lazy', 'dog', 'λ', '→', '日本語', '🎉', 'error:', 'warning:')
+    parts: list[bytes] = []
+    total = 0
+    while total < size:
+        q = r.random()
+        if q < 0.4:
+            x = ' '.join(r.choice(words) for _ in range(r.randint(2, 16))) + '\r\n'
+        elif q < 0.6:
+            x = '  '.join(f'\x1b[{r.choice((34, 32, 36, 0))}mfile{r.randint(0, 999)}.py\x1b[0m' for _ in range(r.randint(1, 8))) + '\r\n'
+        elif q < 0.75:
+            x = f'\x1b[1msrc/m{r.randint(0, 99)}.c:{r.randint(1, 999)}:\x1b[0m \x1b[1;31merror:\x1b[0m ' + ' '.join(
+                r.choice(words) for _ in range(r.randint(4, 12))) + '\r\n'
+        elif q < 0.85:
+            x = ''.join(f'\r[{"#" * i}{" " * (20 - i)}] {i * 5}%' for i in range(0, 21, 4)) + '\r\n'
+        elif q < 0.95:
+            # A long line, wrapped by the screen
+            x = 'x' * r.randint(200, 600) + '\r\n'
+        else:
+            x = f'\x1b]133;D;0\x1b\\\x1b]2;~/projects/p{r.randint(0, 9)}\x1b\\\x1b]133;A\x1b\\$ ls\r\n\x1b]133;C\x1b\\'
+        b = x.encode()
+        parts.append(b)
+        total += len(b)
+    return b''.join(parts)
+
+
+def rss() -> int:
+    ' The resident set size of this process in bytes '
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Only the peak is available, in KB on Linux and bytes on macOS
+        import resource
+        ans = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return ans if sys.platform == 'darwin' else ans * 1024
+
+
+class LoadWindow(SyntheticWindow):
+
+    ' A synthetic window with a real Screen into which output is driven '
+
+    as_text = Window.as_text
+    cmd_output = Window.cmd_output
+
+    def __init__(self, win_id: int, session: 'LoadSession', spec: WindowSpec) -> None:
+        super().__init__(win_id, session)
+        ls = spec.launch_spec
+        title = ''
+        if isinstance(ls, LaunchSpec):
+            title = ls.opts.window_title or ' '.join(ls.args)
+            for x in ls.opts.var or ():
+                k, sep, v = x.partition('=')
+                if sep:
+                    self.user_vars[k] = v
+            if ls.opts.cwd:
+                self.child.cwd = self.child.current_cwd = ls.opts.cwd
+            if ls.args:
+                self.child.cmdline = list(ls.args)
+        else:
+            title = ls.override_title or ' '.join(ls.cmd or ())
+        self.title = title or self.title
+        self.callbacks = Callbacks()
+        self.screen: Optional[Screen] = None
+        self.output_pos = 0
+        self.owed = 0.
+
+    def create_screen(self, scrollback: int) -> None:
+        self.screen = Screen(
+            self.callbacks, max(1, self.geometry.ynum), max(1, self.geometry.xnum), scrollback, CELL_WIDTH, CELL_HEIGHT, self.id, self.callbacks)
+        self.callbacks.color_profile = self.screen.color_profile
+
+    def feed(self, output: memoryview, amt: int) -> int:
+        ' Drive amt bytes of output into the screen, cycling through output '
+        assert self.screen is not None
+        left = amt
+        while left > 0:
+            chunk = output[self.output_pos:self.output_pos + left]
+            parse_bytes(self.screen, chunk)
+            left -= len(chunk)
+            self.output_pos = (self.output_pos + len(chunk)) % len(output)
+        return amt
+
+
+class LoadSession(SyntheticSession):
+
+    ' A stand-in for :class:`kitty.boss.Boss` managing the windows of the specified sessions '
+
+    def __init__(self, sessions: Sequence[Session], os_window_size: tuple[int, int], scrollback: int) -> None:
+        super().__init__(0)
+        self.window_id_map: dict[int, LoadWindow] = {}  # type: ignore
+        self.num_os_windows = len(sessions)
+        self.num_tabs = 0
+        for s in sessions:
+            for tab in s.tabs:
+                self.num_tabs += 1
+                windows = []
+                for spec in tab.windows:
+                    if spec.is_background_process:
+                        continue
+                    w = LoadWindow(len(self.window_id_map) + 1, self, spec)
+                    self.window_id_map[w.id] = w
+                    self.window_match_index.add_window(w.id, w.title, w.child.pid, w.user_vars)
+                    windows.append(w)
+                if windows:
+                    lay_out(tab.layout, windows, os_window_size)
+        for w in self.window_id_map.values():
+            w.create_screen(scrollback)
+
+    @property
+    def all_windows(self) -> Iterator[LoadWindow]:
+        yield from self.window_id_map.values()
+
+
+def set_viewport(cols: int, lines: int) -> None:
+    width, height = cols * CELL_WIDTH, lines * CELL_HEIGHT
+    lgd.central = Region((0, 0, width - 1, height - 1, width, height))
+    lgd.cell_width, lgd.cell_height = CELL_WIDTH, CELL_HEIGHT
+
+
+def lay_out(layout_name: str, windows: Sequence[LoadWindow], os_window_size: tuple[int, int]) -> None:
+    ' Set the geometry of the windows in a tab, as its layout would '
+    q = create_layout(all_layouts[layout_name.partition(':')[0]])
+    q._set_dimensions = partial(set_viewport, *os_window_size)
+    t = LayoutTab()
+    t.current_layout = q
+    t.windows = wl = WindowList(t)  # type: ignore
+    wl.tab_mem = t  # type: ignore
+    for w in windows:
+        wl.add_window(w)  # type: ignore
+    wl.set_active_group_idx(0)
+    q(wl)
+
+
+class Stats(NamedTuple):
+    count: int
+    p50: float
+    p99: float
+    max: float
+
+    @classmethod
+    def from_samples(cls, samples: list[float]) -> 'Stats':
+        if not samples:
+            return cls(0, 0, 0, 0)
+        s = sorted(samples)
+
+        def pct(p: float) -> float:
+            return s[min(len(s) - 1, int(p * len(s)))]
+        return cls(len(s), pct(0.5), pct(0.99), s[-1])
+
+
+rc_commands = {
+    'set-user-vars': ('set-user-vars', {'match': 'var:project=p3', 'var': ['x=y']}),
+    'get-text.screen': ('get-text', {'match': 'id:{mid}', 'extent': 'screen'}),
+    'get-text.all': ('get-text', {'match': 'id:{mid}', 'extent': 'all'}),
+    'get-text.ansi': ('get-text', {'match': 'id:{mid}', 'extent': 'screen', 'ansi': True}),
+}
+
+
+def run_load(
+    session: LoadSession, output: bytes, rate: int, duration: float = 5, tick: float = 0.01,
+    active: float = 1, rc_interval: float = 0.05,
+) -> dict[str, Any]:
+    '''
+    Drive output at rate bytes per second into a fraction active of the windows
+    for duration seconds. The main loop processes the output that arrived
+    since its previous iteration every tick seconds, as the main loop of kitty
+    does with its repaint_delay. A remote control command is run every
+    rc_interval seconds, cycling through rc_commands.
+    '''
+    windows = list(session.all_windows)
+    step = max(1, round(1 / active)) if active > 0 else 0
+    fed = windows[::step] if step else []
+    mid = windows[len(windows) // 2]
+    commands = []
+    for name, (cmd, payload) in rc_commands.items():
+        p = {k: v.format(mid=mid.id) if isinstance(v, str) else v for k, v in payload.items()}
+        commands.append((name, memoryview(session.remote_command(cmd, **p))))
+    mv = memoryview(output)
+    tick_times: list[float] = []
+    latencies: list[float] = []
+    rc_times: dict[str, list[float]] = {name: [] for name, _ in commands}
+    bytes_parsed = num_ticks = 0
+    start = last = perf_counter()
+    next_rc = start + rc_interval
+    while True:
+        now = perf_counter()
+        if now - start >= duration:
+            break
+        dt, last = now - last, now
+        for w in fed:
+            w.owed += rate * dt
+            amt = int(w.owed)
+            if amt:
+                w.owed -= amt
+                bytes_parsed += w.feed(mv, amt)
+        if now >= next_rc:
+            # Remote control commands are run by the main loop, so they are part of the tick
+            name, data = commands[num_ticks % len(commands)]
+            st = perf_counter()
+            ans = session._handle_remote_command(data)
+            rc_times[name].append(perf_counter() - st)
+            assert isinstance(ans, dict) and ans.get('ok'), ans
+            next_rc = now + rc_interval
+        end = perf_counter()
+        tick_times.append(end - now)
+        # Output that arrived just after the previous iteration started waits for this one to end
+        latencies.append(end - now + dt)
+        num_ticks += 1
+        if not num_ticks % 100:
+            for w in fed:
+                w.callbacks.clear()
+        delay = tick - (perf_counter() - now)
+        if delay > 0:
+            sleep(delay)
+    elapsed = perf_counter() - start
+    ts = Stats.from_samples(tick_times)
+    return {
+        'rate': rate, 'active_windows': len(fed), 'duration': elapsed,
+        'bytes_parsed': bytes_parsed, 'throughput': bytes_parsed / elapsed, 'requested_throughput': rate * len(fed),
+        'tick': ts._asdict(), 'latency': Stats.from_samples(latencies)._asdict(),
+        'over_budget': sum(1 for t in tick_times if t > tick) / max(1, len(tick_times)),
+        'rc': {name: Stats.from_samples(t)._asdict() for name, t in rc_times.items()},
+    }
+
+
+def load_sessions(paths: Sequence[str], opts: Options, num_tabs: int, windows_per_tab: int) -> list[Session]:
+    if not paths:
+        return list(parse_session(synthetic_session(num_tabs, windows_per_tab), opts))
+    ans: list[Session] = []
+    for path in paths:
+        with open(path) as f:
+            ans.extend(parse_session(f.read(), opts))
+    return ans
+
+
+def run(
+    paths: Sequence[str] = (), num_tabs: int = 10, windows_per_tab: int = 4, rates: Sequence[int] = (10000,),
+    os_window_size: tuple[int, int] = (240, 66), scrollback: Optional[int] = None, output_path: str = '', **kw: Any,
+) -> dict[str, Any]:
+    opts = setup_options()
+    sessions = load_sessions(paths, opts, num_tabs, windows_per_tab)
+    if output_path:
+        with open(output_path, 'rb') as f:
+            output = f.read()
+    else:
+        output = synthetic_output()
+    gc.collect()
+    base_rss = rss()
+    session = LoadSession(sessions, os_window_size, opts.scrollback_lines if scrollback is None else scrollback)
+    n = max(1, len(session.window_id_map))
+    gc.collect()
+    empty_rss = rss()
+    ans: dict[str, Any] = {
+        'environment': environment(),
+        'session': {
+            'os_windows': session.num_os_windows, 'tabs': session.num_tabs, 'windows': len(session.window_id_map),
+            'cells': sum(w.geometry.xnum * w.geometry.ynum for w in session.all_windows),
+        },
+        'runs': [],
+    }
+    for rate in rates:
+        r = run_load(session, output, rate, **kw)
+        gc.collect()
+        r['memory_per_window'] = (rss() - base_rss) / n
+        ans['runs'].append(r)
+    ans['memory'] = {'base': base_rss, 'per_window_empty': (empty_rss - base_rss) / n, 'per_window_loaded': (rss() - base_rss) / n}
+    set_options(None)
+    return ans
+
+
+def format_size(x: float) -> str:
+    for unit in ('B', 'KB', 'MB'):
+        if abs(x) < 1024:
+            return f'{x:.1f} {unit}'
+        x /= 1024
+    return f'{x:.1f} GB'
+
+
+def print_report(results: dict[str, Any]) -> None:
+    s = results['session']
+    print(f'{s["os_windows"]} OS windows, {s["tabs"]} tabs, {s["windows"]} windows, {s["cells"]} cells')
+    m = results['memory']
+    print(f'Memory per window: {format_size(m["per_window_empty"])} empty, {format_size(m["per_window_loaded"])} after load')
+    for r in results['runs']:
+        print()
+        print(f'{format_size(r["rate"])}/s into each of {r["active_windows"]} windows for {r["duration"]:.1f} s')
+        print(f'  Throughput: {format_size(r["throughput"])}/s of {format_size(r["requested_throughput"])}/s requested')
+        for label, key in (('Main loop iteration', 'tick'), ('Output latency', 'latency')):
+            t = r[key]
+            print(f'  {label}: p50: {format_time(t["p50"])} p99: {format_time(t["p99"])} max: {format_time(t["max"])}')
+        print(f'  Iterations over budget: {r["over_budget"] * 100:.1f}%')
+        for name, t in r['rc'].items():
+            if t['count']:
+                print(f'  rc {name:>16}: p50: {format_time(t["p50"])} p99: {format_time(t["p99"])} max: {format_time(t["max"])}')
+
+
+def main() -> None:
+    import argparse
+    parser = argparse.ArgumentParser(description='Load test kitty, headless, with sessions of many windows producing output')
+    parser.add_argument('session', nargs='*', default=[], help='Session files describing the tabs and windows to create')
+    parser.add_argument('--tabs', default=10, type=int, help='The number of tabs to create when no session files are specified')
+    parser.add_argument('--windows-per-tab', default=4, type=int, help='The number of windows per tab when no session files are specified')
+    parser.add_argument('--rates', default='10000', help='Comma separated list of output rates, in bytes per second per window, to test')
+    parser.add_argument('--active', default=1, type=float, help='The fraction of windows producing output')
+    parser.add_argument('--duration', default=5, type=float, help='The number of seconds to run each rate for')
+    parser.add_argument('--tick', default=0.01, type=float, help='The interval between iterations of the main loop, in seconds')
+    parser.add_argument('--rc-interval', default=0.05, type=float, help='The interval between remote control commands, in seconds')
+    parser.add_argument('--os-window-size', default='240x66', help='The size of OS windows in cells, as COLUMNSxLINES')
+    parser.add_argument('--scrollback', default=None, type=int, help='The number of scrollback lines per window, defaults to scrollback_lines')
+    parser.add_argument('--output', default='', help='A file of recorded output to drive into the windows instead of synthetic output')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    args = parser.parse_args()
+    cols, lines = map(int, args.os_window_size.lower().split('x'))
+    results = run(
+        args.session, args.tabs, args.windows_per_tab, [int(x) for x in args.rates.split(',')], (cols, lines), args.scrollback, args.output,
+        duration=args.duration, tick=args.tick, active=args.active, rc_interval=args.rc_interval)
+    if args.json:
+        json.dump(results, sys.stdout, indent=2, sort_keys=True)
+        print()
+    else:
+        print_report(results)
+
+
+if __name__ == '__main__':
+    main()
@@ -54,7 +54,7 @@ def itertests(suite: unittest.TestSuite) -> Generator[unittest.TestCase, None, N
             yield test
 
 
-def find_all_tests(package: str = '', excludes: Sequence[str] = ('main', 'gr')) -> unittest.TestSuite:
+def find_all_tests(package: str = '', excludes: Sequence[str] = ('main', 'gr', 'benchmark', 'load_test')) -> unittest.TestSuite:
     suits = []
     if not package:
         package = __name__.rpartition('.')[0] if '.' in __name__ else 'kitty_tests'
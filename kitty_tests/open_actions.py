@@ -57,3 +57,95 @@ def single(url, func, *args):
         single('file://hostname/tmp/moo.txt#23', 'launch', *get_editor(), '/tmp/moo.txt', '23')
         single('some thing.txt', 'ignored')
         self.ae(actions('x:///a.txt'), (KeyAction('one', ()), KeyAction('two', ())))
+
+    def test_open_actions_matcher(self):
+        from kitty import open_actions
+        from kitty.open_actions import ActionMatcher, KeyAction, ParsedURL, parse
+        self.set_options()
+        m = ActionMatcher(parse('''
+url ^https://(www\\.)?example\\.com/
+action first
+
+url (a)\\1
+action backref
+
+url [invalid
+action never
+
+protocol https,ftp
+ext tar.gz, zip
+action archive
+
+protocol ssh
+action ssh
+
+ext py
+file test_*
+action test
+
+fragment_matches ^\\d+$
+action line
+
+protocol file
+mime text/*
+action text
+'''.splitlines()))
+
+        def first(url):
+            a = m.match(ParsedURL(url))
+            return a.actions[0].func if a else None
+
+        self.ae(first('https://www.example.com/x.zip'), 'first')
+        self.ae(first('https://example.org/aa'), 'backref')
+        self.ae(first('https://example.org/x.tar.gz'), 'archive')
+        self.ae(first('ftp://example.org/x.ZIP'), 'archive')
+        self.ae(first('ftp://example.org/x.gz'), None)
+        self.ae(first('ssh://example.org/x.zip'), 'ssh')
+        self.ae(first('/src/test_one.py'), 'test')
+        self.ae(first('ftp://x.org/src/one.py'), None)
+        self.ae(first('http://x.org/a#12'), 'line')
+        self.ae(first('[invalid'), None)
+
+        calls = []
+        orig = open_actions.guess_type
+
+        def guess_type(path, allow_filesystem_access=False):
+            calls.append(path)
+            return 'text/plain'
+        open_actions.guess_type = guess_type
+        try:
+            u = ParsedURL('file:///some/file.txt')
+            self.ae(tuple(open_actions.actions_for_url_from_matchers('file:///some/file.txt', ActionMatcher(()), m)), (KeyAction('text', ()),))
+            self.ae(m.match(u).actions[0].func, 'text')
+            self.ae(m.match(u).actions[0].func, 'text')
+            self.ae(len(calls), 2)
+        finally:
+            open_actions.guess_type = orig
+
+    def test_guess_mime_type(self):
+        import stat
+        import tempfile
+
+        from kitty.guess_mime_type import clear_mime_cache, guess_type, guess_types, mime_cache
+        self.ae(guess_type('a.txt'), 'text/plain')
+        self.ae(guess_type('A.TXT'), 'text/plain')
+        self.ae(guess_type('x.tar.gz'), 'application/x-tar')
+        self.ae(guess_type('x.json'), 'text/json')
+        self.ae(guess_type('x.toml'), 'text/toml')
+        self.ae(guess_type('Makefile'), 'text/makefile')
+        self.ae(guess_type('x.unknownext'), None)
+        with tempfile.TemporaryDirectory() as tdir:
+            path = os.path.join(tdir, 'script')
+            with open(path, 'w') as f:
+                f.write('#!/bin/sh')
+            self.ae(guess_type(tdir, allow_filesystem_access=True), 'inode/directory')
+            self.ae(guess_type(path, allow_filesystem_access=True), None)
+            os.chmod(path, stat.S_IRWXU)
+            self.ae(guess_type(path, allow_filesystem_access=True), 'inode/executable')
+            self.ae(guess_types((path, tdir, path, 'x.png'), allow_filesystem_access=True), {
+                path: 'inode/executable', tdir: 'inode/directory', 'x.png': 'image/png'})
+            from kitty.boss import shell_quoted_drop_paths
+            self.ae(list(shell_quoted_drop_paths([path, tdir, 'x y', 'https://x.org'])), [path, tdir + '/', "'x y'", 'https://x.org'])
+            self.assertTrue(mime_cache)
+            clear_mime_cache()
+            self.assertFalse(mime_cache)
@@ -179,3 +179,87 @@ def ef(spec, tests, only_single=True, duration=0.5, accuracy=0):
         ef('steps(5, start)', {0: 0.2, 0.1: 0.2, 0.3: 0.4, 0.9:1})
         ef('steps(4, jump-both)', {0: 0.2, 0.1: 0.2, 0.3: 0.4, 0.9:1})
         ef('steps(6, jump-none)', {0: 0, 0.1: 0.0, 0.3: 0.2, 0.9:1})
+
+    def test_config_snapshots(self):
+        import os
+        import stat
+        import tempfile
+
+        from kitty.config import ConfigSnapshots
+        from kitty.fast_data_types import GLFW_MOD_SHIFT
+
+        class Snapshots(ConfigSnapshots):
+            num_of_parses = 0
+
+            def parse(self, *a):
+                self.num_of_parses += 1
+                return super().parse(*a)
+
+        with tempfile.TemporaryDirectory() as tdir:
+            s = Snapshots(os.path.join(tdir, 'cache'))
+            conf = os.path.join(tdir, 'kitty.conf')
+            os.mkdir(os.path.join(tdir, 'themes'))
+
+            def w(name, *lines):
+                with open(os.path.join(tdir, name), 'w') as f:
+                    f.write('\n'.join(lines))
+
+            def load(expected_parses, *overrides, bad_line_num=0):
+                bad_lines = []
+                before = s.num_of_parses
+                ans = s.load_config((conf,), overrides, bad_lines)
+                self.ae(len(bad_lines), bad_line_num)
+                self.ae(s.num_of_parses - before, expected_parses)
+                return ans
+
+            w(
+                'kitty.conf', 'font_size 13', 'include extra.conf', 'globinclude themes/*.conf', 'clear_all_shortcuts y',
+                'map shift+f1 next_window', 'env SHELL_NAME=$SNAPSHOT_TEST_SHELL')
+            w('extra.conf', 'cursor red', 'unknown_key 1')
+            os.environ['SNAPSHOT_TEST_SHELL'] = 'sh'
+            try:
+                opts = load(1)
+                self.ae(self.error_messages, ['Ignoring unknown config key: unknown_key'])
+                del self.error_messages[:]
+                cached = load(0)
+                self.ae(self.error_messages, ['Ignoring unknown config key: unknown_key'])
+                for name in ('font_size', 'cursor', 'env', 'mousemap', 'config_paths', 'color_table'):
+                    self.ae(getattr(opts, name), getattr(cached, name))
+                self.ae(cached.cursor, Color(255, 0, 0))
+                (trigger,) = cached.keyboard_modes[''].keymap
+                self.ae(trigger, tuple(opts.keyboard_modes[''].keymap)[0])
+                self.ae(trigger.mods, GLFW_MOD_SHIFT)
+                self.ae(load(1, 'font_size 14').font_size, 14)
+                load(0, 'font_size 14')
+                w('extra.conf', 'cursor blue')
+                self.ae(load(1).cursor, Color(0, 0, 255))
+                w('themes/a.conf', 'font_size 15')
+                self.ae(load(1).font_size, 15)
+                load(0)
+                os.environ['SNAPSHOT_TEST_SHELL'] = 'bash'
+                self.ae(load(1).env['SHELL_NAME'], 'bash')
+                # snapshots writable by others are not loaded
+                path = s.path_for((conf,), ())
+                os.chmod(path, 0o666)
+                load(1)
+                self.ae(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+                load(0)
+                os.chmod(os.path.dirname(path), 0o777)
+                load(1)
+                os.chmod(os.path.dirname(path), 0o700)
+                w('themes/a.conf', 'font_size xxx')
+                load(1, bad_line_num=1)
+                load(1, bad_line_num=1)
+                # snapshots from other versions of kitty are not used
+                from kitty import config
+                orig_version = config.str_version
+                config.option_definitions_hash.clear_cached()
+                try:
+                    config.str_version = '0.0.0'
+                    self.assertNotEqual(s.path_for((conf,), ()), path)
+                finally:
+                    config.str_version = orig_version
+                    config.option_definitions_hash.clear_cached()
+                self.ae(s.path_for((conf,), ()), path)
+            finally:
+                del os.environ['SNAPSHOT_TEST_SHELL']
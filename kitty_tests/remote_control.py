@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+from threading import Thread
+
+from . import BaseTest
+
+
+class FakeBoss:
+
+    all_windows = ()
+
+    def list_os_windows(self, self_window=None, tab_filter=None, window_filter=None, window_fields=None):
+        yield {'id': 1, 'is_active': True, 'tabs': [{'id': 1, 'windows': [{'id': 1, 'title': 'one'}]}]}
+
+
+class TestRemoteControl(BaseTest):
+
+    def test_batch(self):
+        from kitty.constants import version
+        from kitty.rc.batch import batch
+        from kitty.remote_control import handle_cmd
+        boss = FakeBoss()
+
+        def run(*commands, stop_on_error=False):
+            pcmd = {'version': version, 'payload': {'commands': list(commands), 'stop_on_error': stop_on_error}}
+            return json.loads(batch.run(pcmd, lambda sub: handle_cmd(boss, None, sub, 0, None)))
+
+        ls = json.dumps({'cmd': 'ls', 'payload': {'compact': True}})
+        failing = json.dumps({'cmd': 'no-such-command'})
+        responses = run(ls, failing, ls, stop_on_error=True)
+        self.ae(len(responses), 2)
+        self.assertTrue(responses[0]['ok'])
+        self.ae(json.loads(responses[0]['data'])[0]['tabs'][0]['windows'][0]['title'], 'one')
+        self.assertFalse(responses[1]['ok'])
+        responses = run(ls, failing, ls)
+        self.ae([r['ok'] for r in responses], [True, False, True])
+        # Commands that can only respond asynchronously are rejected
+        responses = run(json.dumps({'cmd': 'select-window'}), ls)
+        self.ae([r['ok'] for r in responses], [False, True])
+        self.assertIn('cannot be used in a batch', responses[0]['error'])
+        self.assertFalse(run(json.dumps({'cmd': 'batch', 'payload': {'commands': [ls]}}))[0]['ok'])
+
+    def test_session(self):
+        from kitty.rc.base import RemoteControlError
+        from kitty.remote_control import RemoteControlSession
+        tdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tdir)
+        path = os.path.join(tdir, 'sock')
+        server = socket.socket(socket.AF_UNIX)
+        server.bind(path)
+        server.listen()
+        received = []
+
+        def serve():
+            conn = server.accept()[0]
+            with conn:
+                pending = b''
+                while len(received) < 3:
+                    pending += conn.recv(4096)
+                    while (end := pending.find(b'\x1b\\')) > -1:
+                        received.append(json.loads(pending[len(b'\x1bP@kitty-cmd'):end]))
+                        pending = pending[end + 2:]
+                # Respond out of order, in two chunks, to check that responses are matched by request id
+                out = b''.join(
+                    b'\x1bP@kitty-cmd' + json.dumps({
+                        'ok': cmd['cmd'] == 'ls', 'data': cmd['cmd'], 'error': 'failed', 'request_id': cmd['request_id']
+                    }).encode() + b'\x1b\\' for cmd in reversed(received))
+                conn.sendall(out[:7])
+                conn.sendall(out[7:])
+                conn.recv(1)
+
+        t = Thread(target=serve, daemon=True)
+        t.start()
+        with RemoteControlSession(to=f'unix:{path}', response_timeout=10) as s:
+            first = s.send_command('ls', {})
+            second = s.send_command('set-tab-title', {'title': 'x'})
+            third = s.send_command('ls', {})
+            self.ae(len({first, second, third}), 3)
+            self.ae(s.wait_for_response(third)['data'], 'ls')
+            self.assertFalse(s.wait_for_response(second)['ok'])
+            self.ae(s.wait_for_response(first)['data'], 'ls')
+            self.assertFalse(s.received)
+        t.join(5)
+        server.close()
+        self.ae([c['request_id'] for c in received], [first, second, third])
+        self.ae([c['cmd'] for c in received], ['ls', 'set-tab-title', 'ls'])
+        self.assertRaises(RemoteControlError, RemoteControlSession.__call__, FailingSession(), 'ls')
+
+    def test_request_id(self):
+        from kitty.boss import add_request_id
+        self.ae(add_request_id({'ok': True}, {'request_id': '7'}), {'ok': True, 'request_id': '7'})
+        self.ae(add_request_id({'ok': True}, {}), {'ok': True})
+        self.assertIsNone(add_request_id(None, {'request_id': '7'}))
+
+    def test_encrypted_commands(self):
+        from kitty.fast_data_types import EllipticCurveKey
+
+        from .crypto import is_rlimit_memlock_too_low
+        if is_rlimit_memlock_too_low():
+            self.skipTest('RLIMIT_MEMLOCK is too low')
+        from kitty.constants import RC_ENCRYPTION_PROTOCOL_VERSION
+        from kitty.remote_control import CommandEncrypter, derived_secret, parse_cmd
+        key = EllipticCurveKey()
+        encrypter = CommandEncrypter(key.public, RC_ENCRYPTION_PROTOCOL_VERSION, 'pw')
+
+        def roundtrip(request_id):
+            raw = json.dumps(encrypter({'cmd': 'ls', 'version': [0, 1, 0], 'request_id': request_id})).encode()
+            return parse_cmd(memoryview(raw), key)
+
+        derived_secret.cache_clear()
+        self.ae(roundtrip('1')['request_id'], '1')
+        q = roundtrip('2')
+        self.ae((q['cmd'], q['password'], q['request_id']), ('ls', 'pw', '2'))
+        # The key exchange is done once per client key
+        self.ae(derived_secret.cache_info().hits, 1)
+
+
+class FailingSession:
+
+    def send_command(self, name, payload=None):
+        return '1'
+
+    def wait_for_response(self, request_id):
+        return {'ok': False, 'error': 'failed'}
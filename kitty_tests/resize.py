@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+
+from collections import deque
+
+from kitty.types import WindowGeometry
+
+from . import BaseTest
+
+
+class Timers:
+
+    def __init__(self):
+        self.pending = {}
+        self.counter = 0
+
+    def add_timer(self, callback, interval, repeats):
+        self.counter += 1
+        self.pending[self.counter] = callback
+        return self.counter
+
+    def remove_timer(self, timer_id):
+        del self.pending[timer_id]
+
+    def fire(self):
+        pending, self.pending = self.pending, {}
+        for timer_id, callback in pending.items():
+            callback(timer_id)
+
+
+class FakeTab:
+
+    active_window = None
+
+    def __init__(self, tab_id):
+        self.id = tab_id
+        self.num_relayouts = 0
+
+    def relayout(self):
+        self.num_relayouts += 1
+
+    def relayout_borders(self):
+        pass
+
+
+class TestResize(BaseTest):
+
+    def patch(self, module, **kw):
+        for name, val in kw.items():
+            self.addCleanup(setattr, module, name, getattr(module, name))
+            setattr(module, name, val)
+
+    def test_pty_resize_coalescing(self):
+        from kitty import window
+        from kitty.fast_data_types import get_options
+        timers, now = Timers(), [100.]
+        self.patch(
+            window, add_timer=timers.add_timer, remove_timer=timers.remove_timer, monotonic=lambda: now[0],
+            set_window_render_data=lambda *a: None, mark_os_window_dirty=lambda *a: None, call_watchers=lambda *a: None)
+        w = window.Window.__new__(window.Window)
+        w.id, w.os_window_id, w.tab_id = 1, 1, 1
+        w.destroyed = w.needs_layout = False
+        w.child_is_launched = True
+        w.geometry, w.geometry_sent_to = WindowGeometry(0, 0, 0, 0, 0, 0), None
+        w.screen = self.create_screen(cols=10, lines=5)
+        w.last_reported_pty_size, w.pty_size_changed_at = (-1, -1, -1, -1), 0.
+        w.pending_pty_size = w.pending_pty_size_timer = None
+        w.update_effective_padding = lambda: None
+        reported = []
+
+        def report_pty_size(pty_size):
+            reported.append(pty_size)
+            w.last_reported_pty_size = pty_size
+            return False
+        w.report_pty_size = report_pty_size
+        debounce_time = get_options().resize_debounce_time[0]
+
+        def resize(cols, lines, after=0.):
+            now[0] += after
+            w.set_geometry(WindowGeometry(0, 0, cols * 10, lines * 20, cols, lines))
+            return lines, cols, cols * 10, lines * 20
+
+        # a single resize is reported at once
+        first = resize(10, 5)
+        self.ae(reported, [first])
+        # a storm of resizes reports only the final size, once it stops changing
+        for i in range(1, 6):
+            last = resize(10 + i, 5 + i, debounce_time / 10)
+        self.ae(reported, [first])
+        self.ae(len(timers.pending), 1)
+        self.ae(w.screen.columns, 15)
+        timers.fire()
+        self.ae(reported, [first, last])
+        self.assertIsNone(w.pending_pty_size)
+        # a storm that returns to the last reported size reports nothing
+        resize(20, 10, debounce_time / 10)
+        resize(21, 11, debounce_time / 10)
+        self.ae(len(timers.pending), 1)
+        resize(15, 10, debounce_time / 10)
+        self.assertFalse(timers.pending)
+        self.assertIsNone(w.pending_pty_size)
+        self.ae(reported, [first, last])
+        # once resizing has paused the next resize is reported at once again
+        final = resize(12, 6, 2 * debounce_time)
+        self.ae(reported, [first, last, final])
+
+    def test_deferred_tab_relayout(self):
+        from kitty import tabs
+        timers = Timers()
+        self.patch(tabs, add_timer=timers.add_timer, remove_timer=timers.remove_timer, set_active_tab=lambda *a: None)
+        self.set_options()
+        tm = tabs.TabManager.__new__(tabs.TabManager)
+        tm.os_window_id = 1
+        tm.tabs = [FakeTab(i) for i in range(1, 4)]
+        tm._active_tab_idx = 0
+        tm.active_tab_history = deque()
+        tm.tabs_needing_relayout, tm.relayout_timer = set(), None
+        tm.mark_tab_bar_dirty = lambda: None
+        for i in range(3):
+            tm.resize(only_tabs=True)
+        self.ae([t.num_relayouts for t in tm.tabs], [3, 0, 0])
+        self.ae(len(timers.pending), 1)
+        # a deferred tab is laid out when it is activated
+        tm.set_active_tab_idx(1)
+        self.ae([t.num_relayouts for t in tm.tabs], [3, 1, 0])
+        tm.set_active_tab_idx(0)
+        self.ae([t.num_relayouts for t in tm.tabs], [3, 1, 0])
+        # and the remaining ones once resizing pauses
+        timers.fire()
+        self.ae([t.num_relayouts for t in tm.tabs], [3, 1, 1])
+        self.assertFalse(tm.tabs_needing_relayout)
+        self.assertIsNone(tm.relayout_timer)
@@ -3,7 +3,7 @@
 
 from kitty.config import defaults
 from kitty.fast_data_types import DECAWM, DECCOLM, DECOM, IRM, VT_PARSER_BUFFER_SIZE, Color, ColorProfile, Cursor
-from kitty.marks import marker_from_function, marker_from_regex
+from kitty.marks import marker_from_function, marker_from_multiple_regex, marker_from_regex
 from kitty.rgb import color_names
 from kitty.window import pagerhist
 
@@ -704,6 +704,30 @@ def test_wrapping_serialization(self):
         s.draw('a😀')
         self.ae(as_text(s), 'a😀')
 
+    def test_text_export(self):
+        from tempfile import TemporaryFile
+
+        from kitty.window import as_text, export_text, export_text_to_fd
+        s = self.create_screen(cols=5, lines=3, scrollback=4, options={'scrollback_pager_history_size': 1024})
+        for i in range(40):
+            s.select_graphic_rendition(31 + i % 7)
+            s.draw(f'{i}' * (i % 9))
+            s.carriage_return(), s.linefeed()
+        for as_ansi in (False, True):
+            for add_wrap_markers in (False, True):
+                kw = {'as_ansi': as_ansi, 'add_history': True, 'add_wrap_markers': add_wrap_markers}
+                expected = as_text(s, **kw)
+                chunks = []
+                export_text(s, chunks.append, chunk_size=16, **kw)
+                self.assertGreater(len(chunks), 2)
+                self.ae(''.join(chunks), expected)
+                with TemporaryFile() as f:
+                    num_lines = export_text_to_fd(f.fileno(), s, normalize_line_endings=True, **kw)
+                    f.seek(0)
+                    text = f.read().decode('utf-8')
+                self.ae(text, expected.replace('\r\n', '\n').replace('\r', '\n'))
+                self.ae(num_lines, text.count('\n'))
+
     def test_pagerhist(self):
         hsz = 8
         s = self.create_screen(cols=2, lines=2, scrollback=2, options={'scrollback_pager_history_size': hsz})
@@ -812,6 +836,19 @@ def mark_x(text):
         s.draw('x')
         s.set_marker(marker_from_function(mark_x))
         self.ae(s.marked_cells(), [(2, 0, 1), (4, 0, 2)])
+        m = marker_from_multiple_regex(((1, 'a'), (2, 'b+')))
+        spans, offsets = m.mark_lines(('xaxbb', None, '', 'ab'))
+        self.ae(list(spans), [1, 1, 1, 3, 4, 2, 0, 0, 1, 1, 1, 2])
+        self.ae(list(offsets), [0, 2, 2, 2, 4])
+        self.assertIs(m.spans('ab'), m.spans('ab'))
+        s = self.create_screen()
+        s.draw('xaxbb')
+        s.set_marker(m)
+        self.ae(s.marked_cells(), [(1, 0, 1), (3, 0, 2), (4, 0, 2)])
+        s.carriage_return(), s.linefeed()
+        s.draw('ab')
+        s.set_marker(m)
+        self.ae(s.marked_cells(), [(1, 0, 1), (3, 0, 2), (4, 0, 2), (0, 1, 1), (1, 1, 2)])
 
     def test_hyperlinks(self):
         s = self.create_screen()
@@ -28,3 +28,29 @@ def t(q, expected=set()):
         t('(id:1 or id:2) and id:1', {1})
         self.assertRaises(ParseException, t, '1')
         self.assertRaises(ParseException, t, '"id:1"')
+
+    def test_window_match_index(self):
+        from kitty.match_index import WindowMatchIndex
+        idx = WindowMatchIndex()
+        idx.add_window(1, 'vim one', 101, {'a': 'x'})
+        idx.add_window(2, 'vim two', 102, {'a': 'y', 'b': 'z'})
+        idx.add_window(3, 'zsh', 103, {})
+        self.ae(idx.matches('id', '2'), {2})
+        self.ae(idx.matches('id', '02'), set())
+        self.ae(idx.matches('pid', '103'), {3})
+        self.ae(idx.matches('title', '^vim'), {1, 2})
+        self.ae(idx.matches('title', '^zsh$'), {3})
+        self.assertIsNone(idx.matches('title', 'vim'))
+        self.assertIsNone(idx.matches('cwd', '^/tmp'))
+        self.ae(idx.matches('var', '^a$'), {1, 2})
+        self.ae(idx.matches('var', '^a$=^x$'), {1})
+        self.ae(idx.matches('var', '^a$=x|y'), {1, 2})
+        self.assertIsNone(idx.matches('var', 'a=x'))
+        idx.update_title(1, 'emacs')
+        idx.update_user_vars(2, {'b': 'z'})
+        idx.remove_window(3)
+        self.ae(idx.matches('title', '^vim'), {2})
+        self.ae(idx.matches('title', '^emacs$'), {1})
+        self.ae(idx.matches('var', '^a$'), {1})
+        self.ae(idx.matches('pid', '103'), set())
+        self.ae(idx.title_index.keys, ['emacs', 'vim two'])
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# License: GPLv3 Copyright: 2026, Kovid Goyal <kovid at kovidgoyal.net>
+
+
+from functools import partial
+from types import SimpleNamespace
+
+from . import BaseTest
+
+
+class FakeTab:
+
+    def __init__(self, cwd):
+        from kitty.tabs import Tab
+        self.cwd = cwd
+        self.num_cwd_queries = 0
+        self.active_window = SimpleNamespace(id=1, child=SimpleNamespace(foreground_process_group=1))
+        self.active_window_info, self.active_window_info_key = {}, (0, -1)
+        self.cached_active_window_info = partial(Tab.cached_active_window_info, self)
+        self.active_window_info_changed = partial(Tab.active_window_info_changed, self)
+
+    def mark_tab_bar_dirty(self):
+        pass
+
+    def get_cwd_of_active_window(self, oldest=False):
+        self.num_cwd_queries += 1
+        return self.cwd
+
+    def get_exe_of_active_window(self, oldest=False):
+        return '/bin/sh'
+
+
+class FakeBoss:
+
+    def __init__(self):
+        self.mappings = SimpleNamespace(current_keyboard_mode_name='')
+        self.tabs = {}
+
+    def tab_for_id(self, tab_id):
+        return self.tabs.get(tab_id)
+
+
+class TestTabBar(BaseTest):
+
+    def create_tab_bar(self, draw_func, template):
+        from kitty.fast_data_types import get_options
+        from kitty.tab_bar import DrawData, TabBar
+        s = self.create_screen(cols=60, lines=1)
+        opts = get_options()
+        bar = TabBar.__new__(TabBar)
+        bar.os_window_id = 0
+        bar.screen = s
+        bar.draw_func = draw_func
+        bar.draw_data = DrawData(
+            0, ' ┇', 0, opts.bell_on_tab, opts.tab_fade, opts.active_tab_foreground, opts.active_tab_background,
+            opts.inactive_tab_foreground, opts.inactive_tab_background, opts.background, template, None,
+            opts.tab_activity_symbol, 'angled', 'bottom', 0)
+        bar.active_font_style = opts.active_tab_font_style
+        bar.inactive_font_style = opts.inactive_tab_font_style
+        bar.laid_out_once = True
+        bar.cell_ranges = []
+        bar.tab_cache, bar.tab_cache_epoch = {}, ()
+        bar.align = lambda: None
+        return bar
+
+    def test_tab_bar_cache(self):
+        from kitty.fast_data_types import get_boss, set_boss
+        from kitty.tab_bar import TabBarData, draw_tab_with_fade, draw_tab_with_powerline, draw_tab_with_separator, draw_tab_with_slant
+        boss = FakeBoss()
+        set_boss(boss)
+        self.addCleanup(set_boss, get_boss())
+
+        def tab(tab_id, title, is_active=False):
+            boss.tabs.setdefault(tab_id, FakeTab(f'/dir{tab_id}'))
+            return TabBarData(title, is_active, False, tab_id, 1, 1, 'tall', False, None, None, None, None)
+
+        for draw_func in (draw_tab_with_separator, draw_tab_with_powerline, draw_tab_with_slant, draw_tab_with_fade):
+            for template in ('{index}:{title}', '{title} {tab.active_wd}'):
+                bar = self.create_tab_bar(draw_func, template)
+
+                def check(*data):
+                    bar.update(data)
+                    full = self.create_tab_bar(draw_func, template)
+                    full.update(data)
+                    line, expected = bar.screen.line(0), full.screen.line(0)
+                    self.ae((str(line), line.as_ansi()), (str(expected), expected.as_ansi()), f'{draw_func.__name__} {template}')
+                    self.ae(bar.cell_ranges, full.cell_ranges)
+                    return str(line)
+
+                check(tab(1, 'one', True), tab(2, 'two'), tab(3, 'three'))
+                self.assertTrue(bar.tab_cache)
+                check(tab(1, 'one', True), tab(2, 'two'), tab(3, 'three'))
+                check(tab(1, 'one'), tab(2, 'two', True), tab(3, 'three'))
+                # later tabs move when an earlier tab changes width
+                check(tab(1, 'a much longer title'), tab(2, 'two', True), tab(3, 'three'))
+                check(tab(2, 'two', True), tab(3, 'three'))
+                check(*(tab(i, f'tab {i}', i == 2) for i in range(1, 12)))
+                # process data is queried only when the active window changes
+                queries = boss.tabs[3].num_cwd_queries
+                self.ae(queries, int('active_wd' in template))
+                boss.tabs[3].cwd = '/elsewhere'
+                check(tab(2, 'two', True), tab(3, 'three'))
+                self.ae(boss.tabs[3].num_cwd_queries, queries)
+                boss.tabs[3].active_window.child.foreground_process_group += 1
+                text = check(tab(2, 'two', True), tab(3, 'three'))
+                self.ae('/elsewhere' in text, 'active_wd' in template)
+                boss.tabs[3].cwd = '/reported'
+                boss.tabs[3].active_window_info_changed(boss.tabs[3].active_window)
+                text = check(tab(2, 'two', True), tab(3, 'three'))
+                self.ae('/reported' in text, 'active_wd' in template)
+                boss.tabs.clear()
+
+    def test_custom_draw_func_not_cached(self):
+        from kitty.fast_data_types import get_boss, set_boss
+        from kitty.tab_bar import TabBarData, draw_tab_with_separator
+        boss = FakeBoss()
+        set_boss(boss)
+        self.addCleanup(set_boss, get_boss())
+        calls = []
+
+        def draw_tab(*a):
+            calls.append(a[2].tab_id)
+            return draw_tab_with_separator(*a)
+
+        bar = self.create_tab_bar(draw_tab, '{title}')
+        data = [TabBarData(f'tab {i}', i == 1, False, i, 1, 1, 'tall', False, None, None, None, None) for i in range(1, 4)]
+        bar.update(data)
+        del calls[:]
+        bar.update(data)
+        # called for every tab in both the layout and the drawing passes
+        self.ae(calls, [1, 2, 3, 1, 2, 3])
@@ -42,6 +42,107 @@ def test_line_edit(self):
         le.backspace()
         self.assertTrue(le.pending_bell)
 
+    def test_input_parser(self):
+        from kittens.tui.input_parser import InputParser, parse_stream, recorded_streams
+
+        def tp(*data, leftover=b'', **expected):
+            events = {}
+
+            def cb(kind):
+                return lambda x: events.setdefault(kind, []).append(x if isinstance(x, str) else str(x, 'utf-8'))
+
+            p = InputParser(cb('text'), cb('dcs'), cb('csi'), cb('osc'), cb('pm'), cb('apc'))
+            for d in data:
+                p.feed(d.encode() if isinstance(d, str) else d)
+            self.ae(bytes(p.buf[:p.used]), leftover)
+            self.ae({k: ' '.join(v) for k, v in events.items()}, expected)
+
+        tp('a\033[200~\033[32mxy\033[201~\033[33ma', text='a \033[32mxy a', csi='200~ 201~ 33m')
+        tp('abc', text='abc')
+        tp('a\033[38:5:12:32mb', text='a b', csi='38:5:12:32m')
+        tp('a\033_x,;(\033\\b', text='a b', apc='x,;(')
+        tp('a\033', '[', 'mb', text='a b', csi='m')
+        tp('a\033[', 'mb', text='a b', csi='m')
+        tp('a\033', '_', 'x\033', '\\b', text='a b', apc='x')
+        tp('a\033_', 'x', '\033', '\\', 'b', text='a b', apc='x')
+        tp('a\033xb', text='axb')
+        tp('a\033', text='a', leftover=b'\033')
+        tp('\033[200~ab\033[2', text='ab', csi='200~', leftover=b'\033[2')
+        tp('\033[200~ab\033[2', '01~c', text='ab c', csi='200~ 201~')
+        tp('λ'.encode()[:1], 'λ'.encode()[1:] + b'x', text='λx')
+        tp(b'\033[200~' + 'λ'.encode()[:1], 'λ'.encode()[1:] + b'\033[201~', text='λ', csi='200~ 201~')
+        tp('\033P@kitty-cmd{}\033\\\033]52;c;YQ==\033\\', dcs='@kitty-cmd{}', osc='52;c;YQ==')
+
+        def merged(events):
+            ans = []
+            for kind, payload in events:
+                if kind == 'text' and ans and ans[-1][0] == 'text':
+                    ans[-1] = kind, ans[-1][1] + payload
+                else:
+                    ans.append((kind, payload))
+            return ans
+
+        for name, data in recorded_streams().items():
+            data = data[:20000]
+            expected = merged(parse_stream((data,), chunk_size=len(data)))
+            for chunk_size in (1, 7, 4096):
+                self.ae(merged(parse_stream((data,), chunk_size=chunk_size)), expected, f'{name} with chunk size: {chunk_size}')
+
+    def test_frame_writer(self):
+        import asyncio
+
+        from kittens.tui.handler import FrameWriter, Handler
+        loop = asyncio.new_event_loop()
+
+        def run(delay=0):
+            loop.call_later(delay, loop.stop)
+            loop.run_forever()
+
+        def frame(x):
+            return FrameWriter.begin_sync + x + FrameWriter.end_sync
+
+        try:
+            writes = []
+            fw = FrameWriter(writes.append, loop, max_fps=10)
+            for i in range(100):
+                fw.write(f'{i} ')
+            fw.write(b'x')
+            fw.write('y')
+            self.assertFalse(writes)
+            run()
+            self.ae(writes, [frame(''.join(f'{i} ' for i in range(100)).encode() + b'xy')])
+            # frames are rate limited
+            fw.write('a')
+            run()
+            self.ae(len(writes), 1)
+            run(0.2)
+            self.ae(writes[-1], frame(b'a'))
+            fw.write('b')
+            fw.flush()
+            self.ae(writes[-1], frame(b'b'))
+            run(0.2)
+            self.ae(len(writes), 3)
+            fw = FrameWriter(writes.append, loop, synchronized=False)
+            fw.write('c')
+            run()
+            self.ae(writes[-1], b'c')
+
+            # atomic updates are not nested inside the synchronized frame
+            class H(Handler):
+                @Handler.atomic_update
+                def draw(self):
+                    self.write('d')
+
+            h = H.__new__(H)
+            for synchronized in (True, False):
+                h._frame_writer = FrameWriter(writes.append, loop, synchronized=synchronized)
+                h.draw()
+                run(0.2)
+            # without synchronized frames the update is wrapped by atomic_update instead
+            self.ae(writes[-2:], [frame(b'd'), frame(b'd')])
+        finally:
+            loop.close()
+
     def test_multiprocessing_spawn(self):
         from kitty.multiprocessing import test_spawn
         test_spawn()